@@ -1,15 +1,24 @@
 import numpy as np
 import random
-import pyaudio
-import struct
-import threading
 import pygame
 
+import oscillator
+from audioEngine import close_shared_engine, shared_engine
+from dspGraph import Envelope, Modulator, Oscillator, Param, Plan, PulseOscillator
+from synthProcess import ProcessVoice, close_shared_synth, shared_synth
+from toneCache import LoopPlayer, shared_tone_cache
+from oscillator import Scratch
+from config import Config
+
 
 class SoundGen:
     """
     音を生成するための基底クラス
 
+    パラメータの変化は1ブロックの中でサンプル単位の直線で補間する.
+    generate_buffer に渡した値はそのブロックの終わり（次のブロックの先頭）で
+    到達する目標値になり、ブロックの先頭の値は前回の目標値になる.
+
     Attributes
     ----------
     duration : float
@@ -19,7 +28,7 @@ class SoundGen:
     param_names : list[str]
         音のパラメータの名前
     params : dict[str, float]
-        音のパラメータの値
+        音のパラメータの値（直近のブロックの目標値）
     """
 
     def __init__(self) -> None:
@@ -29,17 +38,45 @@ class SoundGen:
         self.params = {}
         self.amplitude = 0.3  # 振幅を0.3に調整
         self.buffer_size = 1024  # バッファサイズを1024に増加
-        self.phase = 0.0  # 基本位相
-        self.am_phase = 0.0  # AM変調の位相
-        self.fm_phase = 0.0  # FM変調の位相
+        self.phase = 0.0  # 基本位相（周期単位, 0~1）
+        self.am_phase = 0.0  # AM変調の位相（周期単位）
+        self.fm_phase = 0.0  # FM変調の位相（周期単位）
         self.last_am_freq = 0.0  # 前回のAM周波数を保存
+        self.scratch = Scratch()  # render で使い回す作業用の配列
+        self.plan = None  # build_graph のグラフをまとめた評価計画（サブクラスで作る）
+
+    def reset_phase(self, initial_params: dict[str, float] | None = None) -> None:
+        """位相をリセット
 
-    def reset_phase(self) -> None:
-        """位相をリセット"""
+        Parameters
+        ----------
+        initial_params : dict[str, float] | None, optional
+            初期パラメータ。指定した値からランプせずに始める
+        """
         self.phase = 0.0
         self.am_phase = 0.0
         self.fm_phase = 0.0
         self.last_am_freq = 0.0
+        if self.plan is not None:
+            self.plan.reset()
+        if initial_params is not None:
+            for key in initial_params:
+                if key in self.params and initial_params[key] is not None:
+                    self.params[key] = initial_params[key]
+
+    def _ramp_params(self, params: dict[str, float]) -> dict[str, tuple[float, float]]:
+        """
+        パラメータごとにこのブロックの (先頭の値, 目標値) を返し、目標値を保存する
+        """
+        ramps = {}
+        for key in self.params:
+            start = self.params[key]
+            end = params.get(key, start)
+            if end is None:
+                end = start
+            ramps[key] = (start, end)
+            self.params[key] = end
+        return ramps
 
     def generate_buffer(self, params: dict[str, float]) -> np.ndarray:
         """
@@ -48,15 +85,70 @@ class SoundGen:
         Parameters
         ----------
         params : dict[str, float]
-            音のパラメータの値
+            音のパラメータの目標値（ブロックの終わりで到達する）
 
         Returns
         -------
         np.ndarray
-            生成された音声データ
+            生成された音声データ (float32)
+        """
+        out = np.empty(self.buffer_size, dtype=np.float32)
+        self.render(out, params)
+        return out
+
+    def render(self, out: np.ndarray, params: dict[str, float]) -> None:
+        """
+        呼び出し側が確保した float32 の配列 out に len(out) サンプル分の音声データを書き込むメソッド
+
+        作業用の配列は self.scratch を使い回すので、同じ長さで呼び続ける限り
+        新しい配列を確保しない.
+
+        Parameters
+        ----------
+        out : np.ndarray
+            音声データを書き込む float32 の配列
+        params : dict[str, float]
+            音のパラメータの目標値（ブロックの終わりで到達する）
+        """
+        self.plan.render(out, self._ramp_params(params), self.rate, self.amplitude)
+
+    def build_graph(self):
+        """
+        音を生成する DSP グラフ（dspGraph のノード）を組んで出力のノードを返すメソッド
+
+        パラメータは dspGraph.Param で、名前は param_names と同じにする.
         """
         pass
 
+    def carrier_frequency(self) -> float:
+        """現在のパラメータでの搬送波の周波数 (Hz). ToneCache が繰り返しの長さを周期に合わせるのに使う"""
+        return _frequency(self.params["frequency"])
+
+    def _compile(self) -> None:
+        # build_graph のグラフを評価計画にまとめる（サブクラスの __init__ の最後で呼ぶ）
+        self.plan = Plan(self.build_graph(), self.scratch)
+
+
+def _frequency(param: float) -> float:
+    # frequencyが0のとき220Hz、1のとき880Hz
+    return 220 * (4 ** param)
+
+
+def _am_frequency(param: float) -> float:
+    return 10 * (2 ** param - 1)
+
+
+def _duty_cycle(param: float) -> float:
+    return 0.5 + 0.45 * param
+
+
+def _am_envelope(carrier, threshold: float):
+    # AM変調: 1 + 0.3 sin(AM の位相) を掛ける. AM の周波数の |値| が threshold 以下の
+    # ブロックでは AM の発振器ごと飛ばす（位相も進めない）
+    am = Param("AM", _am_frequency)
+    lfo = Oscillator(oscillator.SINE, am, threshold=threshold)
+    return Envelope(carrier, Modulator(lfo, 0.3, offset=1.0))
+
 
 class PulseGen(SoundGen):
     """
@@ -81,63 +173,12 @@ class PulseGen(SoundGen):
             "dutycycle": 0.0,
             "AM": 0.0,
         }
-        self.last_freq = 220.0  # 前回の周波数を保存
-
-    def reset_phase(self, initial_params: dict[str, float] | None = None) -> None:
-        """位相をリセット
+        self._compile()
 
-        Parameters
-        ----------
-        initial_params : dict[str, float] | None, optional
-            初期パラメータ。指定しない場合はデフォルト値を使用
-        """
-        super().reset_phase()
-        if initial_params is not None and "frequency" in initial_params:
-            freq = 220 * (4 ** initial_params["frequency"])
-            self.last_freq = freq
-        else:
-            self.last_freq = 440.0
-
-    def generate_buffer(self, params: dict[str, float]) -> np.ndarray:
-        # パラメータを更新
-        for key in params:
-            if key in self.params:
-                self.params[key] = params[key]
-
-        # パラメータを計算
-        freq = 220 * (4 ** self.params["frequency"])
-        dutycycle = 0.5 + 0.45 * self.params["dutycycle"]
-        am = 10 * (2 ** self.params["AM"] - 1)
-
-        # 周波数の変化を滑らかにする
-        freq = self.last_freq + (freq - self.last_freq) * 0.1
-        self.last_freq = freq
-
-        # 時間配列を生成
-        x = np.arange(self.buffer_size)
-        phase_increment = 2.0 * np.pi * freq / self.rate
-        t = self.phase + phase_increment * x
-        t = t - np.trunc(t / (2.0 * np.pi)) * (2.0 * np.pi)  # 位相を0-2πの範囲に正規化
-        t = t / (2.0 * np.pi)  # 位相を0-1の範囲に変換
-
-        # パルス波を生成
-        wave = np.where(t < dutycycle, 1.0, -1.0)
-
-        # AM変調を適用
-        if am != 0:
-            am_freq = am
-            am_phase_increment = 2.0 * np.pi * am_freq / self.rate
-            am_phase = self.am_phase + am_phase_increment * x
-            am_envelope = 1.0 + 0.3 * np.sin(am_phase)
-            wave = wave * am_envelope
-            self.am_phase += am_phase_increment * self.buffer_size
-            self.last_am_freq = am_freq
-
-        # 位相を更新
-        self.phase += phase_increment * self.buffer_size
-        self.phase = self.phase % (2.0 * np.pi)  # 位相を0-2πの範囲に保持
-
-        return wave * self.amplitude
+    def build_graph(self):
+        # 帯域制限したパルス波を、周波数で選んだ段階のノコギリ波2本の差として引く
+        pulse = PulseOscillator(Param("frequency", _frequency), Param("dutycycle", _duty_cycle))
+        return _am_envelope(pulse, threshold=0.0)
 
 
 class SineGen(SoundGen):
@@ -163,86 +204,21 @@ class SineGen(SoundGen):
             "FM": 0.0,
             "AM": 0.0,
         }
-        self.last_freq = 440.0  # 前回の周波数を保存
         self.mod_freq = 1200.0  # 変調波の周波数（1200Hz）
-        self.phase = 0.0  # 基本位相
-        self.mod_phase = 0.0  # 変調波の位相
-        self.am_phase = 0.0  # AM変調の位相
         self.amplitude = 1.0  # 振幅を1.0に増加
+        self._compile()
 
-    def reset_phase(self, initial_params: dict[str, float] | None = None) -> None:
-        """位相をリセット
+    def build_graph(self):
+        # 搬送波の位相に変調波を加える（FM はラジアン単位の変調指数）.
+        # FM が掛かっていないブロックでは変調波ごと飛ばす
+        modulator = Oscillator(oscillator.SINE, self.mod_freq)
+        fm = Modulator(modulator, Param("FM"), unit=2.0 * np.pi, threshold=0.001)
+        carrier = Oscillator(oscillator.SINE, Param("frequency", _frequency), phase_mod=fm)
+        return _am_envelope(carrier, threshold=0.001)
 
-        Parameters
-        ----------
-        initial_params : dict[str, float] | None, optional
-            初期パラメータ。指定しない場合はデフォルト値を使用
-        """
-        super().reset_phase()
-        if initial_params is not None and "frequency" in initial_params:
-            freq = 220 * (4 ** initial_params["frequency"])
-            self.last_freq = freq
-        else:
-            self.last_freq = 440.0
-        self.phase = 0.0
-        self.mod_phase = 0.0
-        self.am_phase = 0.0
 
-    def generate_buffer(self, params: dict[str, float]) -> np.ndarray:
-        # パラメータを更新
-        for key in params:
-            if key in self.params:
-                self.params[key] = params[key]
-
-        # パラメータを計算
-        target_freq = 220 * (
-            4 ** self.params["frequency"]
-        )  # frequencyが0のとき220Hz、1のとき880Hz
-        fm = self.params["FM"]  # FMの強度
-        am = 10 * (2 ** self.params["AM"] - 1)
-
-        # 周波数の変化を滑らかにする
-        freq = self.last_freq + (target_freq - self.last_freq) * 0.1
-        self.last_freq = freq
-
-        # 時間配列を生成
-        x = np.arange(self.buffer_size)
-        t = x / self.rate  # 時間配列
-
-        # 波形を生成
-        if abs(fm) <= 0.001:  # FM変調なし
-            # 基本波形のみを生成
-            phase_increment = 2.0 * np.pi * freq / self.rate
-            phase = self.phase + phase_increment * x
-            wave = np.sin(phase)
-            self.phase += phase_increment * self.buffer_size
-            self.phase = self.phase % (2.0 * np.pi)
-        else:  # FM変調あり
-            # 変調波の位相を計算
-            mod_phase_increment = 2.0 * np.pi * self.mod_freq / self.rate
-            mod_phase = self.mod_phase + mod_phase_increment * x
-            mod_wave = np.sin(mod_phase)
-            self.mod_phase += mod_phase_increment * self.buffer_size
-            self.mod_phase = self.mod_phase % (2.0 * np.pi)
-
-            # 搬送波の位相を計算（FM変調を適用）
-            phase_increment = 2.0 * np.pi * freq / self.rate
-            phase = self.phase + phase_increment * x
-            carrier_phase = phase + fm * mod_wave
-            wave = np.sin(carrier_phase)
-            self.phase += phase_increment * self.buffer_size
-            self.phase = self.phase % (2.0 * np.pi)
-
-        # AM変調を適用
-        if abs(am) > 0.001:  # AM変調あり
-            am_phase_increment = 2.0 * np.pi * am / self.rate
-            am_phase = self.am_phase + am_phase_increment * x
-            am_envelope = 1.0 + 0.3 * np.sin(am_phase)
-            wave = wave * am_envelope
-            self.am_phase += am_phase_increment * self.buffer_size
-            self.am_phase = self.am_phase % (2.0 * np.pi)
-
-        return wave * self.amplitude
+# RandomSoundGen が選ぶ音源の名前
+SOUND_GEN_NAMES = ["PulseGen", "SineGen"]
 
 
 class RandomSoundGen:
@@ -258,19 +234,15 @@ class RandomSoundGen:
         音のパラメータの名前
     """
 
-    def __init__(self) -> None:
-        sound_gen_list = [
-            "PulseGen",
-            "SineGen",
-        ]
-        self.sound_name = random.choice(sound_gen_list)
+    def __init__(self, sound_name: str | None = None, param_name: str | None = None) -> None:
+        self.sound_name = sound_name or random.choice(SOUND_GEN_NAMES)
         if self.sound_name == "PulseGen":
             self.sound_gen = PulseGen()
         elif self.sound_name == "SineGen":
             self.sound_gen = SineGen()
         else:
             raise ValueError("Invalid sound generator name")
-        self.param_name = random.choice(self.sound_gen.param_names)
+        self.param_name = param_name or random.choice(self.sound_gen.param_names)
 
     def generate(self, param: float) -> pygame.mixer.Sound:
         """
@@ -314,15 +286,43 @@ class RandomSoundGen:
 
 
 class ContinuousSoundPlayer:
-    def __init__(self, sound_gen: SoundGen) -> None:
+    """
+    SoundGen の音を連続して再生するクラス
+
+    音声の出力はプロセス全体で共有する AudioEngine（shared_engine）に任せ、
+    このクラスはパラメータを保持してブロックごとに sound_gen から音を生成する.
+    start / stop は音源をエンジンにつなぐ / 外すだけなので、デバイスは開き直さない.
+
+    Parameters
+    ----------
+    sound_gen : SoundGen
+        音を生成する SoundGen
+    block_size : int
+        1回に生成・出力するサンプル数（共有のエンジンがまだないときに使う）
+    null_device : bool
+        True のとき音声デバイスを使わずに再生する（共有のエンジンがまだないときに使う, 検証用）
+    sink : AudioSink | str | None
+        出力先（共有のエンジンがまだないときに使う）. NullSink や CaptureSink を渡すと
+        音声デバイスのない環境でもシーンと同じように再生できる
+    """
+
+    def __init__(
+        self,
+        sound_gen: SoundGen,
+        block_size: int = Config.AUDIO_BLOCK_SIZE,
+        null_device: bool = False,
+        sink=None,
+    ) -> None:
         self.sound_gen = sound_gen
         self.running = False
         self.current_params = sound_gen.params.copy()
         self.target_params = sound_gen.params.copy()
-        self.interpolation_speed = 0.1  # 補間速度を調整
-        self.audio_thread = None
-        self.p = None
-        self.stream = None
+        self.block_size = block_size
+        self.null_device = null_device
+        self.sink = sink
+        self.engine = None
+        # attach / detach で同じ音源だと分かるように、束縛メソッドを1つだけ作っておく
+        self._source = self._render
 
     def start(self, initial_params: dict[str, float] | None = None) -> None:
         """音声再生を開始
@@ -332,7 +332,35 @@ class ContinuousSoundPlayer:
         initial_params : dict[str, float] | None, optional
             初期パラメータ。指定しない場合はsound_genのデフォルト値を使用
         """
+        if self.engine:
+            self.stop()
+        engine = self._shared_engine()
         self.running = True
+        self.block_size = engine.block_size
+        self.prepare(initial_params)
+        self.engine = engine
+        self.engine.attach(self._source)
+
+    def _shared_engine(self):
+        """共有のエンジンを返す（まだなければこのプレイヤーの設定で開く）"""
+        engine = shared_engine(
+            self.sound_gen.rate, self.block_size, self.null_device, sink=self.sink
+        )
+        if engine.rate != self.sound_gen.rate:
+            raise ValueError(
+                f"サンプリングレートが共有のエンジンと異なります: {self.sound_gen.rate} != {engine.rate}"
+            )
+        return engine
+
+    def prepare(self, initial_params: dict[str, float] | None = None) -> None:
+        """
+        位相とパラメータを初期状態にするメソッド（start と offlineRender から呼ばれる）
+
+        Parameters
+        ----------
+        initial_params : dict[str, float] | None, optional
+            初期パラメータ。指定しない場合はsound_genのデフォルト値を使用
+        """
         self.sound_gen.reset_phase(
             initial_params
         )  # 開始時に位相をリセット（初期パラメータを渡す）
@@ -340,32 +368,19 @@ class ContinuousSoundPlayer:
         # 初期パラメータを設定
         if initial_params is not None:
             for key in initial_params:
-                if key in self.current_params:
+                if key in self.current_params and initial_params[key] is not None:
                     self.current_params[key] = initial_params[key]
                     self.target_params[key] = initial_params[key]
 
-        self.p = pyaudio.PyAudio()
-        self.stream = self.p.open(
-            format=pyaudio.paFloat32,
-            channels=1,
-            rate=self.sound_gen.rate,
-            output=True,
-            frames_per_buffer=self.sound_gen.buffer_size,
-        )
-        self.audio_thread = threading.Thread(target=self._audio_loop)
-        self.audio_thread.daemon = True
-        self.audio_thread.start()
+        self.sound_gen.buffer_size = self.block_size
 
     def stop(self) -> None:
         """音声再生を停止"""
         self.running = False
-        if self.audio_thread:
-            self.audio_thread.join()
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        if self.p:
-            self.p.terminate()
+        if self.engine:
+            # フェードアウトして外れるまで待ってから位相をリセットする
+            self.engine.detach(self._source)
+            self.engine = None
         self.sound_gen.reset_phase()  # 停止時に位相をリセット
 
     def update_params(self, params: dict[str, float]) -> None:
@@ -373,42 +388,178 @@ class ContinuousSoundPlayer:
         for key in params:
             if key in self.target_params:
                 self.target_params[key] = params[key]
-                # 現在値も即座に更新（補間を避ける）
+                # 補間は sound_gen が次のブロックの中でサンプル単位で行う
                 self.current_params[key] = params[key]
 
-    def _audio_loop(self) -> None:
-        """音声生成と再生のループ"""
-        while self.running:
-            try:
-                # パラメータの補間
-                for key in self.current_params:
-                    self.current_params[key] += (
-                        self.target_params[key] - self.current_params[key]
-                    ) * self.interpolation_speed
+    def output_latency(self) -> float:
+        """実際の出力遅延（秒）"""
+        return self.engine.output_latency() if self.engine else 0.0
 
-                # 音声データを生成
-                wave = self.sound_gen.generate_buffer(self.current_params)
+    def _render(self, out: np.ndarray) -> None:
+        """AudioEngine から呼ばれ、エンジンのブロック out に音声データを書き込む"""
+        # 目標値に向けてブロック内でサンプル単位に補間される
+        self.sound_gen.render(out, self.target_params)
 
-                # 音声データを再生
-                self.stream.write(wave.astype(np.float32).tobytes())
 
-            except Exception as e:
-                print(f"Error in audio loop: {e}")
-                self.running = False  # エラーが発生したら停止
+def calibration_probe():
+    """
+    AudioEngine の起動時にブロックサイズを選ぶための、代表的な生成の処理を返す
+
+    ゲームで最も重い SineGen の FM + AM を、共有のエンジンと同じ形 (render(out)) で呼べるようにする.
+    """
+    sound_gen = SineGen()
+    params = dict(sound_gen.params, FM=0.8, AM=0.5)
+    return lambda out: sound_gen.render(out, params)
+
+
+# ProcessSoundPlayer のワーカーで生成できる SoundGen（添字をワーカーに送る）
+PROCESS_GENERATORS = (SineGen, PulseGen)
+
+
+class ProcessSoundPlayer(ContinuousSoundPlayer):
+    """
+    SoundGen の音を別のプロセスで生成・出力して再生するクラス
+
+    生成と出力先（音声デバイス）への出力は共有の SynthServer のワーカーで行い、
+    パラメータは共有メモリの制御ブロックで送る. ゲームのプロセスの AudioEngine は使わず、
+    音声の経路にゲームのプロセスの Python が入らないので、pygame の描画ループが
+    GIL を握り続けても音が途切れない. 使い方は ContinuousSoundPlayer と同じ.
+
+    ワーカーは sound_gen と同じクラスの新しいインスタンスで音を生成するので、
+    sound_gen のクラスは PROCESS_GENERATORS に含まれている必要がある.
+
+    Parameters
+    ----------
+    sound_gen : SoundGen
+        生成する音の種類と初期パラメータ
+    block_size : int
+        1回に生成・出力するサンプル数（共有のサーバーがまだないときに使う）
+    null_device : bool
+        True のとき音声デバイスを使わずに再生する（共有のサーバーがまだないときに使う, 検証用）
+    sink : AudioSink | str | None
+        ワーカーの出力先（共有のサーバーがまだないときに使う）
+    queue_blocks : int
+        ワーカーが先行して生成しておくブロック数（共有のサーバーがまだないときに使う）
+    """
+
+    def __init__(
+        self,
+        sound_gen: SoundGen,
+        block_size: int = Config.AUDIO_BLOCK_SIZE,
+        null_device: bool = False,
+        sink=None,
+        queue_blocks: int = Config.AUDIO_PROCESS_BLOCKS,
+    ) -> None:
+        if type(sound_gen) not in PROCESS_GENERATORS:
+            raise ValueError(f"別のプロセスで生成できない音源です: {type(sound_gen).__name__}")
+        super().__init__(sound_gen, block_size, null_device, sink)
+        self.queue_blocks = queue_blocks
+        self.voice = None
+
+    @property
+    def underruns(self) -> int:
+        """ワーカーの出力が途切れた回数（キューのアンダーランと出力先のアンダーフロー）"""
+        return self.voice.server.underruns + self.voice.server.xruns if self.voice else 0
+
+    def start(self, initial_params: dict[str, float] | None = None) -> None:
+        if self.voice:
+            self.stop()
+        server = shared_synth(
+            PROCESS_GENERATORS,
+            self.block_size,
+            self.queue_blocks,
+            sink="null" if self.sink is None and self.null_device else self.sink,
+        )
+        self.voice = ProcessVoice(
+            server, PROCESS_GENERATORS.index(type(self.sound_gen)), self.sound_gen.param_names
+        )
+        self.running = True
+        self.block_size = server.block_size
+        self.prepare(initial_params)
+
+    def prepare(self, initial_params: dict[str, float] | None = None) -> None:
+        super().prepare(initial_params)
+        if self.voice:
+            # ワーカーは初期パラメータで位相をリセットしてから生成を始める
+            self.voice.start(self.target_params)
+
+    def stop(self) -> None:
+        """音声再生を停止（ワーカーがフェードアウトして止める）"""
+        self.running = False
+        if self.voice:
+            self.voice.stop()
+            self.voice.close()
+            self.voice = None
+        self.sound_gen.reset_phase()
+
+    def update_params(self, params: dict[str, float]) -> None:
+        super().update_params(params)
+        if self.voice:
+            self.voice.set_params(self.target_params)
+
+    def output_latency(self) -> float:
+        """実際の出力遅延（秒）. ワーカーのエンジンのキューと出力先のバッファの合計"""
+        return self.voice.server.output_latency() if self.voice else 0.0
 
 
 class RandomSoundPlayer:
-    def __init__(self) -> None:
-        self.sound_gen = RandomSoundGen()
-        self.player = ContinuousSoundPlayer(self.sound_gen.sound_gen)
+    """
+    ランダムに選んだ音源とパラメータの音を再生するクラス
+
+    play_target は正解音を ToneCache から引いて繰り返し再生し、start は手で動かす音を
+    その場で生成して再生する. どちらかを始めるともう一方は止まる.
+    Config.AUDIO_SYNTH_PROCESS のときは、ゲームのプロセスから音を出さないように
+    正解音もパラメータを固定してワーカーで生成する.
+
+    Parameters
+    ----------
+    sound_name : str | None
+        音源の名前（None のときランダムに選ぶ）
+    param_name : str | None
+        動かすパラメータの名前（None のときランダムに選ぶ）
+    """
+
+    def __init__(self, sound_name: str | None = None, param_name: str | None = None) -> None:
+        self.sound_gen = RandomSoundGen(sound_name, param_name)
+        if Config.AUDIO_SYNTH_PROCESS:
+            self.player = ProcessSoundPlayer(self.sound_gen.sound_gen)
+            self.loop = None
+        else:
+            self.player = ContinuousSoundPlayer(self.sound_gen.sound_gen)
+            self.loop = LoopPlayer()
         self.param_name = self.sound_gen.param_name
 
     def start(self, param: float | None = None) -> None:
         """音声再生を開始"""
+        if self.loop:
+            self.loop.stop()
         self.player.start({self.param_name: param})
 
+    def play_target(self, param: float) -> None:
+        """
+        パラメータを param に固定した正解音を繰り返し再生する
+
+        音は ToneCache から引くので、prefetch しておけば生成を待たずに鳴り始める.
+        """
+        if self.loop is None:
+            # ワーカーで生成する（パラメータを固定したまま更新しない）
+            self.player.start({self.param_name: param})
+            return
+        if self.player.engine:
+            self.player.stop()
+        tone = shared_tone_cache().get(type(self.sound_gen.sound_gen), self.param_name, param)
+        self.loop.start(tone, self.player._shared_engine())
+
+    def prefetch_target(self, param: float) -> None:
+        """play_target で使う正解音をバックグラウンドで生成しておく"""
+        if self.loop is None:
+            return  # ワーカーで生成するのでキャッシュは使わない
+        shared_tone_cache().prefetch(type(self.sound_gen.sound_gen), self.param_name, param)
+
     def stop(self) -> None:
         """音声再生を停止"""
+        if self.loop:
+            self.loop.stop()
         self.player.stop()
 
     def update_param(self, value: float) -> None:
@@ -464,3 +615,5 @@ if __name__ == "__main__":
         pass
     finally:
         player.stop()
+        close_shared_engine()
+        close_shared_synth()
@@ -0,0 +1,432 @@
+# audioEngine.py
+import threading
+import time
+
+import numpy as np
+
+from audioSink import COMPLETE, CONTINUE, OUTPUT_UNDERFLOW, AudioSink, NullSink, make_sink
+from audioStats import AudioStats, StatsReporter
+from audioTuner import BLOCK_SIZES, BlockTuner
+
+
+class SampleQueue:
+    """
+    float32 のサンプルを受け渡す単一生産者・単一消費者のリングバッファ
+
+    書き込み位置は生産者だけが、読み込み位置は消費者だけが更新するので
+    ロックを使わずに受け渡しできる（どちらも単調増加する整数で保持する）.
+
+    Parameters
+    ----------
+    capacity : int
+        保持できるサンプル数
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=np.float32)
+        self._write = 0  # これまでに書き込んだサンプル数（生産者のみ更新）
+        self._read = 0  # これまでに読み込んだサンプル数（消費者のみ更新）
+
+    def available(self) -> int:
+        """読み込めるサンプル数"""
+        return self._write - self._read
+
+    def free(self) -> int:
+        """書き込めるサンプル数"""
+        return self.capacity - (self._write - self._read)
+
+    def write(self, samples: np.ndarray) -> int:
+        """samples を書き込めるだけ書き込み、書き込んだサンプル数を返す"""
+        count = min(len(samples), self.free())
+        start = self._write % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start : start + first] = samples[:first]
+        self._buffer[: count - first] = samples[first:count]
+        # データを書き終えてから位置を公開する
+        self._write += count
+        return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """out を埋められるだけ読み込み、読み込んだサンプル数を返す"""
+        count = min(len(out), self.available())
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._buffer[start : start + first]
+        out[first:count] = self._buffer[: count - first]
+        self._read += count
+        return count
+
+
+class MixBus:
+    """
+    複数の音源を足し合わせて1本にする入れ物
+
+    音源は float32 の配列 out を受け取り、その長さの音声データを書き込む関数.
+    つないだ直後と外す直前の1ブロックはゲインを直線的に上げ下げして、
+    途中から鳴り始めたり途切れたりするときのクリックを防ぐ.
+    例外を投げた音源はそのブロックを無音にして外し、stats に記録する.
+
+    Parameters
+    ----------
+    stats : AudioStats | None
+        音源の例外を記録する計測値（None のときは出力するだけ）
+    """
+
+    def __init__(self, stats: AudioStats | None = None) -> None:
+        self.stats = stats
+        self._sources = ()  # (音源, 状態) の組. 描画スレッドは差し替えた組だけを読む
+        self._lock = threading.Lock()
+        self._removed = threading.Condition(self._lock)
+        self._fade_in = np.zeros(0, dtype=np.float32)
+        self._fade_out = np.zeros(0, dtype=np.float32)
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def attach(self, source) -> None:
+        """音源をつなぐ（次のブロックからフェードインして鳴り始める）"""
+        with self._lock:
+            if not any(s is source for s, _ in self._sources):
+                self._sources = self._sources + ((source, _FADE_IN),)
+
+    def detach(self, source, timeout: float | None = None) -> None:
+        """
+        音源を外す（次のブロックでフェードアウトしてから外れる）
+
+        timeout を指定すると、描画スレッドが音源を外し終えるまで最大 timeout 秒待つ.
+        外し終えた後は音源が呼ばれないので、音源の状態を書き換えてよい.
+        """
+        with self._lock:
+            self._sources = tuple(
+                (s, _FADE_OUT if s is source else state) for s, state in self._sources
+            )
+            if timeout is not None:
+                self._removed.wait_for(
+                    lambda: not any(s is source for s, _ in self._sources), timeout
+                )
+
+    def remove(self, source) -> None:
+        """フェードせずにすぐ音源を外す（描画していないとき用）"""
+        with self._lock:
+            self._sources = tuple((s, state) for s, state in self._sources if s is not source)
+            self._removed.notify_all()
+
+    def render(self, out: np.ndarray) -> None:
+        """つないでいる音源を足し合わせて out に書き込む"""
+        out.fill(0.0)
+        sources = self._sources
+        if not sources:
+            return
+        frames = len(out)
+        if len(self._buffer) != frames:
+            self._buffer = np.zeros(frames, dtype=np.float32)
+            self._fade_in = np.linspace(0.0, 1.0, frames, endpoint=False, dtype=np.float32)
+            self._fade_out = self._fade_in[::-1].copy()
+        buffer = self._buffer
+
+        changed = False
+        failed = None  # 例外を投げた音源の id
+        for source, state in sources:
+            try:
+                source(buffer)
+            except Exception as e:
+                self._record_error(source, e)
+                failed = (failed or set()) | {id(source)}
+                changed = True
+                continue
+            if state == _FADE_IN:
+                buffer *= self._fade_in
+                changed = True
+            elif state == _FADE_OUT:
+                buffer *= self._fade_out
+                changed = True
+            out += buffer
+        # 複数の音源を足すと 1 を超えることがあるので、デバイスに渡す前に収める
+        np.minimum(out, 1.0, out=out)
+        np.maximum(out, -1.0, out=out)
+
+        if changed:
+            # フェードし終えた音源の状態を進める（その間に変わった分はそのまま残す）
+            with self._lock:
+                faded = {id(source): state for source, state in sources if state != _PLAYING}
+                failed = failed or ()
+                self._sources = tuple(
+                    (s, _PLAYING if faded.get(id(s)) == _FADE_IN == state else state)
+                    for s, state in self._sources
+                    if not (state == _FADE_OUT and faded.get(id(s)) == _FADE_OUT) and id(s) not in failed
+                )
+                self._removed.notify_all()
+
+    def _record_error(self, source, error: Exception) -> None:
+        if self.stats is not None:
+            self.stats.record_error(error)
+        else:
+            print(f"Error in audio source {source}: {error}")
+
+
+# MixBus の音源の状態
+_PLAYING = 0
+_FADE_IN = 1
+_FADE_OUT = 2
+
+
+class AudioEngine:
+    """
+    PyAudio のコールバック API と同じ形で出力先 (AudioSink) に音声を出力するエンジン
+
+    描画用のスレッドが render(block) で小さなブロックを先に生成して
+    SampleQueue に貯めておき、出力先のコールバックはキューから取り出すだけにする.
+    コールバックの中では音声を生成しないので、GIL の取り合いで
+    生成が遅れても、キューに貯めた分だけは途切れずに再生できる.
+
+    ブロックもコールバックの出力もエンジンが確保した float32 の配列を使い回す.
+    zero_copy の出力先には配列の memoryview をそのまま渡すが、PyAudio のコールバックは
+    bytes しか受け付けないので、その場合だけ最後に1回 bytes にコピーする.
+
+    render を省略すると MixBus を描画するので、attach / detach で
+    再生中に音源をつないだり外したりできる（shared_engine はこの形で使う）.
+
+    adaptive を指定すると、BlockTuner が生成時間とアンダーラン（出力先のアンダーフローを含む）を見て
+    生成するブロックの大きさとキューに貯める量を再生中に変える. 出力先のブロックの
+    大きさは開いたときのまま（起動時の計測で、GIL を待つ時間の余裕を持たせて選んだ値）で、キューには出力先の1ブロックと
+    生成するブロック (queue_blocks - 1) 個分を貯める.
+
+    Parameters
+    ----------
+    render : callable | None
+        float32 の配列を受け取り、その長さの音声データを書き込む関数
+    rate : int
+        サンプリングレート
+    block_size : int
+        1回に生成・出力するサンプル数（64~256 程度を想定）
+    queue_blocks : int
+        キューに先行して貯めるブロック数
+    null_device : bool
+        True のとき音声デバイスを使わず NullSink に出力する（sink=NullSink() と同じ）
+    sink : AudioSink | str | None
+        出力先. 文字列のときは make_sink で作る. None のときは "pyaudio"
+    stats_interval : float | None
+        指定すると、計測値 (stats) をこの間隔（秒）で出力する
+    adaptive : bool
+        True のときブロックサイズを BlockTuner で調整する
+    block_sizes : tuple[int, ...]
+        adaptive のときに選べるブロックサイズ
+    probe : callable | None
+        adaptive のとき、起動時にブロックサイズを選ぶために計測する代表的な生成の処理
+        （render と同じ形の関数）. None のときは block_size から始める
+
+    Attributes
+    ----------
+    stats : AudioStats
+        生成時間・待ち時間・キューの深さ・アンダーランなどの計測値
+    """
+
+    def __init__(
+        self,
+        render=None,
+        rate: int = 44100,
+        block_size: int = 256,
+        queue_blocks: int = 4,
+        null_device: bool = False,
+        stats_interval: float | None = None,
+        sink: AudioSink | str | None = None,
+        adaptive: bool = False,
+        block_sizes: tuple[int, ...] = BLOCK_SIZES,
+        probe=None,
+    ) -> None:
+        if sink is None:
+            sink = NullSink() if null_device else "pyaudio"
+        if isinstance(sink, str):
+            sink = make_sink(sink)
+        self.stats = AudioStats(rate)
+        self.bus = MixBus(self.stats) if render is None else None
+        self.render = self.bus.render if render is None else render
+        self.rate = rate
+        self.tuner = BlockTuner(rate, block_size, block_sizes) if adaptive else None
+        self.probe = probe
+        self.block_size = self.tuner.block_size if adaptive else block_size
+        self.device_block = self.block_size  # 出力先のブロックサイズ（開いた後は変えない）
+        self.max_block_size = max(self.tuner.sizes) if adaptive else block_size
+        self.queue_blocks = queue_blocks
+        self.queue = SampleQueue(self.max_block_size * queue_blocks)
+        self.lead = self.block_size * queue_blocks  # キューに貯めるサンプル数
+        self.sink = sink
+        self.stats.block_size = self.block_size
+        self.stats_interval = stats_interval
+        self._reporter = None
+        self._waited = 0.0  # 前のブロックを書き込んでから待った時間
+        self.running = False
+        block = np.zeros(self.max_block_size, dtype=np.float32)
+        sizes = self.tuner.sizes if adaptive else (block_size,)
+        self._blocks = {size: block[:size] for size in sizes}  # サイズ -> render に渡すブロック
+        self._out = np.zeros(self.max_block_size, dtype=np.float32)  # コールバックの出力
+        self._out_view = memoryview(self._out).cast("B")
+        self._render_thread = None
+
+    def start(self) -> None:
+        """キューを埋めてから出力先を開いて再生を始める"""
+        if self.tuner and self.probe:
+            self.device_block = self.tuner.calibrate(self.probe)
+            self._set_block_size(self.device_block)
+        self.running = True
+        while self.queue.available() + self.block_size <= self.lead:
+            self._render_block()
+
+        self._render_thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._render_thread.start()
+        if self.stats_interval:
+            self._reporter = StatsReporter(self.stats, self.stats_interval)
+
+        self.sink.open(self.rate, self.device_block, self._callback)
+
+    def stop(self) -> None:
+        """再生を停止して出力先を閉じる"""
+        self.running = False
+        if self._reporter:
+            self._reporter.stop()
+            self._reporter = None
+        if self._render_thread:
+            self._render_thread.join()
+            self._render_thread = None
+        self.sink.close()
+
+    @property
+    def underruns(self) -> int:
+        """キューが空でコールバックに無音を返した回数"""
+        return self.stats.underruns
+
+    @property
+    def xruns(self) -> int:
+        """出力先（PortAudio）が報告したアンダーフローの回数"""
+        return self.stats.xruns
+
+    def attach(self, source) -> None:
+        """音源を MixBus につなぐ"""
+        self.bus.attach(source)
+
+    def detach(self, source) -> None:
+        """
+        音源を MixBus から外す. 再生中はフェードアウトして外れるまで待つので、
+        戻った後は音源の状態を書き換えてよい
+        """
+        if self.running and self._render_thread is not None:
+            # キューに貯まっている分の生成が終わるまでには外れる
+            timeout = 2 * self.queue.capacity / self.rate + 0.1
+            self.bus.detach(source, timeout=timeout)
+        self.bus.remove(source)
+
+    def output_latency(self) -> float:
+        """
+        出力の遅延（秒）. キューに貯まっているサンプルとデバイス側のバッファの合計
+        """
+        return self.queue.available() / self.rate + self.sink.output_latency()
+
+    def _set_block_size(self, size: int) -> None:
+        """生成するブロックの大きさとキューに貯める量を変える（描画スレッドから呼ぶ）"""
+        self.block_size = size
+        self.lead = self.device_block + size * (self.queue_blocks - 1)
+        self.stats.block_size = size
+
+    def _render_loop(self) -> None:
+        """キューに空きがあればブロックを生成して貯めるループ"""
+        while self.running:
+            try:
+                if self.queue.available() + self.block_size <= self.lead:
+                    self._render_block()
+                else:
+                    start = time.perf_counter()
+                    time.sleep(self.block_size / self.rate / 2)
+                    self._waited += time.perf_counter() - start
+            except Exception as e:
+                print(f"Error in audio render loop: {e}")
+                self.stats.record_error(e)
+                self.running = False  # エラーが発生したら停止
+
+    def _render_block(self) -> None:
+        """1ブロックを生成してキューに書き込む"""
+        block = self._blocks[self.block_size]
+        depth = self.queue.available()
+        start = time.perf_counter()
+        self.render(block)
+        seconds = time.perf_counter() - start
+        self.stats.record_render(len(block), seconds, depth)
+        self.stats.wait_time.record(self._waited)
+        self._waited = 0.0
+        self.queue.write(block)
+        if self.tuner:
+            size = self.tuner.update(len(block), seconds, self.stats.underruns, self.stats.xruns)
+            if size != self.block_size:
+                self._set_block_size(size)
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """出力先から呼ばれ、キューから frame_count サンプルを取り出して返す"""
+        start = time.perf_counter()
+        if status & OUTPUT_UNDERFLOW:
+            self.stats.xruns += 1
+        if len(self._out) < frame_count:
+            self._out = np.zeros(frame_count, dtype=np.float32)
+            self._out_view = memoryview(self._out).cast("B")
+        out = self._out[:frame_count]
+        count = self.queue.read_into(out)
+        if count < frame_count:
+            out[count:] = 0.0
+            self.stats.underruns += 1
+        flag = CONTINUE if self.running else COMPLETE
+        data = self._out_view[: frame_count * 4]
+        if not self.sink.zero_copy:
+            data = data.tobytes()  # PyAudio は bytes しか受け付けない
+        self.stats.record_callback(frame_count, time.perf_counter() - start)
+        return data, flag
+
+
+# プロセス全体で共有するエンジン（shared_engine で作る）
+_shared_engine = None
+_shared_lock = threading.Lock()
+
+
+def shared_engine(
+    rate: int = 44100,
+    block_size: int = 256,
+    null_device: bool = False,
+    stats_interval: float | None = None,
+    sink: AudioSink | str | None = None,
+    queue_blocks: int = 4,
+    adaptive: bool = False,
+    block_sizes: tuple[int, ...] = BLOCK_SIZES,
+    probe=None,
+) -> AudioEngine:
+    """
+    プロセス全体で1つの MixBus 付きのエンジンを返す（最初の呼び出しでデバイスを開く）
+
+    2回目以降の呼び出しでは引数は使わず、最初に開いたエンジンを返す.
+    シーンやプレイヤーは attach / detach で音源をつなぎ替えるだけなので、
+    ラウンドやシーンを切り替えてもデバイスを開き直さない.
+    """
+    global _shared_engine
+    with _shared_lock:
+        if _shared_engine is None:
+            engine = AudioEngine(
+                rate=rate,
+                block_size=block_size,
+                queue_blocks=queue_blocks,
+                null_device=null_device,
+                stats_interval=stats_interval,
+                sink=sink,
+                adaptive=adaptive,
+                block_sizes=block_sizes,
+                probe=probe,
+            )
+            engine.start()
+            _shared_engine = engine
+        return _shared_engine
+
+
+def close_shared_engine() -> None:
+    """共有のエンジンを止めてデバイスを閉じる（終了時に呼ぶ）"""
+    global _shared_engine
+    with _shared_lock:
+        if _shared_engine is not None:
+            _shared_engine.stop()
+            _shared_engine = None
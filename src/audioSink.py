@@ -0,0 +1,253 @@
+# audioSink.py
+import struct
+import threading
+import time
+
+import numpy as np
+
+# コールバックの戻り値と status の値（PortAudio / PyAudio と同じ値）.
+# pyaudio を読み込まなくても使えるようにここで定義する
+CONTINUE = 0  # paContinue
+COMPLETE = 1  # paComplete
+OUTPUT_UNDERFLOW = 0x4  # paOutputUnderflow
+
+
+class AudioSink:
+    """
+    AudioEngine の出力先の基底クラス
+
+    出力先は PyAudio のコールバック API と同じ形で
+    callback(in_data, frame_count, time_info, status) -> (data, flag) を呼び出し、
+    返ってきた float32 のモノラルの音声データを出力する.
+
+    Attributes
+    ----------
+    zero_copy : bool
+        True のとき、callback は data に memoryview をそのまま返してよい
+        （False の出力先には bytes にコピーしてから返す）
+    frames_played : int
+        出力したサンプル数
+    """
+
+    zero_copy = False
+
+    def __init__(self) -> None:
+        self.frames_played = 0
+
+    def open(self, rate: int, block_size: int, callback) -> None:
+        """出力を開いて callback の呼び出しを始める"""
+        pass
+
+    def close(self) -> None:
+        """出力を止めて閉じる"""
+        pass
+
+    def output_latency(self) -> float:
+        """出力先のバッファによる遅延（秒）"""
+        return 0.0
+
+    def is_active(self) -> bool:
+        return False
+
+
+class PyAudioSink(AudioSink):
+    """
+    PyAudio（PortAudio）で音声デバイスに出力する出力先
+
+    pyaudio は open で初めて読み込むので、PortAudio のない環境でも
+    この出力先を使わない限りモジュールを読み込める.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.p = None
+        self.stream = None
+
+    def open(self, rate: int, block_size: int, callback) -> None:
+        import pyaudio
+
+        def counting_callback(in_data, frame_count, time_info, status):
+            self.frames_played += frame_count
+            return callback(in_data, frame_count, time_info, status)
+
+        self.p = pyaudio.PyAudio()
+        self.stream = self.p.open(
+            format=pyaudio.paFloat32,
+            channels=1,
+            rate=rate,
+            output=True,
+            frames_per_buffer=block_size,
+            stream_callback=counting_callback,
+        )
+
+    def close(self) -> None:
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.p:
+            self.p.terminate()
+            self.p = None
+
+    def output_latency(self) -> float:
+        return self.stream.get_output_latency() if self.stream else 0.0
+
+    def is_active(self) -> bool:
+        return bool(self.stream and self.stream.is_active())
+
+
+class NullSink(AudioSink):
+    """
+    音声デバイスの代わりに、実時間のペースでコールバックを呼び出して音を捨てる出力先
+
+    デバイスと同じく block_size サンプルごとに callback を呼ぶので、
+    音声デバイスのない環境で AudioEngine やプレイヤーを動かして検証できる.
+
+    Parameters
+    ----------
+    speed : float
+        実時間に対するコールバックのペースの倍率
+    """
+
+    zero_copy = True
+
+    def __init__(self, speed: float = 1.0) -> None:
+        super().__init__()
+        self.speed = speed
+        self.rate = 0
+        self.block_size = 0
+        self._active = False
+        self._thread = None
+
+    def open(self, rate: int, block_size: int, callback) -> None:
+        self.rate = rate
+        self.block_size = block_size
+        self._callback = callback
+        self._active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        period = self.block_size / self.rate / self.speed
+        next_time = time.perf_counter()
+        while self._active:
+            now = time.perf_counter()
+            time_info = {"output_buffer_dac_time": next_time + period, "current_time": now}
+            data, flag = self._callback(None, self.block_size, time_info, 0)
+            self.consume(data)
+            self.frames_played += memoryview(data).nbytes // 4
+            if flag != CONTINUE:
+                break
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self._active = False
+
+    def consume(self, data) -> None:
+        """コールバックが返した音声データを受け取る（捨てる）"""
+        pass
+
+    def close(self) -> None:
+        self._active = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def output_latency(self) -> float:
+        return self.block_size / self.rate if self.rate else 0.0
+
+    def is_active(self) -> bool:
+        return self._active
+
+
+class CaptureSink(NullSink):
+    """
+    NullSink と同じ実時間のペースで、出力した音声を記録する出力先
+
+    記録した音声は samples() で NumPy の配列として取り出せる.
+    path を指定すると、閉じたときに WAV ファイル（float32）か .npy ファイルに書き込む.
+
+    Parameters
+    ----------
+    path : str | None
+        閉じたときに書き込むファイルのパス（.wav または .npy）
+    speed : float
+        実時間に対するコールバックのペースの倍率
+    """
+
+    def __init__(self, path: str | None = None, speed: float = 1.0) -> None:
+        super().__init__(speed)
+        self.path = path
+        self._blocks = []
+
+    def consume(self, data) -> None:
+        self._blocks.append(np.frombuffer(data, dtype=np.float32).copy())
+
+    def samples(self) -> np.ndarray:
+        """これまでに出力した音声データ (float32)"""
+        if not self._blocks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(self._blocks)
+
+    def close(self) -> None:
+        super().close()
+        if self.path:
+            if self.path.endswith(".npy"):
+                np.save(self.path, self.samples())
+            else:
+                save_wav(self.path, self.samples(), self.rate)
+
+
+def save_wav(path: str, samples: np.ndarray, rate: int) -> None:
+    """
+    float32 のまま（IEEE float 形式の）モノラル WAV ファイルに書き込むメソッド
+
+    標準ライブラリの wave は整数 PCM しか書けないので、ヘッダを直接書く.
+    """
+    data = np.ascontiguousarray(samples, dtype="<f4")
+    with open(path, "wb") as f:
+        f.write(b"RIFF")
+        f.write(struct.pack("<I", 36 + data.nbytes))
+        f.write(b"WAVE")
+        # fmt: IEEE float (3), 1ch, rate, バイト/秒, ブロック境界, ビット数
+        f.write(b"fmt ")
+        f.write(struct.pack("<IHHIIHH", 16, 3, 1, rate, rate * 4, 4, 32))
+        f.write(b"data")
+        f.write(struct.pack("<I", data.nbytes))
+        f.write(memoryview(data).cast("B"))
+
+
+# 名前 -> 出力先のクラス
+SINKS = {
+    "pyaudio": PyAudioSink,
+    "null": NullSink,
+    "capture": CaptureSink,
+}
+
+
+def pyaudio_available() -> bool:
+    """pyaudio（PortAudio）を読み込めるか"""
+    try:
+        import pyaudio  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_sink(name: str = "auto", **kwargs) -> AudioSink:
+    """
+    名前から出力先を作る
+
+    "auto" は pyaudio を読み込めれば PyAudioSink、読み込めなければ NullSink.
+    """
+    if name == "auto":
+        if pyaudio_available():
+            return PyAudioSink()
+        print("pyaudio を読み込めないので、音声を出力せずに実行します")
+        return NullSink(**kwargs)
+    try:
+        sink_class = SINKS[name]
+    except KeyError:
+        raise ValueError(f"未知の出力先です: {name}") from None
+    return sink_class(**kwargs)
@@ -0,0 +1,210 @@
+# audioStats.py
+import math
+import threading
+import time
+
+import numpy as np
+
+
+class Histogram:
+    """
+    値の分布を対数の幅のビンで数えるヒストグラム
+
+    ビンの境界は lowest * 2 ** (i / bins_per_octave). 記録は整数の足し算だけなので
+    音声のスレッドから毎ブロック呼んでも軽い. 件数は確保済みの配列に数えるので、
+    記録のたびに Python の int が作られて残ることもない.
+
+    Parameters
+    ----------
+    lowest : float
+        最初のビンの上端. これ以下の値は最初のビンに入る
+    bins_per_octave : int
+        値が2倍になる間のビンの数
+    bins : int
+        ビンの数. 最後のビンにはそれ以上の値がすべて入る
+    """
+
+    def __init__(self, lowest: float = 1e-6, bins_per_octave: int = 4, bins: int = 96) -> None:
+        self.lowest = lowest
+        self.bins_per_octave = bins_per_octave
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        """値を1つ記録する"""
+        if value > self.lowest:
+            i = min(int(math.log2(value / self.lowest) * self.bins_per_octave) + 1, len(self.counts) - 1)
+        else:
+            i = 0
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def upper_edge(self, i: int) -> float:
+        """i 番目のビンの上端"""
+        return self.lowest * 2 ** (i / self.bins_per_octave)
+
+    def percentile(self, p: float) -> float:
+        """p (0~100) パーセンタイルの近似値（その値を含むビンの上端, 最大値を超えない）"""
+        if self.count == 0:
+            return 0.0
+        target = self.count * p / 100
+        cumulative = 0
+        for i, n in enumerate(self.counts.tolist()):
+            cumulative += n
+            if cumulative >= target and n:
+                return min(self.upper_edge(i), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict[str, float]:
+        """件数・平均・50/99 パーセンタイル・最大値"""
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class AudioStats:
+    """
+    AudioEngine の計測値を集めるクラス
+
+    描画スレッドは render / wait / queue の値を、コールバックは callback /
+    underruns / xruns の値をそれぞれ自分だけが書き込む. snapshot はどのスレッドからでも
+    呼べる（書き込み中の値が混ざることはあるが、ロックは取らない）.
+
+    Attributes
+    ----------
+    render_time : Histogram
+        1ブロックの生成にかかった時間（秒）
+    wait_time : Histogram
+        キューに空きがなく描画スレッドが待った時間（秒）. デバイスへの書き込みで
+        ブロックされていた時間に相当する
+    callback_time : Histogram
+        コールバック1回の処理時間（秒）
+    queue_depth : Histogram
+        ブロックを書き込む直前にキューに残っていたサンプル数
+    """
+
+    def __init__(self, rate: int) -> None:
+        self.rate = rate
+        self.render_time = Histogram()
+        self.wait_time = Histogram()
+        self.callback_time = Histogram()
+        self.queue_depth = Histogram(lowest=1.0, bins_per_octave=2, bins=40)
+        self.block_size = 0  # 現在のブロックサイズ（AudioEngine が書き込む）
+        self.reset()
+
+    def reset(self) -> None:
+        """すべての計測値を 0 に戻す"""
+        self.render_time.reset()
+        self.wait_time.reset()
+        self.callback_time.reset()
+        self.queue_depth.reset()
+        self.blocks = 0  # 生成したブロック数
+        self.frames_rendered = 0  # 生成したサンプル数
+        self.frames_played = 0  # コールバックに渡したサンプル数
+        self.underruns = 0  # キューが空でコールバックに無音を返した回数
+        self.xruns = 0  # PortAudio が報告したアンダーフローの回数
+        self.errors = 0  # 生成中に起きた例外の数
+        self.last_error = None
+        self.started = time.perf_counter()
+
+    def record_render(self, frames: int, seconds: float, queue_depth: int) -> None:
+        self.blocks += 1
+        self.frames_rendered += frames
+        self.render_time.record(seconds)
+        self.queue_depth.record(queue_depth)
+
+    def record_callback(self, frames: int, seconds: float) -> None:
+        self.frames_played += frames
+        self.callback_time.record(seconds)
+
+    def record_error(self, error: Exception) -> None:
+        self.errors += 1
+        self.last_error = repr(error)
+
+    def realtime_factor(self) -> float:
+        """生成した音の長さ / 生成にかかった時間（1 より大きければ実時間より速い）"""
+        audio = self.frames_rendered / self.rate
+        return audio / self.render_time.total if self.render_time.total else 0.0
+
+    def snapshot(self) -> dict:
+        """現在の計測値を辞書で返す"""
+        return {
+            "elapsed": time.perf_counter() - self.started,
+            "block_size": self.block_size,
+            "blocks": self.blocks,
+            "frames_rendered": self.frames_rendered,
+            "frames_played": self.frames_played,
+            "underruns": self.underruns,
+            "xruns": self.xruns,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "realtime_factor": self.realtime_factor(),
+            "render_time": self.render_time.summary(),
+            "wait_time": self.wait_time.summary(),
+            "callback_time": self.callback_time.summary(),
+            "queue_depth": self.queue_depth.summary(),
+        }
+
+    def format(self) -> str:
+        """snapshot を1行にまとめた文字列"""
+        s = self.snapshot()
+        render = s["render_time"]
+        callback = s["callback_time"]
+        depth = s["queue_depth"]
+        return (
+            f"block {s['block_size']} | render p50 {render['p50'] * 1e3:.2f}ms p99 {render['p99'] * 1e3:.2f}ms"
+            f" max {render['max'] * 1e3:.2f}ms"
+            f" | wait {s['wait_time']['mean'] * 1e3:.2f}ms/block"
+            f" | callback p99 {callback['p99'] * 1e3:.3f}ms"
+            f" | queue mean {depth['mean']:.0f} p1 {self.queue_depth.percentile(1):.0f}"
+            f" | underruns {s['underruns']} xruns {s['xruns']} errors {s['errors']}"
+            f" | x{s['realtime_factor']:.1f} realtime"
+        )
+
+
+class StatsReporter:
+    """
+    AudioStats を interval 秒ごとに出力するスレッド
+
+    Parameters
+    ----------
+    stats : AudioStats
+        出力する計測値
+    interval : float
+        出力の間隔（秒）
+    output : callable
+        1行の文字列を受け取る関数（既定は print）
+    """
+
+    def __init__(self, stats: AudioStats, interval: float, output=print) -> None:
+        self.stats = stats
+        self.interval = interval
+        self.output = output
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.output(f"[audio] {self.stats.format()}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
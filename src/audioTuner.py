@@ -0,0 +1,165 @@
+# audioTuner.py
+import sys
+import time
+
+import numpy as np
+
+from audioStats import Histogram
+
+# 選べるブロックサイズ（小さいほど遅延が小さい）
+BLOCK_SIZES = (64, 128, 256, 512, 1024)
+
+
+class BlockTuner:
+    """
+    AudioEngine のブロックサイズを、途切れない範囲で最も小さい値に調整するクラス
+
+    描画スレッドが毎ブロックの生成時間を update に渡すと、window 秒ごとに次のように決める.
+        - その間にアンダーランか出力先のアンダーフロー (xrun) があったか、負荷（生成時間 / ブロックの長さ）の 99 パーセンタイルが
+          high を超えたら、すぐ1段大きくする
+        - 負荷の 99 パーセンタイルが low 未満の窓が down_windows 回続き、最後に大きくしてから
+          hold 秒経っていたら1段小さくする
+    大きくするのは速く、小さくするのは遅くして（ヒステリシス）、境目で行き来しないようにする.
+    PlayScene が描画を始めるなどして GIL の取り合いが増えると生成時間が延びるので、
+    そのたびに調整し直す.
+
+    Parameters
+    ----------
+    rate : int
+        サンプリングレート
+    block_size : int
+        最初のブロックサイズ
+    sizes : tuple[int, ...]
+        選べるブロックサイズ
+    window : float
+        判定の間隔（秒, 音の長さ）
+    low, high : float
+        負荷の下限と上限
+    down_windows : int
+        小さくするまでに負荷の低い窓が続く回数
+    hold : float
+        大きくした後に小さくしない時間（秒）
+    headroom : float
+        calibrate で選ぶサイズの長さの下限を、GIL の切り替え間隔 (sys.getswitchinterval) の
+        何倍にするか. 起動時の計測には描画ループの GIL の取り合いが入らないので、
+        コールバックが GIL を待つ時間の分だけ余裕を持たせる. 既定の切り替え間隔 (5 ms) のままだと
+        512 サンプル未満を選べないので、main.py と同じく Config.AUDIO_SWITCH_INTERVAL (1 ms) に
+        下げてから使う（44.1 kHz で 128 サンプル以上）
+    """
+
+    def __init__(
+        self,
+        rate: int,
+        block_size: int = 256,
+        sizes: tuple[int, ...] = BLOCK_SIZES,
+        window: float = 1.0,
+        low: float = 0.2,
+        high: float = 0.6,
+        down_windows: int = 3,
+        hold: float = 10.0,
+        headroom: float = 2.0,
+    ) -> None:
+        self.rate = rate
+        self.sizes = tuple(sorted(sizes))
+        self.block_size = min(self.sizes, key=lambda size: abs(size - block_size))
+        self.window = window
+        self.low = low
+        self.high = high
+        self.down_windows = down_windows
+        self.hold = hold
+        self.headroom = headroom
+        self.load = Histogram(lowest=1e-3, bins_per_octave=4, bins=48)
+        self.changes = []  # (時刻, 前のサイズ, 次のサイズ, 理由)
+        self._frames = 0
+        self._underruns = 0
+        self._xruns = 0
+        self._calm = 0
+        self._raised = -hold
+
+    def calibrate(self, render, blocks: int = 20) -> int:
+        """
+        起動時に render（代表的な生成の処理）を各ブロックサイズで blocks 回ずつ呼び、
+        負荷の最大値が low 未満になる最小のサイズを選ぶ
+
+        ブロックの長さが GIL の切り替え間隔の headroom 倍より短いサイズは、
+        描画ループが動き始めるとコールバックが間に合わなくなるので選ばない.
+
+        Parameters
+        ----------
+        render : callable
+            float32 の配列を受け取り、その長さの音声データを書き込む関数
+        blocks : int
+            サイズごとに呼ぶ回数
+
+        Returns
+        -------
+        int
+            選んだブロックサイズ
+        """
+        block = np.zeros(self.sizes[-1], dtype=np.float32)
+        shortest = self.headroom * sys.getswitchinterval()
+        for size in self.sizes:
+            if size / self.rate < shortest and size != self.sizes[-1]:
+                continue
+            out = block[:size]
+            for _ in range(3):
+                render(out)  # 作業用の配列の確保を計測から除く
+            worst = 0.0
+            for _ in range(blocks):
+                start = time.perf_counter()
+                render(out)
+                worst = max(worst, time.perf_counter() - start)
+            if worst / (size / self.rate) < self.low:
+                self._change(size, "calibrate")
+                return size
+        self._change(self.sizes[-1], "calibrate")
+        return self.sizes[-1]
+
+    def update(self, frames: int, seconds: float, underruns: int, xruns: int = 0) -> int:
+        """
+        1ブロックの生成時間を記録し、次に使うブロックサイズを返す
+
+        Parameters
+        ----------
+        frames : int
+            生成したサンプル数
+        seconds : float
+            生成にかかった時間（秒）
+        underruns : int
+            これまでのアンダーランの回数（AudioStats.underruns）
+        xruns : int
+            これまでに出力先が報告したアンダーフローの回数（AudioStats.xruns）
+        """
+        self.load.record(seconds * self.rate / frames)
+        self._frames += frames
+        if self._frames < self.window * self.rate:
+            return self.block_size
+
+        now = time.perf_counter()
+        load = self.load.percentile(99)
+        underran = underruns != self._underruns
+        xran = xruns != self._xruns
+        self._underruns = underruns
+        self._xruns = xruns
+        self._frames = 0
+        self.load.reset()
+        index = self.sizes.index(self.block_size)
+        if underran or xran or load > self.high:
+            self._calm = 0
+            self._raised = now
+            if index + 1 < len(self.sizes):
+                reason = "underrun" if underran else "xrun" if xran else f"load {load:.2f}"
+                self._change(self.sizes[index + 1], reason)
+        elif load < self.low:
+            self._calm += 1
+            if self._calm >= self.down_windows and now - self._raised >= self.hold and index > 0:
+                self._calm = 0
+                self._change(self.sizes[index - 1], f"load {load:.2f}")
+        else:
+            self._calm = 0
+        return self.block_size
+
+    def _change(self, size: int, reason: str) -> None:
+        if size != self.block_size:
+            self.changes.append((time.perf_counter(), self.block_size, size, reason))
+        self.block_size = size
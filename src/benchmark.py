@@ -0,0 +1,600 @@
+# benchmark.py
+"""
+デバイスなしで実行できるマイクロベンチマーク
+
+    python src/benchmark.py leap-callback
+    python src/benchmark.py filter-trace SESSION
+    python src/benchmark.py synth
+    python src/benchmark.py alloc
+    python src/benchmark.py engine
+    python src/benchmark.py capture
+    python src/benchmark.py process
+    python src/benchmark.py tune
+    python src/benchmark.py tones
+    python src/benchmark.py gradient
+"""
+import argparse
+import gc
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+import pygame
+import leap
+from inputFilter import OneEuroFilter, ParamFilter
+from leapInput import LeapInput
+from audioEngine import AudioEngine, close_shared_engine, shared_engine
+from audioSink import CaptureSink, NullSink
+from config import Config
+from leapSession import LeapSession
+from radialGradient import RadialGradient
+from SoundGenerator import (
+    ContinuousSoundPlayer,
+    ProcessSoundPlayer,
+    PulseGen,
+    SineGen,
+    calibration_probe,
+)
+from synthProcess import close_shared_synth
+from toneCache import ToneCache
+
+# leap の TrackingEvent / Hand と同じ属性を持つ合成データ
+_Vector = namedtuple("_Vector", ["x", "y", "z"])
+_Bone = namedtuple("_Bone", ["prev_joint", "next_joint"])
+_Digit = namedtuple("_Digit", ["bones"])
+_Palm = namedtuple("_Palm", ["position", "normal"])
+_Hand = namedtuple("_Hand", ["type", "palm", "digits", "grab_strength", "pinch_strength"])
+_Event = namedtuple("_Event", ["hands", "timestamp"])
+
+
+def _random_vector(scale):
+    return _Vector(*(random.uniform(-scale, scale) for _ in range(3)))
+
+
+def synthetic_events(count, seed=0):
+    """ランダムな手を含むトラッキングイベントを count 個生成する"""
+    random.seed(seed)
+    events = []
+    for i in range(count):
+        digits = [
+            _Digit([_Bone(_random_vector(100), _random_vector(100)) for _ in range(4)])
+            for _ in range(5)
+        ]
+        hand = _Hand(
+            random.choice([leap.HandType.Left, leap.HandType.Right]),
+            _Palm(_random_vector(200), _random_vector(1)),
+            digits,
+            random.random(),
+            random.random(),
+        )
+        events.append(_Event([hand], 1_000_000 + i * 8333))
+    return events
+
+
+class _OfflineLeapInput(LeapInput):
+    # デバイスに接続せず、コールバックの処理だけを計測する
+    def _start_listener(self):
+        pass
+
+
+def bench_leap_callback(args):
+    """特徴量の設定ごとに on_tracking_event 1回あたりの処理時間を計測する"""
+    events = synthetic_events(args.frames)
+    modes = {
+        "all": None,
+        "finger": {"finger"},
+        "palm": {"palm"},
+        "grab": {"grab"},
+        "skeleton": {"skeleton"},
+    }
+    print(f"{'mode':>10} {'us/callback':>12}")
+    for name, features in modes.items():
+        leap_input = _OfflineLeapInput(features=features)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for event in events:
+                leap_input._handle_tracking_event(event)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>10} {best / len(events) * 1e6:12.2f}")
+
+
+def bench_filter_trace(args):
+    """記録済みセッションにフィルタを掛け、加わる遅延と震えの減り方を表示する"""
+    frames = LeapSession(args.session).frames()
+    raw = {
+        "finger": frames.finger_directions_to_parameter,
+        "palm": frames.palm_normal_to_parameter,
+        "grab": frames.grab_strength_to_parameter,
+    }[args.attr]()
+    timestamps = frames.timestamp / 1e6
+
+    def jitter(values):
+        # 2階差分の標準偏差（滑らかさの指標）
+        return float(np.std(np.diff(values, n=2))) if len(values) > 2 else 0.0
+
+    filters = {
+        "none": ParamFilter(),
+        "one-euro": OneEuroFilter(),
+        "one-euro+pred": OneEuroFilter(prediction=args.prediction),
+    }
+    print(f"{'filter':>14} {'jitter':>10} {'latency ms':>11} {'us/frame':>9}")
+    for name, param_filter in filters.items():
+        latencies = []
+        param_filter.reset()
+        start = time.perf_counter()
+        filtered = np.empty_like(raw)
+        for i, (value, timestamp) in enumerate(zip(raw.tolist(), timestamps.tolist())):
+            filtered[i] = param_filter.filter(value, timestamp)
+            latencies.append(param_filter.latency)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>14} {jitter(filtered):10.5f} {np.mean(latencies) * 1e3:11.2f}"
+            f" {elapsed / max(len(raw), 1) * 1e6:9.2f}"
+        )
+
+
+# 定常状態の1ブロックで一時的に使ってよいメモリ（バイト）. 小さな Python オブジェクトの分だけで、
+# 256 サンプル以上の float32 の配列を1つでも確保すれば超える
+ALLOC_PEAK_LIMIT = 1024
+# 統計の件数などの整数が小さい整数のキャッシュ (<= 256) を抜けるまで回してから計測する
+ALLOC_WARMUP = 300
+
+_SYNTH_CASES = [
+    ("SineGen", SineGen, {"frequency": 0.5, "FM": 0.0, "AM": 0.0}),
+    ("SineGen FM", SineGen, {"frequency": 0.5, "FM": 0.8, "AM": 0.0}),
+    ("SineGen FM+AM", SineGen, {"frequency": 0.5, "FM": 0.8, "AM": 0.5}),
+    ("PulseGen", PulseGen, {"frequency": 0.5, "dutycycle": 0.3, "AM": 0.0}),
+    ("PulseGen AM", PulseGen, {"frequency": 0.5, "dutycycle": 0.3, "AM": 0.5}),
+]
+
+
+def _moving_params(params, i):
+    # 毎ブロック少しずつパラメータを動かす（ブロック内の補間も通る）
+    params["frequency"] = (i % 100) / 100
+    for key in ("FM", "dutycycle", "AM"):
+        if params.get(key):
+            params[key] = 0.2 + (i % 7) / 10
+    return params
+
+
+def bench_synth(args):
+    """SineGen / PulseGen の render の生成速度（サンプル/秒）を計測する"""
+    print(f"{'generator':>14} {'block':>6} {'Msamples/s':>11} {'x realtime':>11}")
+    for name, gen_class, params in _SYNTH_CASES:
+        sound_gen = gen_class()
+        sound_gen.reset_phase(params)
+        out = np.empty(args.block, dtype=np.float32)
+        blocks = max(1, args.samples // args.block)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for i in range(blocks):
+                sound_gen.render(out, _moving_params(params, i))
+            best = min(best, time.perf_counter() - start)
+        rate = blocks * args.block / best
+        print(f"{name:>14} {args.block:6d} {rate / 1e6:11.2f} {rate / sound_gen.rate:11.1f}")
+
+
+def _peak_allocation(step, blocks):
+    # 定常状態で step を blocks 回呼んだ間に増えたメモリの最大値（バイト）.
+    # 以前のケースのごみの回収が混ざらないよう、計測中は GC を止める
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        step(0)
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for i in range(blocks):
+            step(i)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    return peak - baseline, current - baseline
+
+
+def check_alloc(args):
+    """
+    定常状態の1ブロックの生成で配列を確保していないことを tracemalloc で確かめる
+
+    パラメータの辞書などの小さな Python オブジェクトは作られるので、ブロックサイズによらない
+    一定の量 (ALLOC_PEAK_LIMIT) までの一時的なメモリは許容し、残るメモリは許容しない.
+    同じ判定は tests/test_alloc.py でも行う（Leap の SDK がなくても実行できる）.
+    """
+    # 何もしない場合の値（tracemalloc 自身の分）を差し引く
+    noise_peak, noise_retained = _peak_allocation(lambda i: None, args.blocks)
+    failed = False
+    print(f"{'case':>16} {'peak B':>8} {'retained B':>11}")
+
+    def report(name, peak, retained):
+        nonlocal failed
+        peak -= noise_peak
+        retained -= noise_retained
+        ok = peak < ALLOC_PEAK_LIMIT and retained <= 0
+        failed |= not ok
+        print(f"{name:>16} {peak:8d} {retained:11d} {'ok' if ok else 'ALLOCATES'}")
+
+    for name, gen_class, params in _SYNTH_CASES:
+        sound_gen = gen_class()
+        sound_gen.reset_phase(params)
+        out = np.empty(args.block, dtype=np.float32)
+        # 作業用の配列はここで確保される
+        for i in range(ALLOC_WARMUP):
+            sound_gen.render(out, _moving_params(params, i))
+        report(name, *_peak_allocation(
+            lambda i: sound_gen.render(out, _moving_params(params, i)), args.blocks
+        ))
+
+    # エンジンのブロック生成とコールバック（NullSink と同じ出力）
+    sound_gen = SineGen()
+    params = {"frequency": 0.5, "FM": 0.8, "AM": 0.5}
+    engine = AudioEngine(
+        lambda block: sound_gen.render(block, params), block_size=args.block, sink=NullSink()
+    )
+    engine.running = True
+
+    def engine_step(i):
+        engine._render_block()
+        engine._callback(None, args.block, {}, 0)
+
+    for i in range(ALLOC_WARMUP):
+        engine_step(i)
+    report("AudioEngine", *_peak_allocation(engine_step, args.blocks))
+
+    if failed:
+        sys.exit(1)
+
+
+def _busy_loop(stop, seconds):
+    # pygame の描画ループの代わりに GIL を握って CPU を使い続ける
+    while not stop.is_set():
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+        time.sleep(0)
+
+
+def _gil_count(seconds: float) -> int:
+    # sum(range(n)) が seconds 秒かかる n を測る
+    n = 100_000
+    while True:
+        start = time.perf_counter()
+        sum(range(n))
+        elapsed = time.perf_counter() - start
+        if elapsed > 0.01:
+            return max(1, int(n * seconds / elapsed))
+        n *= 4
+
+
+def _hold_gil_loop(stop, count, gap=0.0):
+    # sum(range(count)) は1回の C の呼び出しの中で GIL を離さないので、
+    # 切り替え間隔 (sys.setswitchinterval) に関係なく他のスレッドを止める.
+    # 重い描画のフレーム（pygame.draw で円を何十枚も描くなど）の代わり
+    while not stop.is_set():
+        sum(range(count))
+        time.sleep(gap)
+
+
+def bench_engine(args):
+    """音声デバイスなしで共有のエンジンを動かし、計測値 (AudioStats) を表示する"""
+    engine = shared_engine(block_size=args.block, stats_interval=args.interval, sink=NullSink())
+    player = ContinuousSoundPlayer(SineGen())
+    player.start({"frequency": 0.5, "FM": 0.8, "AM": 0.5})
+    stop = threading.Event()
+    loads = [
+        threading.Thread(target=_busy_loop, args=(stop, 0.005), daemon=True) for _ in range(args.load)
+    ]
+    for thread in loads:
+        thread.start()
+    try:
+        end = time.perf_counter() + args.seconds
+        i = 0
+        while time.perf_counter() < end:
+            player.update_params({"frequency": (i % 100) / 100})
+            i += 1
+            time.sleep(1 / 60)
+    finally:
+        stop.set()
+        player.stop()
+        print(engine.stats.format())
+        close_shared_engine()
+
+
+def check_capture(args):
+    """
+    CaptureSink に出力して、シーンと同じ ContinuousSoundPlayer の再生を音声デバイスなしで確かめる
+
+    出力先が実時間のペースで受け取ったサンプル数と経過時間、アンダーラン、
+    パラメータを変えてから出力に現れるまでの遅延の見積もりを表示する.
+    """
+    sink = CaptureSink(args.output)
+    engine = shared_engine(block_size=args.block, sink=sink)
+    player = ContinuousSoundPlayer(SineGen())
+    start = time.perf_counter()
+    player.start({"frequency": 0.5, "AM": 0.0})
+    try:
+        latencies = []
+        end = start + args.seconds
+        i = 0
+        while time.perf_counter() < end:
+            player.update_params({"frequency": (i % 100) / 100})
+            latencies.append(engine.output_latency())
+            i += 1
+            time.sleep(1 / 60)
+    finally:
+        player.stop()
+        elapsed = time.perf_counter() - start
+        close_shared_engine()
+    samples = sink.samples()
+    played = len(samples) / engine.rate
+    print(f"captured {len(samples)} samples = {played:.3f} s in {elapsed:.3f} s wall clock")
+    print(f"peak {np.max(np.abs(samples)) if len(samples) else 0.0:.3f}")
+    print(f"output latency mean {np.mean(latencies) * 1e3:.2f} ms max {np.max(latencies) * 1e3:.2f} ms")
+    print(engine.stats.format())
+    if args.output:
+        print(f"{args.output} に保存しました")
+    # 実時間のペースで出力していれば、受け取った長さは経過時間とほぼ一致する
+    if abs(played - elapsed) > 0.1 + 2 * args.block / engine.rate or engine.underruns:
+        sys.exit(1)
+
+
+def stress_process(args):
+    """
+    重い描画のフレームの代わりに C の呼び出しの中で GIL を握り続けるスレッドを動かしながら、
+    同じスレッドで生成する場合と別のプロセスで生成・出力する場合のアンダーランを比べる
+
+    負荷は hold 秒 GIL を離さない呼び出しと gap 秒の休みを繰り返す. 同じスレッドで生成する場合に
+    アンダーランが起きなければ、負荷が GIL を握れていないので失敗とする.
+    別のプロセスの場合は出力先（NullSink）もワーカーが開くので、ゲームのプロセスの GIL は
+    音声の経路に入らない. 負荷を掛けている間に1回でもアンダーランすれば失敗とする.
+    同じスレッドの場合は main.py のブロックサイズの調整と同じく、GIL の切り替え間隔を
+    Config.AUDIO_SWITCH_INTERVAL にしてから計測する（ワーカーは自分で同じ間隔にする）.
+    """
+    sys.setswitchinterval(args.switch_interval)
+    count = _gil_count(args.hold)
+    params = {"frequency": 0.5, "FM": 0.8, "AM": 0.5}
+    results = {}
+    for name in ("thread", "process"):
+        if name == "thread":
+            engine = shared_engine(block_size=args.block, queue_blocks=args.queue, sink=NullSink())
+            player = ContinuousSoundPlayer(SineGen())
+        else:
+            engine = None
+            player = ProcessSoundPlayer(SineGen(), block_size=args.block, sink="null", queue_blocks=args.queue)
+        player.start(params)
+        # ワーカーの起動（spawn）を待ってから負荷を掛ける
+        time.sleep(args.warmup)
+        if engine:
+            engine.stats.reset()
+        base = player.underruns if name == "process" else 0
+        stop = threading.Event()
+        loads = [
+            threading.Thread(target=_hold_gil_loop, args=(stop, count, args.gap), daemon=True)
+            for _ in range(args.load)
+        ]
+        for thread in loads:
+            thread.start()
+        try:
+            end = time.perf_counter() + args.seconds
+            i = 0
+            while time.perf_counter() < end:
+                player.update_params({"frequency": (i % 100) / 100})
+                i += 1
+                time.sleep(1 / 60)
+        finally:
+            stop.set()
+            for thread in loads:
+                thread.join()
+            if engine:
+                results[name] = engine.stats.underruns
+                detail = engine.stats.format()
+            else:
+                results[name] = player.underruns - base
+                detail = f"output latency {player.output_latency() * 1e3:.2f} ms"
+            player.stop()
+            print(f"{name:>8}: underruns {results[name]:4d} | {detail}")
+            close_shared_engine()
+    close_shared_synth()
+    if not results["thread"]:
+        print("同じスレッドで生成してもアンダーランしませんでした（負荷が足りません）")
+        sys.exit(1)
+    if results["process"]:
+        sys.exit(1)
+
+
+def trace_tuning(args):
+    """
+    負荷のない区間・負荷のある区間・負荷のない区間の順にエンジンを動かし、
+    BlockTuner がブロックサイズを変えた時刻と理由を表示する
+
+    負荷のある区間ではサイズが大きくなり、負荷がなくなると hold 秒後から1段ずつ小さく戻る.
+    main.py と同じく GIL の切り替え間隔を Config.AUDIO_SWITCH_INTERVAL にしてから計測する.
+    """
+    sys.setswitchinterval(args.switch_interval)
+    engine = shared_engine(
+        block_size=args.block,
+        sink=NullSink(),
+        adaptive=True,
+        probe=calibration_probe(),
+    )
+    engine.tuner.hold = args.hold
+    player = ContinuousSoundPlayer(SineGen())
+    player.start({"frequency": 0.5, "FM": 0.8, "AM": 0.5})
+    start = time.perf_counter()
+    try:
+        for name, load in (("idle", 0), ("load", args.load), ("idle", 0)):
+            print(f"{time.perf_counter() - start:7.2f}s {name}")
+            stop = threading.Event()
+            loads = [
+                threading.Thread(target=_busy_loop, args=(stop, args.busy), daemon=True)
+                for _ in range(load)
+            ]
+            for thread in loads:
+                thread.start()
+            end = time.perf_counter() + args.phase
+            i = 0
+            while time.perf_counter() < end:
+                player.update_params({"frequency": (i % 100) / 100})
+                i += 1
+                time.sleep(1 / 60)
+            stop.set()
+            for thread in loads:
+                thread.join()
+    finally:
+        player.stop()
+        close_shared_engine()
+    for when, old, new, reason in engine.tuner.changes:
+        print(f"{max(0.0, when - start):7.2f}s {old:5d} -> {new:5d} ({reason})")
+    print(engine.stats.format())
+
+
+def bench_tones(args):
+    """
+    ToneCache から正解音を引く時間を、生成する場合 (miss)・先読みしてある場合・
+    キャッシュにある場合 (hit) で比べる
+    """
+    cache = ToneCache(budget=args.budget)
+    cases = [(gen, name) for gen in (SineGen, PulseGen) for name in gen().param_names]
+    print(f"{'case':>20} {'miss ms':>9} {'prefetch ms':>12} {'hit us':>8}")
+    for gen, name in cases:
+        start = time.perf_counter()
+        cache.get(gen, name, 0.25)
+        miss = time.perf_counter() - start
+        cache.prefetch(gen, name, 0.75)
+        time.sleep(args.wait)
+        start = time.perf_counter()
+        cache.get(gen, name, 0.75)
+        prefetched = time.perf_counter() - start
+        start = time.perf_counter()
+        cache.get(gen, name, 0.25)
+        hit = time.perf_counter() - start
+        print(f"{gen.__name__ + ' ' + name:>20} {miss * 1e3:9.2f} {prefetched * 1e3:12.3f} {hit * 1e6:8.1f}")
+    print(
+        f"tones {len(cache._tones)} | {cache.nbytes / 1e6:.1f} MB | "
+        f"hits {cache.hits} misses {cache.misses} evictions {cache.evictions}"
+    )
+
+
+def _blit_circles(screen, gradient, level):
+    # RadialGradient が置き換えた、白い円を steps 枚重ねる描き方
+    width, height = gradient.size
+    for i in range(gradient.steps):
+        t = i / gradient.steps
+        radius = int(gradient.min_radius + gradient.radius_range * (1 - level) + gradient.radius_t * (1 - t))
+        surf = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.circle(surf, (255, 255, 255, int(255 * t**2)), (width // 2, height // 2), radius)
+        screen.blit(surf, (0, 0))
+
+
+def bench_gradient(args):
+    """
+    背景の円のぼかしを、円を重ねて描く場合と RadialGradient で描く場合 (miss / hit) で比べ、
+    画素の値の差を表示する
+    """
+    gradient = RadialGradient()
+    print(f"{'level':>6} {'blits ms':>9} {'miss ms':>8} {'hit ms':>7} {'max diff':>9} {'mean diff':>10}")
+    for level in args.levels:
+        reference = pygame.Surface(gradient.size)
+        reference.fill((0, 0, 255))
+        start = time.perf_counter()
+        _blit_circles(reference, gradient, level)
+        blits = time.perf_counter() - start
+        cached = pygame.Surface(gradient.size)
+        cached.fill((0, 0, 255))
+        start = time.perf_counter()
+        gradient.draw(cached, level)
+        miss = time.perf_counter() - start
+        start = time.perf_counter()
+        gradient.draw(cached.copy(), level)
+        hit = time.perf_counter() - start
+        diff = np.abs(
+            pygame.surfarray.array3d(reference).astype(np.int16)
+            - pygame.surfarray.array3d(cached).astype(np.int16)
+        )
+        print(
+            f"{level:6.2f} {blits * 1e3:9.2f} {miss * 1e3:8.2f} {hit * 1e3:7.2f} "
+            f"{diff.max():9d} {diff.mean():10.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    leap_callback = subparsers.add_parser("leap-callback", help="トラッキングコールバックの処理時間")
+    leap_callback.add_argument("--frames", type=int, default=2000)
+    leap_callback.add_argument("--repeat", type=int, default=5)
+    leap_callback.set_defaults(func=bench_leap_callback)
+
+    filter_trace = subparsers.add_parser("filter-trace", help="記録済みセッションに対するフィルタの効果")
+    filter_trace.add_argument("session")
+    filter_trace.add_argument("--attr", choices=["finger", "palm", "grab"], default="palm")
+    filter_trace.add_argument("--prediction", type=float, default=0.02)
+    filter_trace.set_defaults(func=bench_filter_trace)
+
+    synth = subparsers.add_parser("synth", help="音の生成速度")
+    synth.add_argument("--block", type=int, default=256)
+    synth.add_argument("--samples", type=int, default=441000)
+    synth.add_argument("--repeat", type=int, default=3)
+    synth.set_defaults(func=bench_synth)
+
+    alloc = subparsers.add_parser("alloc", help="音の生成で配列を確保していないかの確認")
+    alloc.add_argument("--block", type=int, default=1024)
+    alloc.add_argument("--blocks", type=int, default=1000)
+    alloc.set_defaults(func=check_alloc)
+
+
+    engine = subparsers.add_parser("engine", help="デバイスなしで共有のエンジンを動かして計測値を表示")
+    engine.add_argument("--seconds", type=float, default=3.0)
+    engine.add_argument("--block", type=int, default=256)
+    engine.add_argument("--interval", type=float, default=1.0, help="計測値を出力する間隔（秒）")
+    engine.add_argument("--load", type=int, default=0, help="GIL を握って CPU を使うスレッドの数")
+    engine.set_defaults(func=bench_engine)
+
+    capture = subparsers.add_parser("capture", help="音声デバイスなしで ContinuousSoundPlayer の出力を記録する")
+    capture.add_argument("--seconds", type=float, default=2.0)
+    capture.add_argument("--block", type=int, default=Config.AUDIO_BLOCK_SIZE)
+    capture.add_argument("-o", "--output", help="記録した音声を保存するファイル（.wav / .npy）")
+    capture.set_defaults(func=check_capture)
+
+    process = subparsers.add_parser("process", help="描画ループの負荷の下で別のプロセスで生成した場合のアンダーラン")
+    process.add_argument("--seconds", type=float, default=5.0)
+    process.add_argument("--block", type=int, default=Config.AUDIO_BLOCK_SIZE)
+    process.add_argument("--queue", type=int, default=4, help="エンジンのキューのブロック数")
+    process.add_argument("--load", type=int, default=1, help="GIL を握り続けるスレッドの数")
+    process.add_argument("--hold", type=float, default=0.03, help="負荷のスレッドが1回に GIL を握る秒数")
+    process.add_argument("--gap", type=float, default=1 / 60, help="負荷のスレッドが GIL を離す秒数")
+    process.add_argument("--warmup", type=float, default=2.0)
+    process.add_argument("--switch-interval", type=float, default=Config.AUDIO_SWITCH_INTERVAL)
+    process.set_defaults(func=stress_process)
+
+    tune = subparsers.add_parser("tune", help="負荷の変化に合わせたブロックサイズの調整の経過")
+    tune.add_argument("--phase", type=float, default=15.0, help="各区間の秒数")
+    tune.add_argument("--block", type=int, default=Config.AUDIO_BLOCK_SIZE)
+    tune.add_argument("--load", type=int, default=2, help="負荷のある区間で GIL を握るスレッドの数")
+    tune.add_argument("--busy", type=float, default=0.02, help="負荷のスレッドが1回に GIL を握る秒数")
+    tune.add_argument("--hold", type=float, default=5.0, help="大きくした後に小さくしない秒数")
+    tune.add_argument("--switch-interval", type=float, default=Config.AUDIO_SWITCH_INTERVAL)
+    tune.set_defaults(func=trace_tuning)
+
+    tones = subparsers.add_parser("tones", help="正解音のキャッシュを引く時間")
+    tones.add_argument("--budget", type=int, default=Config.TONE_CACHE_BYTES, help="キャッシュの上限（バイト）")
+    tones.add_argument("--wait", type=float, default=0.5, help="先読みしてから引くまでの秒数")
+    tones.set_defaults(func=bench_tones)
+
+    gradient = subparsers.add_parser("gradient", help="背景の円のぼかしの描画時間")
+    gradient.add_argument("--levels", type=float, nargs="+", default=[0.0, 0.25, 0.5, 0.75, 1.0])
+    gradient.set_defaults(func=bench_gradient)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
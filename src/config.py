@@ -11,3 +11,29 @@ class Config:
     BAR_HEIGHT = 80
     MAIN_HEIGHT = 600
     HEIGHT = BAR_HEIGHT + MAIN_HEIGHT
+    DIRTY_RECTS = True        # True のときシーンが描き直した範囲だけを画面に送る
+    # 手のパラメータに掛ける 1€ フィルタの設定
+    FILTER_MIN_CUTOFF = 1.0   # 静止時のカットオフ周波数 (Hz)
+    FILTER_BETA = 5.0         # 速さに対するカットオフ周波数の増え方
+    FILTER_PREDICTION = 0.0   # 何秒先を予測するか（トラッキング遅延の補償）
+    # 音声出力
+    AUDIO_BLOCK_SIZE = 256    # 1回に生成・出力するサンプル数（64~256）
+    AUDIO_ADAPTIVE_BLOCK = True  # True のとき生成の負荷に合わせてブロックサイズを調整する
+    # 調整で選べるブロックサイズ. 出力先のブロックは GIL の切り替え間隔の2倍より長いものから選ぶので、
+    # AUDIO_SWITCH_INTERVAL = 1 ms では 128~1024（生成するブロックは 64~1024）
+    AUDIO_BLOCK_SIZES = (64, 128, 256, 512, 1024)
+    AUDIO_STATS_INTERVAL = 0.0  # 音声の計測値を出力する間隔（秒, 0 なら出力しない）
+    AUDIO_SINK = "auto"       # 出力先（auto / pyaudio / null / capture）
+    AUDIO_SYNTH_PROCESS = False  # True のとき音の生成と出力を別のプロセスで行う（ブロックサイズは固定）
+    AUDIO_PROCESS_BLOCKS = 4  # 別のプロセスで先行して生成しておくブロック数
+    AUDIO_SWITCH_INTERVAL = 0.001  # ブロックサイズを調整するときと、別のプロセスのワーカーの GIL の切り替え間隔（秒）
+    # 背景の円のぼかし
+    GRADIENT_LEVELS = 100     # 類似度（強さ）を丸める段階の数
+    GRADIENT_CACHE_SIZE = 16  # 保持するぼかしのサーフェスの数（1枚 約 1.9 MB）
+    # 文字列のキャッシュ
+    TEXT_CACHE_BYTES = 8 * 1024 * 1024  # 描画した文字列のサーフェスの合計の上限（バイト）
+    # 正解音のキャッシュ
+    TONE_CACHE_BYTES = 32 * 1024 * 1024  # 保持する音声データの合計の上限（バイト）
+    TONE_CACHE_STEPS = 200    # パラメータの値を丸める段階の数（正解の位置もこの刻みにする）
+    TONE_LOOP_SECONDS = 2.0   # 繰り返し再生する正解音の長さ（秒）
+    TONE_LOOP_CROSSFADE = 0.05  # 正解音の継ぎ目のクロスフェードの長さ（秒）
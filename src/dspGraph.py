@@ -0,0 +1,570 @@
+# dspGraph.py
+"""
+音を生成する処理を、発振器・変調器・エンベロープのノードをつないだ
+グラフで表し、ブロック単位の平らな評価計画 (Plan) にまとめて実行する
+
+    freq = Param("frequency", convert=lambda p: 220 * 4**p)
+    am = Param("AM", convert=lambda p: 10 * (2**p - 1))
+    lfo = Oscillator(oscillator.SINE, am, threshold=0.0)
+    wave = Envelope(Oscillator(oscillator.SINE, freq), Modulator(lfo, 0.3, offset=1.0))
+    plan = Plan(wave)
+    plan.render(out, {"frequency": (0.5, 0.6), "AM": (0.0, 0.0)}, rate=44100)
+
+Plan は次のことを一度だけ行う.
+    - ノードを実行順に並べ、各ノードの出力に使い回す配列を割り当てる
+      （使い終わった配列は後のノードが使い、in-place にできるノードは入力の配列に書く）
+    - 定数の深さの Modulator で整形するだけの発振器は、整形済みのテーブルを引く発振器にまとめる
+    - 発振器の位相に足す Modulator は、テーブルのサンプル単位で出力させる
+ブロックごとには、パラメータからどのノードを実行するかを決めて（FM や AM が
+掛かっていないときは変調器ごと飛ばす）、ノードを順に呼ぶだけになる.
+"""
+import copy
+
+import numpy as np
+
+import oscillator
+from oscillator import Scratch
+
+
+class Param:
+    """
+    ブロックごとに (先頭の値, 目標値) が変わるパラメータ
+
+    Parameters
+    ----------
+    name : str
+        Plan.render に渡すパラメータの名前
+    convert : callable | None
+        パラメータの値 (0~1) -> ノードが使う値（周波数など）
+    """
+
+    def __init__(self, name: str, convert=None) -> None:
+        self.name = name
+        self.convert = convert
+        self.start = 0.0
+        self.end = 0.0
+
+    def set(self, start: float, end: float) -> None:
+        if self.convert is not None:
+            start = self.convert(start)
+            end = self.convert(end)
+        self.start = start
+        self.end = end
+
+    def constant(self) -> bool:
+        return self.start == self.end
+
+
+class Const(Param):
+    """値の変わらないパラメータ"""
+
+    def __init__(self, value: float) -> None:
+        super().__init__(f"const {value}")
+        self.start = self.end = value
+
+    def set(self, start: float, end: float) -> None:
+        pass
+
+
+def _param(value) -> Param:
+    return value if isinstance(value, Param) else Const(float(value))
+
+
+def _above(param: Param, threshold: float | None) -> bool:
+    # ブロックの先頭か終わりで |値| が threshold を超えているか
+    return threshold is None or abs(param.start) > threshold or abs(param.end) > threshold
+
+
+class Node:
+    """
+    DSP グラフのノードの基底クラス
+
+    Attributes
+    ----------
+    inputs : tuple[Node | None, ...]
+        音声の入力
+    optional : tuple[bool, ...]
+        入力ごとに、その入力が実行されないブロックでもこのノードを実行するか
+    params : tuple[Param, ...]
+        ブロックごとに変わる入力
+    inplace : bool
+        最初の入力の配列に結果を書き込めるか
+    """
+
+    inplace = False
+
+    def __init__(self, inputs=(), optional=None, params=()) -> None:
+        self.inputs = tuple(inputs)
+        self.optional = tuple(optional) if optional is not None else (False,) * len(self.inputs)
+        self.params = tuple(params)
+
+    def enabled(self) -> bool:
+        """このブロックで実行するか（パラメータだけで決まる条件）"""
+        return True
+
+    def reset(self) -> None:
+        """位相などの状態を初期状態に戻す"""
+        pass
+
+    def process(self, step: "Step", frames: int, rate: int, scratch: Scratch) -> None:
+        """step.inputs の配列から step.out に1ブロック分の出力を書き込む"""
+        pass
+
+
+class Oscillator(Node):
+    """
+    ウェーブテーブルの発振器
+
+    Parameters
+    ----------
+    table : Wavetable
+        波形のテーブル
+    freq : Param | float
+        周波数 (Hz). ブロック内で直線的に変化させて位相を積分する
+    phase_mod : Node | None
+        位相に足す信号（周期単位, FM 用）. 実行されないブロックでは足さない
+    threshold : float | None
+        周波数の |値| がこれ以下のブロックでは実行しない（位相も進めない）
+    """
+
+    def __init__(self, table, freq, phase_mod: Node | None = None, threshold: float | None = None) -> None:
+        super().__init__((phase_mod,), (True,), (_param(freq),))
+        self.table = table
+        self.freq = self.params[0]
+        self.threshold = threshold
+        self.phase = 0.0  # 周期単位, 0~1
+
+    def enabled(self) -> bool:
+        return _above(self.freq, self.threshold)
+
+    def reset(self) -> None:
+        self.phase = 0.0
+
+    def positions(self, frames: int, rate: int, size: int, out: np.ndarray) -> np.ndarray:
+        """
+        位相を frames サンプル分進め、各サンプルのテーブル上の位置 (位相 * size) を out に書き込む
+
+        oscillator.advance_phase と同じ積分を、テーブルのサンプル単位で行う.
+        """
+        freq, end_freq = self.freq.start, self.freq.end
+        increment = freq / rate
+        if freq == end_freq:
+            np.multiply(oscillator._ramp(frames), increment * size, out=out)
+            out += self.phase * size
+            self.phase = (self.phase + increment * frames) % 1.0
+            return out
+        slope = (end_freq - freq) / rate / frames
+        np.multiply(oscillator._half_previous(frames), slope * size, out=out)
+        out += increment * size
+        out *= oscillator._ramp(frames)
+        out += self.phase * size
+        self.phase = (self.phase + increment * frames + slope * frames * (frames - 1) / 2) % 1.0
+        return out
+
+    def process(self, step, frames, rate, scratch):
+        table = step.table
+        position = self.positions(frames, rate, table.size, scratch.get("osc_position", frames))
+        self._modulate(step, position, scratch)
+        table.lookup_positions(position, out=step.out, scratch=scratch)
+
+    def _modulate(self, step, position, scratch) -> None:
+        phase_mod = step.inputs[0]
+        if phase_mod is None:
+            return
+        if step.mod_scale != 1.0:
+            # Modulator 以外の入力は周期単位なのでテーブルのサンプル単位に直す
+            scaled = scratch.get("osc_phase_mod", len(phase_mod))
+            np.multiply(phase_mod, step.mod_scale, out=scaled)
+            phase_mod = scaled
+        position += phase_mod
+
+
+class PulseOscillator(Oscillator):
+    """
+    帯域制限したパルス波の発振器（oscillator.lookup_pulse）
+
+    周波数から倍音がナイキスト周波数を超えない段階を選び、
+    位相をずらした2本のノコギリ波の差として引く. デューティ比は連続に変わる.
+
+    Parameters
+    ----------
+    freq : Param | float
+        周波数 (Hz)
+    duty : Param | float
+        デューティ比 (0.5~0.95)
+    phase_mod : Node | None
+        位相に足す信号（周期単位）
+    """
+
+    def __init__(self, freq, duty, phase_mod: Node | None = None) -> None:
+        super().__init__(oscillator.SAW, freq, phase_mod)
+        self.duty = _param(duty)
+        self.params = self.params + (self.duty,)
+
+    def process(self, step, frames, rate, scratch):
+        position = self.positions(frames, rate, step.table.size, scratch.get("osc_position", frames))
+        self._modulate(step, position, scratch)
+        level = oscillator.pulse_level(max(self.freq.start, self.freq.end), rate)
+        duty = self.duty
+        if duty.constant():
+            duties = duty.start
+        else:
+            duties = oscillator.linear_ramp(duty.start, duty.end, frames, out=scratch.get("osc_duty", frames))
+        oscillator.lookup_pulse(position, duties, level, out=step.out, scratch=scratch)
+
+
+class Modulator(Node):
+    """
+    変調信号を作るノード: offset + depth / unit * source
+
+    FM では発振器の phase_mod に、AM では Envelope の gain に渡す.
+
+    Parameters
+    ----------
+    source : Node
+        変調波
+    depth : Param | float
+        変調の深さ. ブロック内で直線的に変化させる
+    unit : float
+        depth をこの値で割る（FM の変調指数をラジアンから周期単位にするときは 2π）
+    offset : float
+        足す値（AM で 1 + 0.3 sin にするときは 1.0）
+    threshold : float | None
+        深さの |値| がこれ以下のブロックでは実行しない
+    """
+
+    inplace = True
+
+    def __init__(self, source: Node, depth, unit: float = 1.0, offset: float = 0.0,
+                 threshold: float | None = None) -> None:
+        super().__init__((source,), (False,), (_param(depth),))
+        self.depth = self.params[0]
+        self.unit = unit
+        self.offset = offset
+        self.threshold = threshold
+
+    def enabled(self) -> bool:
+        return _above(self.depth, self.threshold)
+
+    def process(self, step, frames, rate, scratch):
+        source = step.inputs[0]
+        out = step.out
+        depth = self.depth
+        scale = step.mod_scale / self.unit
+        if depth.constant():
+            np.multiply(source, depth.start * scale, out=out)
+        else:
+            ramp = oscillator.linear_ramp(depth.start, depth.end, frames, out=scratch.get("mod_ramp", frames))
+            ramp *= scale
+            np.multiply(source, ramp, out=out)
+        if self.offset != 0.0:
+            out += self.offset
+
+
+class Envelope(Node):
+    """
+    source に振幅のエンベロープを掛けるノード
+
+    gain がパラメータのときはブロック内の直線、ノードのときはサンプルごとの値を掛ける.
+    gain のノードが実行されないブロックでは source をそのまま出力する.
+
+    Parameters
+    ----------
+    source : Node
+        入力
+    gain : Param | float | Node
+        掛ける振幅
+    """
+
+    inplace = True
+
+    def __init__(self, source: Node, gain) -> None:
+        if isinstance(gain, Node):
+            super().__init__((source, gain), (False, True))
+            self.gain = None
+        else:
+            super().__init__((source,), (False,), (_param(gain),))
+            self.gain = self.params[0]
+
+    def process(self, step, frames, rate, scratch):
+        source = step.inputs[0]
+        out = step.out
+        if self.gain is None:
+            gain = step.inputs[1]
+            if gain is None:
+                if out is not source:
+                    np.copyto(out, source)
+                return
+            np.multiply(source, gain, out=out)
+        elif self.gain.constant():
+            np.multiply(source, self.gain.start, out=out)
+        else:
+            ramp = oscillator.linear_ramp(
+                self.gain.start, self.gain.end, frames, out=scratch.get("envelope_ramp", frames)
+            )
+            np.multiply(source, ramp, out=out)
+
+
+class Step:
+    """
+    評価計画の1手順: どのノードを、どの配列を入力・出力にして実行するか
+
+    Attributes
+    ----------
+    node : Node
+        実行するノード
+    sources : tuple[int, ...]
+        入力ごとの手順の番号（入力がなければ -1）
+    buffer : int
+        出力を書き込む配列の番号
+    table : Wavetable | None
+        発振器が引くテーブル（整形済みのテーブルにまとめた場合はそれ）
+    mod_scale : float
+        Modulator の出力に掛ける値 / 発振器が phase_mod に掛ける値
+    """
+
+    def __init__(self, node: Node) -> None:
+        self.node = node
+        self.sources = ()
+        self.required = ()  # 実行されないとこの手順も実行できない入力の手順の番号
+        self.gated = False  # パラメータで実行するかが変わるノードか
+        self.buffer = -1
+        self.table = getattr(node, "table", None)
+        self.mod_scale = 1.0
+        self.inputs = []  # 入力の配列（実行されない入力は None. Plan._schedule で割り当てる）
+        self.out = None  # 出力の配列
+
+
+class Plan:
+    """
+    DSP グラフを平らな手順の列にまとめた評価計画
+
+    Parameters
+    ----------
+    output : Node
+        出力のノード
+    scratch : Scratch | None
+        手順の出力と作業用の配列を確保する入れ物
+    """
+
+    def __init__(self, output: Node, scratch: Scratch | None = None) -> None:
+        self.scratch = Scratch() if scratch is None else scratch
+        nodes = _topological(output)
+        self.nodes = nodes
+        replaced, tables = _fuse_shaped_oscillators(nodes)
+        steps = {}
+        for node in nodes:
+            if node not in replaced:
+                steps[node] = Step(node)
+                if node in tables:
+                    steps[node].table = tables[node]
+        # 手順の番号と入力
+        order = list(steps.values())
+        index = {step.node: i for i, step in enumerate(order)}
+        for step in order:
+            step.sources = tuple(
+                -1 if source is None else index[replaced.get(source, source)]
+                for source in step.node.inputs
+            )
+            step.required = tuple(
+                source
+                for source, optional in zip(step.sources, step.node.optional)
+                if source >= 0 and not optional
+            )
+            step.gated = type(step.node).enabled is not Node.enabled
+        self.steps = order
+        self.output = index[replaced.get(output, output)]
+        _scale_phase_modulation(order)
+        self.buffers = _assign_buffers(order, self.output)
+        self.params = []
+        for node in nodes:
+            for param in node.params:
+                if param not in self.params and not isinstance(param, Const):
+                    self.params.append(param)
+        self._gated = [step.node for step in order if step.gated]
+        # (サンプル数, 条件付きのノードを実行するか) -> そのブロックで実行する手順の列
+        self._schedules = {}
+
+    def reset(self) -> None:
+        """すべてのノードの状態を初期状態に戻す"""
+        for node in self.nodes:
+            node.reset()
+
+    def render(self, out: np.ndarray, ramps: dict, rate: int, gain: float = 1.0) -> None:
+        """
+        1ブロック分を生成して float32 の配列 out に書き込む
+
+        Parameters
+        ----------
+        out : np.ndarray
+            音声データを書き込む float32 の配列
+        ramps : dict[str, tuple[float, float]]
+            パラメータの名前 -> (ブロックの先頭の値, 目標値)
+        rate : int
+            サンプリングレート
+        gain : float
+            出力に掛ける値
+        """
+        frames = len(out)
+        for param in self.params:
+            start, end = ramps[param.name]
+            param.set(start, end)
+
+        key = frames
+        for node in self._gated:
+            key = key * 2 + node.enabled()
+        schedule = self._schedules.get(key)
+        if schedule is None:
+            schedule = self._schedule(frames, [node.enabled() for node in self._gated])
+            self._schedules[key] = schedule
+        calls, result = schedule
+
+        scratch = self.scratch
+        for call in calls:
+            call.process(call, frames, rate, scratch)
+        if result is None:
+            out.fill(0.0)
+            return
+        if gain != 1.0:
+            result *= gain
+        # float64 -> float32 の変換は ufunc だと一時バッファを確保するので copyto で行う
+        np.copyto(out, result, casting="same_kind")
+
+    def _schedule(self, frames: int, enabled: list[bool]) -> tuple[tuple, np.ndarray | None]:
+        """
+        条件付きのノードの実行する / しないの組み合わせごとに、実行する手順の列を作る
+
+        各手順には入力と出力の配列を割り当て済みの Step の写しを使うので、
+        ブロックごとには手順を順に呼ぶだけになる.
+        """
+        steps = self.steps
+        gated = iter(enabled)
+        run = []
+        for step in steps:
+            ok = next(gated) if step.gated else True
+            run.append(ok and all(run[source] for source in step.required))
+        # 出力に使われる手順だけを実行する
+        needed = [False] * len(steps)
+        needed[self.output] = run[self.output]
+        for i in range(len(steps) - 1, -1, -1):
+            if needed[i]:
+                for source in steps[i].sources:
+                    if source >= 0 and run[source]:
+                        needed[source] = True
+
+        pool = [self.scratch.get(f"plan_buffer{b}", frames) for b in range(self.buffers)]
+        calls = []
+        for i, step in enumerate(steps):
+            if not needed[i]:
+                continue
+            call = copy.copy(step)
+            call.inputs = [
+                pool[steps[source].buffer] if source >= 0 and needed[source] else None
+                for source in step.sources
+            ]
+            call.out = pool[step.buffer]
+            call.process = step.node.process
+            calls.append(call)
+        result = pool[steps[self.output].buffer] if needed[self.output] else None
+        return tuple(calls), result
+
+
+def _topological(output: Node) -> list[Node]:
+    # 入力が先に来る順（深さ優先の帰りがけ順）
+    order = []
+    seen = set()
+
+    def visit(node):
+        if node is None or id(node) in seen:
+            return
+        seen.add(id(node))
+        for source in node.inputs:
+            visit(source)
+        order.append(node)
+
+    visit(output)
+    return order
+
+
+def _consumers(nodes: list[Node]) -> dict:
+    consumers = {node: [] for node in nodes}
+    for node in nodes:
+        for source in node.inputs:
+            if source is not None:
+                consumers[source].append(node)
+    return consumers
+
+
+def _fuse_shaped_oscillators(nodes: list[Node]) -> tuple[dict, dict]:
+    """
+    定数の深さの Modulator だけにつながる Oscillator を、整形済みのテーブルを引く
+    1つの手順にまとめる. (まとめた Modulator -> 代わりの Oscillator,
+    Oscillator -> 整形済みのテーブル) を返す
+
+    offset + depth * lookup(table) = lookup(offset + depth * table) なので、
+    ブロックごとの掛け算と足し算がなくなる.
+    """
+    consumers = _consumers(nodes)
+    replaced = {}
+    tables = {}
+    for node in nodes:
+        if not (isinstance(node, Modulator) and isinstance(node.depth, Const) and node.threshold is None):
+            continue
+        source = node.inputs[0]
+        if type(source) is not Oscillator or len(consumers[source]) != 1:
+            continue
+        scale = node.depth.start / node.unit
+        key = (id(source.table), scale, node.offset)
+        if key not in _shape_cache:
+            _shape_cache[key] = source.table.shaped(scale, node.offset)
+        tables[source] = _shape_cache[key]
+        replaced[node] = source
+    return replaced, tables
+
+
+# (テーブル, 倍率, オフセット) -> 整形済みのテーブル（生成器のインスタンスの間で共有する）
+_shape_cache = {}
+
+
+def _scale_phase_modulation(steps: list[Step]) -> None:
+    # 発振器の位相に足す Modulator はテーブルのサンプル単位で出力させる
+    for step in steps:
+        if not isinstance(step.node, Oscillator) or step.sources[0] < 0:
+            continue
+        size = step.table.size
+        source = steps[step.sources[0]]
+        if isinstance(source.node, Modulator) and source.node.offset == 0.0:
+            source.mod_scale = size
+        else:
+            step.mod_scale = size
+
+
+def _assign_buffers(steps: list[Step], output: int) -> int:
+    """
+    手順ごとの出力の配列を割り当て、使う配列の数を返す
+
+    最後に使われた後の配列は後の手順が使い回す. in-place にできる手順は、
+    最初の入力をほかに使う手順がなければその配列に書き込む.
+    """
+    last_use = [i for i in range(len(steps))]
+    for i, step in enumerate(steps):
+        for source in step.sources:
+            if source >= 0:
+                last_use[source] = max(last_use[source], i)
+    last_use[output] = len(steps)  # 出力は最後まで残す
+    free = []
+    count = 0
+    for i, step in enumerate(steps):
+        first = step.sources[0] if step.sources else -1
+        if step.node.inplace and first >= 0 and last_use[first] == i:
+            step.buffer = steps[first].buffer
+        else:
+            if free:
+                step.buffer = free.pop()
+            else:
+                step.buffer = count
+                count += 1
+        for source in set(step.sources):
+            if source >= 0 and last_use[source] == i and steps[source].buffer != step.buffer:
+                free.append(steps[source].buffer)
+    return count
@@ -0,0 +1,128 @@
+# featureMap.py
+import numpy as np
+from leapdata import FINGER_REFERENCE, PALM_REFERENCE, LeapData, finger_directions
+
+
+def _index_finger_direction(data):
+    # 人差し指 (1) の方向ベクトルだけを正規化する: (..., 3)
+    return finger_directions(data.joints[..., 1:2, :, :, :])[..., 0, :]
+
+
+def _palm_normal(data):
+    return data.palm_normal
+
+
+def _palm_position(data):
+    return data.palm_position
+
+
+def _grab_strength(data):
+    return np.asarray(data.grab_strength)[..., None]
+
+
+def _pinch_strength(data):
+    return np.asarray(data.pinch_strength)[..., None]
+
+
+class FeatureMapping:
+    """
+    手のデータを 0~1 のパラメータに変換する写像
+
+    parameter = clip((source · weights + offset) * scale, 0, 1)
+    （左手のときはさらに left_scale 倍する）の形で表し、
+    生成時に重みを float64 の配列にしてゼロの成分を取り除いておく.
+    LeapData（1フレーム）にも LeapFrames（N フレーム）にもそのまま適用できる.
+
+    Parameters
+    ----------
+    name : str
+        写像の名前
+    feature : str
+        LeapInput で読む必要のある特徴量（leapdata.FEATURES のいずれか）
+    source : callable
+        LeapData / LeapFrames から (..., K) の配列を取り出す関数
+    weights : tuple[float, ...]
+        source の各成分に掛ける重み (K,)
+    offset : float
+        内積に足す値
+    scale : float
+        offset を足した後に掛ける値
+    left_scale : float
+        左手のときに最後に掛ける値
+    """
+
+    def __init__(self, name, feature, source, weights, offset=0.0, scale=1.0, left_scale=1.0):
+        self.name = name
+        self.feature = feature
+        self.source = source
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.offset = offset
+        self.scale = scale
+        self.left_scale = left_scale
+        # 内積で実際に使う成分（ゼロの重みは足しても結果が変わらないので省く）
+        self._terms = [(i, float(w)) for i, w in enumerate(self.weights.tolist()) if w != 0]
+
+    def __call__(self, data):
+        """LeapData ならスカラー、LeapFrames なら (N,) の配列を返す"""
+        if isinstance(data, LeapData):
+            return self._map_frame(data)
+        return self._map_frames(data)
+
+    def _map_frame(self, data):
+        # 1フレームは配列演算のオーバーヘッドを避けて Python の float で計算する.
+        # 演算の順序はバッチ版と同じなので結果はビット単位で一致する
+        source = np.ravel(self.source(data)).tolist()
+        (i, w), *rest = self._terms
+        dot_product = source[i] * w
+        for i, w in rest:
+            dot_product = dot_product + source[i] * w
+
+        value = max(0.0, min(1.0, (dot_product + self.offset) * self.scale))
+        if data.is_left:
+            value = value * self.left_scale
+        return value
+
+    def _map_frames(self, frames):
+        # 成分ごとに順に足す（行列積は使わない）
+        source = np.asarray(self.source(frames), dtype=np.float64)
+        (i, w), *rest = self._terms
+        dot_product = source[..., i] * w
+        for i, w in rest:
+            dot_product = dot_product + source[..., i] * w
+
+        value = np.clip((dot_product + self.offset) * self.scale, 0, 1)
+        if self.left_scale != 1.0:
+            value = np.where(frames.is_left != 0, value * self.left_scale, value)
+        return value
+
+
+# 名前 -> FeatureMapping
+MAPPINGS = {}
+
+
+def register(mapping: FeatureMapping) -> FeatureMapping:
+    """写像を登録する"""
+    MAPPINGS[mapping.name] = mapping
+    return mapping
+
+
+def get_mapping(name: str) -> FeatureMapping:
+    """名前から写像を取得する"""
+    try:
+        return MAPPINGS[name]
+    except KeyError:
+        raise ValueError(f"未知の写像です: {name}") from None
+
+
+# 人差し指の方向と 1/sqrt(3) * [1, 1, -1] の内積を 0~1 に
+register(FeatureMapping("finger", "finger", _index_finger_direction, FINGER_REFERENCE, 1.0, 0.5))
+# 手のひらの法線と 1/3 * [2, 2, 1] の内積を 0~1 に
+register(FeatureMapping("palm", "palm", _palm_normal, PALM_REFERENCE, 1.0, 0.5))
+# grab_strength（左手は半分）
+register(FeatureMapping("grab", "grab", _grab_strength, (1.0,), left_scale=0.5))
+# pinch_strength
+register(FeatureMapping("pinch", "pinch", _pinch_strength, (1.0,)))
+# 手のひらの高さ 0~500 mm を 0~1 に
+register(FeatureMapping("palm_height", "position", _palm_position, (0.0, 1.0, 0.0), 0.0, 1 / 500))
+# 手首のひねり: 手のひらの法線の x 成分 -1~1 を 1~0 に
+register(FeatureMapping("wrist_roll", "palm", _palm_normal, (-1.0, 0.0, 0.0), 1.0, 0.5))
@@ -0,0 +1,94 @@
+# frameRing.py
+import numpy as np
+from leapdata import FRAME_COLUMNS, LeapData, LeapFrames
+
+
+class FrameRing:
+    """
+    タイムスタンプとシーケンス番号付きのフレームを保持する固定長のリングバッファ
+
+    各列は 2 * capacity 行の配列として最初に確保し、同じフレームを
+    i 行目と i + capacity 行目の両方に書き込む. こうすると直近 capacity
+    フレームのどの範囲も連続したスライスになり、コピーせずにビューで返せる.
+
+    書き込みはリスナースレッド1つだけから行う前提. 返したビューは
+    capacity フレーム分の書き込みが進むと上書きされるので、
+    長く保持する場合は呼び出し側でコピーすること.
+
+    Parameters
+    ----------
+    capacity : int
+        保持するフレーム数
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self._columns = {
+            name: np.zeros((2 * capacity, *shape), dtype=dtype)
+            for name, (dtype, shape) in FRAME_COLUMNS.items()
+        }
+        self._seqs = np.zeros(2 * capacity, dtype=np.int64)
+        self._seq = 0  # 最後に書き込んだフレームのシーケンス番号（最初のフレームが1）
+
+    @property
+    def seq(self) -> int:
+        """最新フレームのシーケンス番号（まだ1つもなければ0）"""
+        return self._seq
+
+    def push(self, data: LeapData) -> int:
+        """フレームを1つ追加し、そのシーケンス番号を返す"""
+        seq = self._seq + 1
+        # rows は i 行目と i + capacity 行目を指す長さ2のスライス
+        rows = slice((seq - 1) % self.capacity, None, self.capacity)
+        columns = self._columns
+        columns["timestamp"][rows] = data.timestamp or 0
+        columns["is_left"][rows] = data.is_left
+        columns["palm_position"][rows] = data.palm_position
+        columns["palm_normal"][rows] = data.palm_normal
+        columns["grab_strength"][rows] = data.grab_strength
+        columns["pinch_strength"][rows] = data.pinch_strength
+        columns["joints"][rows] = data.joints
+        self._seqs[rows] = seq
+        # 全列を書き終えてからシーケンス番号を公開する
+        self._seq = seq
+        return seq
+
+    def _slice(self, count: int, seq: int) -> LeapFrames:
+        # seq までの直近 count フレームを連続したビューとして返す
+        start = (seq - count) % self.capacity
+        stop = start + count
+        return LeapFrames(
+            {name: column[start:stop] for name, column in self._columns.items()},
+            seq=self._seqs[start:stop],
+        )
+
+    def latest(self) -> LeapData | None:
+        """最新のフレームを（コピーせずに）返す. まだなければ None"""
+        seq = self._seq
+        if seq == 0:
+            return None
+        return self._slice(1, seq)[0]
+
+    def since(self, seq: int) -> LeapFrames:
+        """
+        シーケンス番号が seq より大きいフレームを古い順に返す
+
+        取りこぼしが capacity を超えた場合は直近 capacity フレームだけを返すので、
+        frames.seq[0] != seq + 1 で欠落を判定できる.
+        """
+        latest = self._seq
+        count = min(max(latest - seq, 0), self.capacity)
+        return self._slice(count, latest)
+
+    def window(self, seconds: float) -> LeapFrames:
+        """最新フレームのタイムスタンプから seconds 秒以内のフレームを古い順に返す"""
+        latest = self._seq
+        frames = self._slice(min(latest, self.capacity), latest)
+        if len(frames) == 0:
+            return frames
+        threshold = frames.timestamp[-1] - int(seconds * 1e6)
+        start = int(np.searchsorted(frames.timestamp, threshold, side="left"))
+        return LeapFrames(
+            {name: getattr(frames, name)[start:] for name in FRAME_COLUMNS},
+            seq=frames.seq[start:],
+        )
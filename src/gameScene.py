@@ -4,30 +4,50 @@ import random
 import pygame
 
 from config import Config
+from inputFilter import OneEuroFilter
+from featureMap import get_mapping
 from scenes.playScene import PlayScene
 from scenes.startScene import StartScene
 from scenes.loadScene import LoadScene
 from scenes.practiceScene import PracticeScene
+from textCache import clear_fonts
 
 # 定数
 WIDTH = Config.WIDTH
 HEIGHT = Config.HEIGHT
 FRAME_RATE = Config.FRAME_RATE
 class GameScene:
-    def __init__(self):
+    def __init__(self, param_filter=None):
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Blur Game")
         self.clock = pygame.time.Clock()
         self.running = True
         self.attr_using = random.choice(["finger", "palm", "grab"])
+        # 手のデータ -> パラメータの写像は名前で一度だけ引いておく
+        self.mapping = get_mapping(self.attr_using)
+        # 手のパラメータとシーンの間に挟むフィルタ
+        if param_filter is None:
+            param_filter = OneEuroFilter(
+                min_cutoff=Config.FILTER_MIN_CUTOFF,
+                beta=Config.FILTER_BETA,
+                prediction=Config.FILTER_PREDICTION,
+            )
+        self.param_filter = param_filter
 
         self.current_scene = LoadScene(self.switch_scene)
         self.current_scene.draw(self.screen)
         pygame.display.flip()
+        self.full_redraw = True  # 次の描画で画面全体を描き直す（シーンの切り替えなど）
+        self.skipped_frames = 0  # 何も変わらず描画を飛ばした回数
         self.clock.tick(FRAME_RATE)
 
     def switch_scene(self, scene_name):
+        self.full_redraw = True
+        self.current_scene.close()
+        # 前のシーン（前のラウンド）の手の位置から平滑化・予測しないように、フィルタの状態を捨てる.
+        # PlayScene はラウンドごとに作り直すので、ここで新しいラウンドの始まりも扱える
+        self.param_filter.reset()
         if scene_name == "start":
             self.current_scene = StartScene(self.switch_scene)
         elif scene_name == "play":
@@ -35,28 +55,54 @@ class GameScene:
         elif scene_name == "practice":
             self.current_scene = PracticeScene(self.switch_scene, self.attr_using)  # 追加
 
+    def required_features(self):
+        """LeapInput で読む必要のある特徴量（手の描画に使う skeleton は HandVisualizer が購読時に足す）"""
+        return {self.mapping.feature}
+
     def should_quit(self):
         return not self.running
 
-    def update(self, leap_data):
+    def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # ウィンドウが隠れていた部分を描き直す
+                self.full_redraw = True
             else:
                 self.current_scene.handle_event(event)
 
-        # self.current_scene.update(hand_position)
-        if self.attr_using == "finger":
-            param = leap_data.finger_directions_to_parameter()
-        elif self.attr_using == "palm":
-            param = leap_data.palm_normal_to_parameter()
-        elif self.attr_using == "grab":
-            param = leap_data.palm_normal_to_parameter()
+    def update(self, leap_data):
+        """新しいフレームのパラメータをシーンに渡す（描画はしない）"""
+        param = self.mapping(leap_data)
 
+        if leap_data.timestamp is not None:
+            param = self.param_filter.filter(param, leap_data.timestamp / 1e6)
         self.current_scene.update(param)
-        self.current_scene.draw(self.screen)
-        pygame.display.flip()
-        self.clock.tick(FRAME_RATE)
+
+    def tick(self):
+        """新しいフレームがないまま描画するときに、シーンの時間だけを進める"""
+        self.current_scene.tick()
+
+    def render(self):
+        """イベントを処理してシーンを描画する. 描画の間隔は呼び出し側が決める"""
+        self.handle_events()
+        if not Config.DIRTY_RECTS:
+            self.current_scene.draw(self.screen)
+            pygame.display.flip()
+            self.clock.tick()
+            return
+        # シーンが描き直した範囲だけを画面に送り、何も変わっていなければ送らない
+        full, self.full_redraw = self.full_redraw, False
+        rects = self.current_scene.draw_dirty(self.screen, full)
+        if full:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        else:
+            self.skipped_frames += 1
+        self.clock.tick()
 
     def cleanup(self):
+        clear_fonts()
         pygame.quit()
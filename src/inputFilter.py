@@ -0,0 +1,138 @@
+# inputFilter.py
+import math
+import numpy as np
+
+
+class ParamFilter:
+    """
+    手のパラメータ (0~1) を平滑化するフィルタの基底クラス
+
+    基底クラス自体は何もしない（値をそのまま返す）フィルタとして使える.
+
+    Attributes
+    ----------
+    latency : float
+        直前のフレームでフィルタが加えた遅延の推定値（秒）. 予測で打ち消した分は差し引く
+    """
+
+    def __init__(self) -> None:
+        self.latency = 0.0
+
+    def reset(self) -> None:
+        """内部状態をリセットする"""
+        self.latency = 0.0
+
+    def filter(self, value: float, timestamp: float) -> float:
+        """
+        1フレーム分の値を受け取り、フィルタ後の値を返すメソッド
+
+        Parameters
+        ----------
+        value : float
+            フィルタ前の値
+        timestamp : float
+            フレームのタイムスタンプ（秒）
+
+        Returns
+        -------
+        float
+            フィルタ後の値
+        """
+        return value
+
+    def apply(self, values: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        """
+        記録済みの値の列にフィルタを順に適用するメソッド（状態はリセットしてから始める）
+
+        Parameters
+        ----------
+        values : np.ndarray
+            フィルタ前の値 (N,)
+        timestamps : np.ndarray
+            タイムスタンプ（秒） (N,)
+
+        Returns
+        -------
+        np.ndarray
+            フィルタ後の値 (N,)
+        """
+        self.reset()
+        out = np.empty(len(values), dtype=np.float64)
+        for i, (value, timestamp) in enumerate(zip(values.tolist(), timestamps.tolist())):
+            out[i] = self.filter(value, timestamp)
+        return out
+
+
+def _smoothing_factor(cutoff: float, dt: float) -> float:
+    # カットオフ周波数 cutoff の1次ローパスを間隔 dt でサンプルしたときの係数
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter(ParamFilter):
+    """
+    手の速さに応じてカットオフ周波数を変える 1€ フィルタ
+
+    ゆっくり動かしているときはカットオフを下げて震えを抑え、
+    速く動かしているときはカットオフを上げて遅延を減らす.
+    1フレームあたりの計算量は O(1).
+
+    Parameters
+    ----------
+    min_cutoff : float
+        静止時のカットオフ周波数 (Hz)
+    beta : float
+        速さ (1/s) に対するカットオフ周波数の増え方
+    d_cutoff : float
+        速さの推定に使うローパスのカットオフ周波数 (Hz)
+    prediction : float
+        推定した速さで何秒先の値を予測して返すか. トラッキングの遅延を打ち消すのに使う.
+        予測した値はパラメータの範囲 (0~1) に収める
+    """
+
+    def __init__(
+        self,
+        min_cutoff: float = 1.0,
+        beta: float = 5.0,
+        d_cutoff: float = 1.0,
+        prediction: float = 0.0,
+    ) -> None:
+        super().__init__()
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.prediction = prediction
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self._last_time = None
+        self._value = 0.0  # 平滑化した値
+        self._speed = 0.0  # 平滑化した速さ
+        self._output = 0.0
+
+    def filter(self, value: float, timestamp: float) -> float:
+        if self._last_time is None:
+            self._last_time = timestamp
+            self._value = value
+            self._output = value
+            self.latency = 0.0
+            return value
+
+        dt = timestamp - self._last_time
+        if dt <= 0:
+            # 同じフレームが再度渡された場合は前回の出力を返す
+            return self._output
+        self._last_time = timestamp
+
+        # 速さを平滑化してから、それに応じたカットオフで値を平滑化する
+        speed = (value - self._value) / dt
+        self._speed += _smoothing_factor(self.d_cutoff, dt) * (speed - self._speed)
+        cutoff = self.min_cutoff + self.beta * abs(self._speed)
+        self._value += _smoothing_factor(cutoff, dt) * (value - self._value)
+
+        # 1次ローパスの遅延は時定数 1 / (2π fc) で近似できる
+        self.latency = 1.0 / (2.0 * math.pi * cutoff) - self.prediction
+        # 速く動かしている端の近くでは予測が範囲の外に出るので収める
+        self._output = min(max(self._value + self._speed * self.prediction, 0.0), 1.0)
+        return self._output
@@ -0,0 +1,119 @@
+# inputHub.py
+import threading
+import weakref
+
+from leapdata import LeapData
+from leapInput import LeapInput
+
+
+class Subscription:
+    """
+    InputHub の購読者ごとの窓口
+
+    リスナースレッドから最新のフレームとシーケンス番号を受け取り、
+    LeapInput と同じ get_hand_position / seq で読ませる.
+    """
+
+    def __init__(self, hub: "InputHub", features) -> None:
+        self.hub = hub
+        self.features = frozenset(features or ())
+        self.seq = 0  # 最後に受け取ったフレームのシーケンス番号（0 はまだ受け取っていない）
+        self._data = LeapData.empty()
+
+    def _deliver(self, data, seq) -> None:
+        self._data = data
+        self.seq = seq
+
+    def get_hand_position(self):
+        return self._data, self.seq > 0
+
+    def close(self) -> None:
+        """購読をやめる"""
+        self.hub.unsubscribe(self)
+
+
+class InputHub:
+    """
+    1つの LeapInput（Leap Motion への接続）のフレームを複数の購読者に配るクラス
+
+    シーンやビジュアライザーはそれぞれ LeapInput を作らずに subscribe で窓口を受け取るので、
+    接続とリスナースレッドはプロセス全体で1つになる. 購読者が要る特徴量は接続側で読むように足す.
+    購読者はシーンと一緒に捨てられてもよいように弱参照で持つ.
+
+    Parameters
+    ----------
+    source : LeapInput
+        フレームを受け取る LeapInput（ReplayLeapInput でもよい）
+    """
+
+    def __init__(self, source: LeapInput) -> None:
+        self.source = source
+        self._subscribers = weakref.WeakSet()
+        self._lock = threading.Lock()
+        source.add_callback(self._fan_out)
+
+    def subscribe(self, features=None) -> Subscription:
+        """
+        フレームを受け取る窓口を作る
+
+        Parameters
+        ----------
+        features : set[str] | None
+            購読者が使う特徴量（FEATURES の部分集合）
+        """
+        subscription = Subscription(self, features)
+        self.source.add_features(subscription.features)
+        with self._lock:
+            self._subscribers.add(subscription)
+        # すでに来ているフレームを最初の値にする
+        if self.source.seq:
+            subscription._deliver(self.source.get_hand_position()[0], self.source.seq)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _fan_out(self, data, seq) -> None:
+        # リスナースレッドから呼ばれる
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription._deliver(data, seq)
+
+    def close(self) -> None:
+        """接続を閉じる"""
+        self.source.remove_callback(self._fan_out)
+        self.source.close()
+
+
+# プロセス全体で共有するハブ（shared_input_hub で作る）
+_shared_hub = None
+_shared_lock = threading.Lock()
+
+
+def shared_input_hub(factory=None) -> InputHub:
+    """
+    プロセス全体で1つの InputHub を返す（最初の呼び出しで接続する）
+
+    最初の呼び出しでは factory()（省略時は LeapInput()）の LeapInput を接続にする.
+    2回目以降の呼び出しでは引数は使わず、最初に作ったハブを返す.
+    """
+    global _shared_hub
+    with _shared_lock:
+        if _shared_hub is None:
+            _shared_hub = InputHub(factory() if factory else LeapInput(features=()))
+        return _shared_hub
+
+
+def close_shared_input_hub() -> None:
+    """共有のハブの接続を閉じる（終了時に呼ぶ）"""
+    global _shared_hub
+    with _shared_lock:
+        if _shared_hub is not None:
+            _shared_hub.close()
+            _shared_hub = None
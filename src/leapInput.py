@@ -1,41 +1,212 @@
 import threading
 import time
 import leap
-from leapdata import LeapData
+from leapdata import FEATURES, LeapData
+from leapSession import LeapSession, LeapSessionWriter
+from frameRing import FrameRing
 
 class LeapInput:
-    def __init__(self):
-        self._start_listener()
+    """
+    Leap Motion からフレームを受け取るクラス
+
+    Parameters
+    ----------
+    record_path : str | None
+        指定すると受け取ったフレームをセッションとして記録する（全特徴量を読む）
+    capacity : int
+        リングバッファに保持するフレーム数
+    features : set[str] | None
+        実際に使う特徴量（FEATURES の部分集合）. None のときはすべて読む
+    """
+
+    def __init__(self, record_path=None, capacity=1024, features=None):
+        if features is not None:
+            unknown = set(features) - set(FEATURES)
+            if unknown:
+                raise ValueError(f"未知の特徴量です: {sorted(unknown)}")
+            features = frozenset(features)
+        # 記録するときは再生時に何が使われてもよいように全部読む
+        self.features = None if record_path else features
         self._latest_data = LeapData.empty()  # ← 前回のデータ保持用
         self.leap_data = LeapData.empty()
-        self.is_changed = False
+        self.is_changed = False  # 一度でもフレームを受け取ったか（新着の判定には seq を使う）
+        # 受け取った全フレームをシーケンス番号付きで保持する
+        self.frames = FrameRing(capacity)
+        # 新しいフレームが来たことを待機中のスレッドに知らせる
+        self._frame_ready = threading.Condition()
+        # record_path を指定すると、受け取ったフレームをセッションとして記録する
+        self._recorder = LeapSessionWriter(record_path) if record_path else None
+        self._callbacks = ()  # フレームごとに呼ぶ関数. リスナースレッドは差し替えた組だけを読む
+        self._stopped = threading.Event()
+        self._thread = self._start_listener()
+
+    def _on_frame(self, data):
+        with self._frame_ready:
+            self.frames.push(data)
+            self.leap_data = data
+            self._latest_data = data  # ← 最新値を保持
+            self.is_changed = True
+            seq = self.frames.seq
+            self._frame_ready.notify_all()
+        for callback in self._callbacks:
+            callback(data, seq)
+
+    def add_callback(self, callback):
+        """フレームを受け取るたびに callback(data, seq) を呼ぶ（リスナースレッドから呼ばれる）"""
+        self._callbacks = self._callbacks + (callback,)
+
+    def remove_callback(self, callback):
+        self._callbacks = tuple(c for c in self._callbacks if c != callback)
+
+    def add_features(self, features):
+        """読む特徴量を増やす（次のフレームから読む）"""
+        if self.features is not None:
+            self.features = self.features | frozenset(features)
+
+    def _handle_tracking_event(self, event):
+        # リスナースレッドで GIL を握る時間を短くするため、使う特徴量だけを読む
+        if event.hands:
+            hand = event.hands[0]
+            fingers = hand.digits
+            data = LeapData(hand, fingers, event.timestamp, self.features)
+            # close が途中で None にしても同じ記録に書くように、一度だけ読む
+            recorder = self._recorder
+            if recorder is not None and not self._stopped.is_set():
+                recorder.write(data)
+            self._on_frame(data)
 
     def _start_listener(self):
         def leap_thread():
             class MyListener(leap.Listener):
                 def on_tracking_event(_, event):
-                    if event.hands:
-                        hand = event.hands[0]
-                        fingers = hand.digits
-                        data = LeapData(hand, fingers)
-                        self.leap_data = data
-                        self._latest_data = data  # ← 最新値を保持
-                        self.is_changed = True
+                    self._handle_tracking_event(event)
 
             listener = MyListener()
             connection = leap.Connection()
             connection.add_listener(listener)
             with connection.open():
                 connection.set_tracking_mode(leap.TrackingMode.Desktop)
-                while True:
-                    time.sleep(0.1)
+                while not self._stopped.wait(0.1):
+                    recorder = self._recorder
+                    if recorder is not None:
+                        recorder.flush()
 
         thread = threading.Thread(target=leap_thread, daemon=True)
         thread.start()
+        return thread
 
     def get_hand_position(self):
         return self._latest_data, self.is_changed
 
+    def wait_for_frame(self, timeout=None, seq=None):
+        """
+        シーケンス番号が seq より新しいフレームが来るまでブロックして待つ
+
+        Parameters
+        ----------
+        timeout : float | None
+            最大の待ち時間（秒）. None のときは来るまで待つ
+        seq : int | None
+            呼び出し側が最後に処理したシーケンス番号. None のときは呼び出し時点の最新
+
+        Returns
+        -------
+        bool
+            新しいフレームが来ていれば True、タイムアウトしたら False
+        """
+        with self._frame_ready:
+            if seq is None:
+                seq = self.frames.seq
+            return self._frame_ready.wait_for(lambda: self.frames.seq > seq, timeout)
+
+    @property
+    def seq(self):
+        """最新フレームのシーケンス番号"""
+        return self.frames.seq
+
+    def latest(self):
+        """最新のフレーム（リングバッファのビュー）"""
+        return self.frames.latest()
+
+    def since(self, seq):
+        """シーケンス番号が seq より大きいフレームをまとめて返す"""
+        return self.frames.since(seq)
+
+    def window(self, seconds):
+        """直近 seconds 秒のフレームをまとめて返す"""
+        return self.frames.window(seconds)
+
+    def close(self, timeout=1.0):
+        """
+        接続を閉じてリスナーのスレッドを止め、記録中のセッションを閉じる
+
+        リスナーのスレッドが終わるまで最大 timeout 秒待ってから記録を閉じるので、
+        閉じた後にフレームが書き込まれることはない.
+        """
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+            if thread.is_alive():
+                print(f"Leap のリスナーのスレッドが {timeout} 秒で止まりませんでした")
+        recorder = self._recorder
+        self._recorder = None
+        if recorder is not None:
+            recorder.close()
+
+
+class ReplayLeapInput(LeapInput):
+    """
+    記録済みセッションを再生し、LeapInput と同じ API でフレームを返すクラス
+
+    Parameters
+    ----------
+    path : str
+        セッションのディレクトリ
+    speed : float | None
+        再生速度の倍率（正の値）. None のときは待たずに最速で流す
+    loop : bool
+        末尾まで再生したら先頭に戻るかどうか
+    start : float
+        再生を始める位置（セッション先頭からの秒数）
+    """
+
+    def __init__(self, path, speed=1.0, loop=False, start=0.0, capacity=1024):
+        if speed is not None and not speed > 0:
+            raise ValueError(f"再生速度は正の値にしてください: {speed}")
+        self.session = LeapSession(path)
+        self.speed = speed
+        self.loop = loop
+        self.start = start
+        self.finished = threading.Event()
+        super().__init__(capacity=capacity)
+
+    def _start_listener(self):
+        def replay_thread():
+            session = self.session
+            timestamps = session.timestamps
+            index = session.index_at(self.start) if len(session) else 0
+            while index < len(session) and not self._stopped.is_set():
+                base_timestamp = int(timestamps[index])
+                base_time = time.perf_counter()
+                for i in range(index, len(session)):
+                    if self._stopped.is_set():
+                        break
+                    if self.speed is not None:
+                        due = base_time + (int(timestamps[i]) - base_timestamp) / 1e6 / self.speed
+                        delay = due - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                    self._on_frame(session.frame(i))
+                if not self.loop:
+                    break
+                index = 0
+            self.finished.set()
+
+        thread = threading.Thread(target=replay_thread, daemon=True)
+        thread.start()
+        return thread
+
 def main():
     leap_input = LeapInput()
     t = 0
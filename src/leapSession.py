@@ -0,0 +1,157 @@
+# leapSession.py
+import json
+import os
+
+import numpy as np
+from leapdata import FRAME_COLUMNS, LeapData, LeapFrames
+
+SESSION_VERSION = 1
+
+# セッションに記録する列. 列ごとに別ファイルへ追記するので、
+# 読み込み時は列単位で memmap できる
+COLUMNS = FRAME_COLUMNS
+
+
+def _column_path(path: str, name: str) -> str:
+    return os.path.join(path, f"{name}.bin")
+
+
+class LeapSessionWriter:
+    """
+    トラッキングイベントをセッション（ディレクトリ）に記録するクラス
+
+    セッションは meta.json と列ごとのバイナリファイルからなる.
+    各フレームは列ファイルの末尾に固定長で追記される.
+
+    Parameters
+    ----------
+    path : str
+        セッションを保存するディレクトリ
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta = {
+            "version": SESSION_VERSION,
+            "columns": {
+                name: {"dtype": dtype.str, "shape": list(shape)}
+                for name, (dtype, shape) in COLUMNS.items()
+            },
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        # 1フレーム分の書き込み用バッファ（フレームごとに確保しない）
+        self._rows = {
+            name: np.zeros(shape, dtype=dtype) for name, (dtype, shape) in COLUMNS.items()
+        }
+        self._files = {name: open(_column_path(path, name), "ab") for name in COLUMNS}
+        self.frame_count = 0
+
+    def write(self, data: LeapData) -> None:
+        """1フレーム分の手のデータを追記する"""
+        rows = self._rows
+        rows["timestamp"][...] = data.timestamp
+        rows["is_left"][...] = data.is_left
+        rows["palm_position"][:] = data.palm_position
+        rows["palm_normal"][:] = data.palm_normal
+        rows["grab_strength"][...] = data.grab_strength
+        rows["pinch_strength"][...] = data.pinch_strength
+        rows["joints"][:] = data.joints
+
+        for name, f in self._files.items():
+            f.write(memoryview(rows[name]).cast("B"))
+        self.frame_count += 1
+
+    def flush(self) -> None:
+        for f in self._files.values():
+            f.flush()
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+class LeapSession:
+    """
+    記録済みセッションを読み込むクラス
+
+    列ファイルは np.memmap で開くので、長時間のセッションでも
+    開く処理はファイルサイズによらず一瞬で終わる.
+
+    Parameters
+    ----------
+    path : str
+        セッションのディレクトリ
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != SESSION_VERSION:
+            raise ValueError(f"未対応のセッションバージョンです: {meta.get('version')}")
+
+        layout = {
+            name: (np.dtype(column["dtype"]), tuple(column["shape"]))
+            for name, column in meta["columns"].items()
+        }
+
+        # 記録中に落ちた場合に備え、全列が揃っているフレーム数だけを使う
+        count = None
+        for name, (dtype, shape) in layout.items():
+            row_bytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+            rows = os.path.getsize(_column_path(path, name)) // row_bytes
+            count = rows if count is None else min(count, rows)
+        self.frame_count = count or 0
+
+        self.columns = {}
+        for name, (dtype, shape) in layout.items():
+            if self.frame_count == 0:
+                self.columns[name] = np.empty((0, *shape), dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(
+                    _column_path(path, name),
+                    dtype=dtype,
+                    mode="r",
+                    shape=(self.frame_count, *shape),
+                )
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.columns["timestamp"]
+
+    def duration(self) -> float:
+        """セッションの長さ（秒）"""
+        if self.frame_count == 0:
+            return 0.0
+        return (int(self.timestamps[-1]) - int(self.timestamps[0])) / 1e6
+
+    def index_at(self, seconds: float) -> int:
+        """先頭から seconds 秒の時点で最新のフレーム番号を返す（二分探索）"""
+        if self.frame_count == 0:
+            raise IndexError("セッションにフレームがありません")
+        target = int(self.timestamps[0]) + int(seconds * 1e6)
+        index = int(np.searchsorted(self.timestamps, target, side="right")) - 1
+        return max(0, index)
+
+    def frame(self, index: int) -> LeapData:
+        """index 番目のフレームを LeapData として返す"""
+        columns = self.columns
+        return LeapData.from_arrays(
+            columns["joints"][index],
+            columns["palm_position"][index],
+            columns["palm_normal"][index],
+            columns["grab_strength"][index],
+            columns["pinch_strength"][index],
+            columns["is_left"][index],
+            columns["timestamp"][index],
+        )
+
+    def frames(self, start: int = 0, stop: int | None = None) -> LeapFrames:
+        """start から stop までのフレームを（memmap のビューのまま）まとめて返す"""
+        return LeapFrames({name: column[start:stop] for name, column in self.columns.items()})
@@ -1,86 +1,242 @@
-# leapInput.py
-import threading
-import time
+# leapdata.py
 import leap
 import math
 import numpy as np
 
-class LeapData:
-    def __init__(self, hand, fingers):
-        # 指の方向ベクトル（distal bone の方向）を指ごとに取得
-        self.finger_direction_x = []
-        self.finger_direction_y = []
-        self.finger_direction_z = []
-        self.fingers = fingers
-
-        for digit in fingers:
-            distal_bone = digit.bones[3]  # 3: Distal bone
-            if distal_bone:
-                vec = [0, 0, 0]
-                vec[0] = distal_bone.next_joint.x - distal_bone.prev_joint.x
-                vec[1] = distal_bone.next_joint.y - distal_bone.prev_joint.y
-                vec[2] = distal_bone.next_joint.z - distal_bone.prev_joint.z
-                norm = np.linalg.norm([vec[0], vec[1], vec[2]])
-                if norm != 0:
-                    self.finger_direction_x.append(vec[0] / norm)
-                    self.finger_direction_y.append(vec[1] / norm)
-                    self.finger_direction_z.append(vec[2] / norm)
-                else:
-                    self.finger_direction_x.append(0.0)
-                    self.finger_direction_y.append(0.0)
-                    self.finger_direction_z.append(0.0)
-            else:
-                self.finger_direction_x.append(0.0)
-                self.finger_direction_y.append(0.0)
-                self.finger_direction_z.append(0.0)
+# 関節座標の形状: (指, 骨, prev/next joint, xyz)
+JOINTS_SHAPE = (5, 4, 2, 3)
+
+# パラメータ計算に使う基準ベクトル（呼び出しごとに作り直さない）
+FINGER_REFERENCE = (1 / math.sqrt(3), 1 / math.sqrt(3), -1 / math.sqrt(3))
+PALM_REFERENCE = (2 / 3, 2 / 3, 1 / 3)
+
+# LeapInput で取り出せる特徴量. 使わない特徴量は LeapData の生成時に読まない
+#   finger   : 人差し指の distal bone（指の方向）
+#   palm     : 手のひらの法線ベクトル
+#   grab     : grab_strength
+#   pinch    : pinch_strength
+#   position : 手のひらの位置
+#   skeleton : 全関節と手のひらの位置（可視化・記録用）
+FEATURES = ("finger", "palm", "grab", "pinch", "position", "skeleton")
+
+# 1フレームを構成する列: 列名 -> (dtype, 1フレームあたりの形状)
+# セッションファイル・リングバッファ・バッチ処理で共通に使う
+FRAME_COLUMNS = {
+    "timestamp": (np.dtype("<i8"), ()),  # デバイスのタイムスタンプ（マイクロ秒）
+    "is_left": (np.dtype("u1"), ()),
+    "palm_position": (np.dtype("<f4"), (3,)),
+    "palm_normal": (np.dtype("<f4"), (3,)),
+    "grab_strength": (np.dtype("<f4"), ()),
+    "pinch_strength": (np.dtype("<f4"), ()),
+    "joints": (np.dtype("<f4"), JOINTS_SHAPE),  # (指, 骨, prev/next, xyz)
+}
+
+
+def finger_directions(joints):
+    """
+    関節座標から各指の方向ベクトル（distal bone の方向）をまとめて正規化して返す関数
+
+    joints の末尾4軸が JOINTS_SHAPE であれば、先頭に任意のバッチ軸があってもよい.
+    長さ0のベクトルは0ベクトルのままにする.
+    """
+    distal = joints[..., 3, :, :].astype(np.float64)  # 3: Distal bone
+    vec = distal[..., 1, :] - distal[..., 0, :]
+    norm = np.sqrt(np.add.reduce(vec * vec, axis=-1, keepdims=True))
+    norm[norm == 0] = np.inf
+    return np.divide(vec, norm, out=vec)
+
+
+# 使わない特徴量の列に入れる読み取り専用のゼロ配列
+_ZERO_JOINTS = np.zeros(JOINTS_SHAPE, dtype=np.float32)
+_ZERO_JOINTS.flags.writeable = False
+_ZERO_VECTOR = np.zeros(3, dtype=np.float32)
+_ZERO_VECTOR.flags.writeable = False
 
-        
-        """
-        # 指の幅（distal bone の直径）
-        self.finger_widths = [finger.distal.Width for finger in fingers]
-        """
-        # 手のひらの法線ベクトル
-        self.palm_normal_x = hand.palm.normal.x
-        self.palm_normal_y = hand.palm.normal.y
-        self.palm_normal_z = hand.palm.normal.z
+
+class LeapData:
+    """
+    1フレーム分の手のデータ
+
+    関節座標は (5, 4, 2, 3) の float32 配列に一度だけコピーし、
+    leap (cffi) のオブジェクトへの参照は保持しない.
+    features（FEATURES の部分集合）を指定すると、その特徴量に必要な値だけを読み、
+    残りの列はゼロになる. None のときはすべて読む.
+    """
+
+    __slots__ = (
+        "timestamp",
+        "joints",
+        "palm_position",
+        "palm_normal",
+        "grab_strength",
+        "pinch_strength",
+        "is_left",
+        "is_right",
+        "_finger_directions",
+    )
+
+    def __init__(self, hand, fingers, timestamp=None, features=None):
+        if features is not None and "skeleton" not in features:
+            self._assign_features(hand, fingers, timestamp, features)
+            return
+
+        # 全関節と手のひらの座標を1つのリストに集め、1回で配列化する
+        palm = hand.palm
+        coords = [
+            c
+            for digit in fingers
+            for bone in digit.bones
+            for joint in (bone.prev_joint, bone.next_joint)
+            for c in (joint.x, joint.y, joint.z)
+        ]
+        coords += (palm.position.x, palm.position.y, palm.position.z)
+        coords += (palm.normal.x, palm.normal.y, palm.normal.z)
+        block = np.array(coords, dtype=np.float32)
+
+        self._assign(
+            block[:-6].reshape(JOINTS_SHAPE),
+            block[-6:-3],
+            block[-3:],
+            hand.grab_strength,
+            hand.pinch_strength,
+            hand.type == leap.HandType.Left,
+            timestamp,
+        )
+
+    def _assign_features(self, hand, fingers, timestamp, features):
+        # 指定された特徴量に必要な値だけを leap のオブジェクトから読む.
+        # 読まなかった列は読み取り専用のゼロ配列を共有する
+        joints = _ZERO_JOINTS
+        palm_position = _ZERO_VECTOR
+        palm_normal = _ZERO_VECTOR
+        grab_strength = 0.0
+        pinch_strength = 0.0
+        if "finger" in features:
+            distal_bone = fingers[1].bones[3]  # 人差し指の Distal bone
+            prev_joint = distal_bone.prev_joint
+            next_joint = distal_bone.next_joint
+            joints = np.zeros(JOINTS_SHAPE, dtype=np.float32)
+            joints[1, 3] = (
+                (prev_joint.x, prev_joint.y, prev_joint.z),
+                (next_joint.x, next_joint.y, next_joint.z),
+            )
+        if "palm" in features:
+            normal = hand.palm.normal
+            palm_normal = np.array([normal.x, normal.y, normal.z], dtype=np.float32)
+        if "position" in features:
+            position = hand.palm.position
+            palm_position = np.array([position.x, position.y, position.z], dtype=np.float32)
+        if "grab" in features:
+            grab_strength = hand.grab_strength
+        if "pinch" in features:
+            pinch_strength = hand.pinch_strength
+
+        self._assign(
+            joints,
+            palm_position,
+            palm_normal,
+            grab_strength,
+            pinch_strength,
+            hand.type == leap.HandType.Left,
+            timestamp,
+        )
+
+    def _assign(
+        self, joints, palm_position, palm_normal, grab_strength, pinch_strength, is_left, timestamp
+    ):
+        self.timestamp = None if timestamp is None else int(timestamp)
+        self.joints = joints
+        self._finger_directions = None  # 初めて参照されたときに計算する
+
+        # 手の位置と手のひらの法線ベクトル
+        self.palm_position = palm_position
+        self.palm_normal = palm_normal
 
         # 開き具合
-        self.grab_strength = hand.grab_strength
-        self.pinch_strength = hand.pinch_strength
+        self.grab_strength = float(grab_strength)
+        self.pinch_strength = float(pinch_strength)
 
         # 左右判定
-        self.is_left = hand.type == leap.HandType.Left
-        self.is_right = hand.type == leap.HandType.Right
+        self.is_left = bool(is_left)
+        self.is_right = not self.is_left
 
-        # 手の位置
-        self.palm_x = hand.palm.position.x
-        self.palm_y = hand.palm.position.y
-        self.palm_z = hand.palm.position.z
+    @classmethod
+    def from_arrays(
+        cls,
+        joints,
+        palm_position,
+        palm_normal,
+        grab_strength,
+        pinch_strength,
+        is_left,
+        timestamp=None,
+        copy=True,
+    ):
+        """
+        配列から LeapData を生成する
+
+        copy=False のときは配列をコピーせずに参照する（リングバッファのビューなど）.
+        """
+        if copy:
+            joints = np.array(joints, dtype=np.float32)
+            palm_position = np.array(palm_position, dtype=np.float32)
+            palm_normal = np.array(palm_normal, dtype=np.float32)
+        obj = cls.__new__(cls)
+        obj._assign(
+            joints, palm_position, palm_normal, grab_strength, pinch_strength, is_left, timestamp
+        )
+        return obj
 
     @classmethod
     def empty(cls):
         obj = cls.__new__(cls)  # __init__ を通さずにインスタンスを生成
+        for name in cls.__slots__:
+            setattr(obj, name, None)
+        return obj
 
-        obj.finger_direction_x = None
-        obj.finger_direction_y = None
-        obj.finger_direction_z = None
-        obj.fingers = None
+    @property
+    def finger_directions(self):
+        """各指の方向ベクトル (5, 3)。全指まとめて一度だけ正規化する"""
+        if self._finger_directions is None and self.joints is not None:
+            self._finger_directions = finger_directions(self.joints)
+        return self._finger_directions
 
-        obj.palm_normal_x = None
-        obj.palm_normal_y = None
-        obj.palm_normal_z = None
+    # 以前の属性名でも参照できるようにする
+    @property
+    def finger_direction_x(self):
+        return None if self.finger_directions is None else self.finger_directions[:, 0]
 
-        obj.grab_strength = None
-        obj.pinch_strength = None
+    @property
+    def finger_direction_y(self):
+        return None if self.finger_directions is None else self.finger_directions[:, 1]
 
-        obj.is_left = None
-        obj.is_right = None
+    @property
+    def finger_direction_z(self):
+        return None if self.finger_directions is None else self.finger_directions[:, 2]
 
-        obj.palm_x = None
-        obj.palm_y = None
-        obj.palm_z = None
+    @property
+    def palm_normal_x(self):
+        return None if self.palm_normal is None else float(self.palm_normal[0])
 
-        return obj
+    @property
+    def palm_normal_y(self):
+        return None if self.palm_normal is None else float(self.palm_normal[1])
+
+    @property
+    def palm_normal_z(self):
+        return None if self.palm_normal is None else float(self.palm_normal[2])
+
+    @property
+    def palm_x(self):
+        return None if self.palm_position is None else float(self.palm_position[0])
+
+    @property
+    def palm_y(self):
+        return None if self.palm_position is None else float(self.palm_position[1])
+
+    @property
+    def palm_z(self):
+        return None if self.palm_position is None else float(self.palm_position[2])
 
     def variable_range(self, variable_name: str):
         # 変数名に応じた値域を返す
@@ -120,14 +276,14 @@ class LeapData:
         self.finger_directions[1] のベクトルと 1/sqrt(3) * [1, 1, -1] の内積を計算し、
         0以上1以下に正規化して返す関数
         """
-        if len(self.finger_direction_x) <= 1:
+        if self.finger_directions is None or len(self.finger_directions) <= 1:
             raise ValueError("self.finger_directions に十分なデータがありません")
 
         # 基準ベクトルを定義
-        reference_vector = [1 / math.sqrt(3), 1 / math.sqrt(3), -1 / math.sqrt(3)]
+        reference_vector = FINGER_REFERENCE
 
         # 指定された指の方向ベクトルを取得
-        direction = [self.finger_direction_x[1], self.finger_direction_y[1], self.finger_direction_z[1]]
+        direction = self.finger_directions[1].tolist()
 
         # 内積を計算
         dot_product = sum(d * r for d, r in zip(direction, reference_vector))
@@ -142,14 +298,14 @@ class LeapData:
         self.palm_normal のベクトルと 1/3 * [2, 2, 1] の内積を計算し、
         0以上1以下に正規化して返す関数
         """
-        if not self.palm_normal_x:
+        if self.palm_normal is None:
             raise ValueError("self.palm_normal にデータがありません")
 
         # 基準ベクトルを定義
-        reference_vector = [2 / 3, 2 / 3, 1 / 3]
+        reference_vector = PALM_REFERENCE
 
         # 手のひらの法線ベクトルを取得
-        normal = [self.palm_normal_x, self.palm_normal_y, self.palm_normal_z]
+        normal = self.palm_normal.tolist()
 
         # 内積を計算
         dot_product = sum(n * r for n, r in zip(normal, reference_vector))
@@ -172,4 +328,74 @@ class LeapData:
         if self.is_left:
             x*=1/2
         return x
-    
\ No newline at end of file
+
+
+class LeapFrames:
+    """
+    複数フレーム分の手のデータ
+
+    各属性は FRAME_COLUMNS の列に対応する (N, ...) の配列で、
+    リングバッファやセッションファイルのビューをそのまま保持する.
+    seq はリングバッファから取り出したときのシーケンス番号（それ以外は None）.
+    """
+
+    __slots__ = ("seq",) + tuple(FRAME_COLUMNS)
+
+    def __init__(self, columns, seq=None):
+        self.seq = seq
+        for name in FRAME_COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        """index 番目のフレームを（コピーせずに）LeapData として返す"""
+        return LeapData.from_arrays(
+            self.joints[index],
+            self.palm_position[index],
+            self.palm_normal[index],
+            self.grab_strength[index],
+            self.pinch_strength[index],
+            self.is_left[index],
+            self.timestamp[index],
+            copy=False,
+        )
+
+    @property
+    def finger_directions(self):
+        """各フレーム・各指の方向ベクトル (N, 5, 3)"""
+        return finger_directions(self.joints)
+
+    # 以下は LeapData の同名メソッドのバッチ版. 同じ順序で同じ演算を行うので
+    # 結果はスカラー版とビット単位で一致する（行列積は使わない）
+
+    def finger_directions_to_parameter(self):
+        """全フレームについて LeapData.finger_directions_to_parameter を計算する"""
+        reference_vector = FINGER_REFERENCE
+        # 使うのは人差し指 (1) だけなので、その指だけ正規化する
+        direction = finger_directions(self.joints[:, 1:2])[:, 0, :]
+        dot_product = (
+            direction[:, 0] * reference_vector[0]
+            + direction[:, 1] * reference_vector[1]
+            + direction[:, 2] * reference_vector[2]
+        )
+        return np.clip((dot_product + 1) / 2, 0, 1)
+
+    def palm_normal_to_parameter(self):
+        """全フレームについて LeapData.palm_normal_to_parameter を計算する"""
+        reference_vector = PALM_REFERENCE
+        normal = self.palm_normal.astype(np.float64)
+        dot_product = (
+            normal[:, 0] * reference_vector[0]
+            + normal[:, 1] * reference_vector[1]
+            + normal[:, 2] * reference_vector[2]
+        )
+        return np.clip((dot_product + 1) / 2, 0, 1)
+
+    def grab_strength_to_parameter(self):
+        """全フレームについて LeapData.grab_strength_to_parameter を計算する"""
+        x = self.grab_strength.astype(np.float64)
+        if not np.all((0 <= x) & (x <= 1)):
+            raise ValueError("grab_strength は 0 以上 1 以下である必要があります")
+        return np.where(self.is_left != 0, x * (1 / 2), x)
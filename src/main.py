@@ -1,27 +1,141 @@
 # main.py
-from leapInput import LeapInput
+import argparse
+import sys
+from audioEngine import close_shared_engine, shared_engine
+from audioSink import SINKS, make_sink
+from synthProcess import close_shared_synth, shared_synth
+from inputHub import close_shared_input_hub, shared_input_hub
+from leapInput import LeapInput, ReplayLeapInput
 from gameScene import GameScene
+from SoundGenerator import PROCESS_GENERATORS, calibration_probe
+from config import Config
 import time
 import random
 
+FRAME_RATE = Config.FRAME_RATE
+
+def positive_float(text):
+    """argparse の type: 正の実数"""
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"正の値にしてください: {text}")
+    return value
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", help="トラッキングデータを記録するセッションのディレクトリ")
+    parser.add_argument("--replay", help="デバイスの代わりに再生するセッションのディレクトリ")
+    parser.add_argument("--speed", type=positive_float, default=1.0, help="再生速度の倍率")
+    parser.add_argument("--loop", action="store_true", help="セッションを繰り返し再生する")
+    parser.add_argument(
+        "--audio-stats",
+        type=float,
+        default=Config.AUDIO_STATS_INTERVAL,
+        help="音声の計測値を出力する間隔（秒, 0 なら出力しない）",
+    )
+    parser.add_argument(
+        "--audio-sink",
+        choices=["auto", *SINKS],
+        default=Config.AUDIO_SINK,
+        help="音声の出力先（null / capture は音声デバイスを使わない）",
+    )
+    parser.add_argument("--audio-capture", help="capture のとき出力した音声を保存するファイル（.wav / .npy）")
+    parser.add_argument(
+        "--synth-process",
+        action="store_true",
+        default=Config.AUDIO_SYNTH_PROCESS,
+        help="音の生成と出力を別のプロセスで行う（描画と GIL を取り合わない, ブロックサイズは固定）",
+    )
+    parser.add_argument(
+        "--fixed-block",
+        action="store_true",
+        default=not Config.AUDIO_ADAPTIVE_BLOCK,
+        help="ブロックサイズを調整せず AUDIO_BLOCK_SIZE のまま使う",
+    )
+    return parser.parse_args()
+
 def main():
-    leap_input = LeapInput()
+    args = parse_args()
+    Config.AUDIO_SYNTH_PROCESS = args.synth_process
+    # 音声デバイスは起動時に一度だけ開き、シーンやラウンドの間は開いたままにする
+    if args.audio_sink == "capture":
+        sink = make_sink("capture", path=args.audio_capture)
+    else:
+        sink = make_sink(args.audio_sink)
+    if args.synth_process:
+        # 生成も出力先のコールバックもワーカーのプロセスで動かし、ゲームのプロセスからは音を出さない.
+        # 出力先はワーカーが開く（capture のときはワーカーが閉じるときにファイルに書き込む）
+        shared_synth(
+            PROCESS_GENERATORS,
+            Config.AUDIO_BLOCK_SIZE,
+            Config.AUDIO_PROCESS_BLOCKS,
+            sink=sink,
+            stats_interval=args.audio_stats or None,
+        )
+    else:
+        if not args.fixed_block:
+            # 描画ループが GIL を握っていても、エンジンのスレッドがすぐに GIL を受け取れるようにする.
+            # 出力先のブロックの下限（切り替え間隔の BlockTuner.headroom 倍）もこの間隔で決まる
+            # （1 ms なら 128 サンプル以上）
+            sys.setswitchinterval(Config.AUDIO_SWITCH_INTERVAL)
+        # 起動時に代表的な生成の処理を計測してブロックサイズを選び、再生中も負荷に合わせて調整する
+        shared_engine(
+            block_size=Config.AUDIO_BLOCK_SIZE,
+            stats_interval=args.audio_stats or None,
+            sink=sink,
+            adaptive=not args.fixed_block,
+            block_sizes=Config.AUDIO_BLOCK_SIZES,
+            probe=None if args.fixed_block else calibration_probe(),
+        )
     game_scene = GameScene()
+    # デバイス（またはセッション）への接続はプロセス全体で1つにし、
+    # シーンの HandVisualizer には InputHub からフレームを配る
+    if args.replay:
+        hub = shared_input_hub(
+            lambda: ReplayLeapInput(args.replay, speed=args.speed, loop=args.loop)
+        )
+    else:
+        hub = shared_input_hub(
+            lambda: LeapInput(record_path=args.record, features=game_scene.required_features())
+        )
+    leap_input = hub.source
 
+    # デバイス（またはセッション）から最初のフレームが来るまで待つ.
+    # 待っている間もウィンドウのイベントは処理する
     while not game_scene.should_quit():
-        leap_data, is_changed = leap_input.get_hand_position()
-        if is_changed:
+        if leap_input.wait_for_frame(timeout=0.1, seq=0):
             game_scene.switch_scene("start")
             break
+        game_scene.handle_events()
 
+    # 新しいフレームが来たときと描画の締め切りが来たときだけ起きる
+    frame_interval = 1.0 / FRAME_RATE
+    next_render = time.perf_counter()
+    seq = 0
+    updated_since_render = False
     while not game_scene.should_quit():
-        leap_data, is_changed = leap_input.get_hand_position()
-        if not is_changed:
-            continue
-        
-        game_scene.update(leap_data)
+        timeout = max(0.0, next_render - time.perf_counter())
+        if leap_input.wait_for_frame(timeout=timeout, seq=seq):
+            seq = leap_input.seq
+            leap_data, _ = leap_input.get_hand_position()
+            game_scene.update(leap_data)
+            updated_since_render = True
+
+        now = time.perf_counter()
+        if now >= next_render:
+            if not updated_since_render:
+                # 手が見えない間は、同じフレームを渡し直さずにシーンの時間だけを進める
+                game_scene.tick()
+            game_scene.render()
+            updated_since_render = False
+            next_render += frame_interval
+            if next_render < now:
+                next_render = now + frame_interval
 
     game_scene.cleanup()
+    close_shared_input_hub()
+    close_shared_engine()
+    close_shared_synth()
 
 if __name__ == "__main__":
     main()
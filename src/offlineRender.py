@@ -0,0 +1,201 @@
+# offlineRender.py
+"""
+パラメータの軌跡を音声デバイスを使わずに実時間より速く描画する
+
+    python src/offlineRender.py --gen SineGen --param frequency --sweep -o sweep.wav
+    python src/offlineRender.py --gen PulseGen --param dutycycle --session SESSION --mapping palm -o out.npy
+
+ContinuousSoundPlayer の prepare / update_params / _render をそのまま使い、
+再生時の AudioEngine と同じく MixBus を通して（最初のブロックのフェードインと
+[-1, 1] へのクリップも含めて）ブロックの先頭の時刻までに届いたパラメータで
+そのブロックを生成するので、同じブロックサイズで同じ時刻にパラメータを更新した場合の
+再生（音源がつながったブロック以降）とサンプル単位で一致する.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from audioEngine import MixBus
+from audioSink import save_wav
+from audioStats import AudioStats
+from config import Config
+from inputFilter import OneEuroFilter
+from SoundGenerator import ContinuousSoundPlayer, PulseGen, SineGen, SoundGen
+
+
+class Trajectory:
+    """
+    時刻ごとのパラメータの更新の列
+
+    Parameters
+    ----------
+    times : np.ndarray
+        更新の時刻（秒, 先頭からの経過時間, 昇順） (N,)
+    updates : list[dict[str, float]]
+        各時刻に update_params に渡すパラメータ (N,)
+    """
+
+    def __init__(self, times, updates: list[dict[str, float]]) -> None:
+        self.times = np.asarray(times, dtype=np.float64)
+        self.updates = list(updates)
+        if len(self.times) != len(self.updates):
+            raise ValueError("times と updates の長さが一致しません")
+        if np.any(np.diff(self.times) < 0):
+            raise ValueError("times は昇順である必要があります")
+
+    def __len__(self) -> int:
+        return len(self.updates)
+
+    def duration(self) -> float:
+        """最後の更新の時刻（秒）"""
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    @classmethod
+    def sweep(cls, param_name: str, steps: int = 101, interval: float = 0.05) -> "Trajectory":
+        """
+        SoundGenerator.py の __main__ と同じく、interval 秒ごとに 0 から 1 まで
+        steps 段階でパラメータを動かす軌跡
+        """
+        times = np.arange(steps) * interval
+        return cls(times, [{param_name: i / (steps - 1)} for i in range(steps)])
+
+    @classmethod
+    def from_session(
+        cls, session: "LeapSession", param_name: str, mapping: str, param_filter=None
+    ) -> "Trajectory":
+        """
+        記録済みセッションの手の動きから、GameScene と同じ写像とフィルタで求めた軌跡
+
+        Parameters
+        ----------
+        session : LeapSession
+            記録済みセッション
+        param_name : str
+            動かす音のパラメータの名前
+        mapping : str
+            手のデータ -> パラメータの写像の名前（featureMap）
+        param_filter : ParamFilter | None
+            パラメータに掛けるフィルタ
+        """
+        # featureMap は Leap の SDK を読み込むので、セッションを使うときだけ import する
+        from featureMap import get_mapping
+
+        frames = session.frames()
+        values = np.asarray(get_mapping(mapping)(frames), dtype=np.float64)
+        seconds = frames.timestamp / 1e6
+        if param_filter is not None:
+            values = param_filter.apply(values, seconds)
+        times = seconds - seconds[0] if len(seconds) else seconds
+        return cls(times, [{param_name: value} for value in values.tolist()])
+
+
+def render_offline(
+    sound_gen: SoundGen,
+    trajectory: Trajectory,
+    duration: float | None = None,
+    block_size: int = Config.AUDIO_BLOCK_SIZE,
+) -> np.ndarray:
+    """
+    軌跡に沿ってパラメータを更新しながら sound_gen の音を生成するメソッド
+
+    Parameters
+    ----------
+    sound_gen : SoundGen
+        音を生成する SoundGen
+    trajectory : Trajectory
+        パラメータの更新の列. 最初の更新を初期パラメータとして再生を始める
+    duration : float | None
+        生成する長さ（秒）. None のときは最後の更新の時刻まで
+    block_size : int
+        1回に生成するサンプル数（再生時の AudioEngine のブロックサイズ）
+
+    Returns
+    -------
+    np.ndarray
+        音声データ (float32)
+    """
+    if duration is None:
+        duration = trajectory.duration()
+    rate = sound_gen.rate
+    frames = int(math.ceil(duration * rate))
+    blocks = max(1, -(-frames // block_size))
+
+    player = ContinuousSoundPlayer(sound_gen, block_size=block_size)
+    player.prepare(trajectory.updates[0] if len(trajectory) else None)
+    # 再生時と同じ MixBus を通す（エンジンのバスとは別の、この生成専用のもの）
+    stats = AudioStats(rate)
+    bus = MixBus(stats)
+    bus.attach(player._source)
+
+    # 各ブロックの先頭の時刻までに届いている更新の数
+    block_times = np.arange(blocks) * (block_size / rate)
+    arrived = np.searchsorted(trajectory.times, block_times, side="right").tolist()
+
+    # 再生時と同じくブロック単位で生成し、最後に長さを切り詰める
+    samples = np.empty(blocks * block_size, dtype=np.float32)
+    applied = 0
+    for i in range(blocks):
+        for update in trajectory.updates[applied : arrived[i]]:
+            player.update_params(update)
+        applied = arrived[i]
+        bus.render(samples[i * block_size : (i + 1) * block_size])
+        if stats.errors:
+            # 再生時は無音にして外すが、ファイルに書き出すときは失敗として扱う
+            raise RuntimeError(f"音の生成に失敗しました: {stats.last_error}")
+    return samples[:frames]
+
+
+GENERATORS = {"SineGen": SineGen, "PulseGen": PulseGen}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gen", choices=list(GENERATORS), default="SineGen")
+    parser.add_argument("--param", default="frequency", help="動かす音のパラメータ")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--sweep", action="store_true", help="0 から 1 まで 50ms ごとに動かす")
+    source.add_argument("--session", help="記録済みセッションのディレクトリ")
+    parser.add_argument("--mapping", default="palm", help="セッションの手のデータに使う写像")
+    parser.add_argument("--filter", action="store_true", help="セッションの値に 1€ フィルタを掛ける")
+    parser.add_argument("--duration", type=float, help="生成する長さ（秒）")
+    parser.add_argument("--block", type=int, default=Config.AUDIO_BLOCK_SIZE)
+    parser.add_argument("-o", "--output", help=".wav または .npy")
+    args = parser.parse_args()
+
+    sound_gen = GENERATORS[args.gen]()
+    if args.param not in sound_gen.param_names:
+        parser.error(f"{args.gen} のパラメータは {sound_gen.param_names} のいずれかです")
+    if args.sweep:
+        trajectory = Trajectory.sweep(args.param)
+    else:
+        from leapSession import LeapSession
+
+        param_filter = None
+        if args.filter:
+            param_filter = OneEuroFilter(
+                min_cutoff=Config.FILTER_MIN_CUTOFF,
+                beta=Config.FILTER_BETA,
+                prediction=Config.FILTER_PREDICTION,
+            )
+        trajectory = Trajectory.from_session(
+            LeapSession(args.session), args.param, args.mapping, param_filter
+        )
+
+    start = time.perf_counter()
+    samples = render_offline(sound_gen, trajectory, args.duration, args.block)
+    elapsed = time.perf_counter() - start
+    seconds = len(samples) / sound_gen.rate
+    print(f"{seconds:.2f} s を {elapsed:.3f} s で生成しました（実時間の {seconds / elapsed:.1f} 倍）")
+
+    if args.output:
+        if args.output.endswith(".npy"):
+            np.save(args.output, samples)
+        else:
+            save_wav(args.output, samples, sound_gen.rate)
+        print(f"{args.output} に保存しました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+# oscillator.py
+import numpy as np
+
+TABLE_SIZE = 2048  # 1周期あたりのテーブルのサンプル数
+
+# 帯域制限の段階: 各段のテーブルに含める最大の倍音次数
+PULSE_HARMONICS = [2**i for i in range(10)]  # 1, 2, 4, ..., 512
+
+
+class Scratch:
+    """
+    名前ごとに作業用の配列を確保して使い回す入れ物
+
+    要求された大きさが確保済みの大きさ以下ならその先頭部分のビューを返すので、
+    最大のブロックで一度確保した後は新しい配列を確保しない.
+    同じ Scratch を複数のスレッドから同時に使ってはいけない.
+    """
+
+    def __init__(self) -> None:
+        self._arrays = {}  # 名前 -> 確保した配列
+        self._views = {}  # (名前, 形, dtype) -> 配列の先頭部分のビュー
+
+    def get(self, name: str, shape, dtype=np.float64) -> np.ndarray:
+        """name の作業用配列を shape の形で返す（中身は不定）"""
+        view = self._views.get((name, shape, dtype))
+        if view is None:
+            view = self._allocate(name, shape, dtype)
+        return view
+
+    def _allocate(self, name, shape, dtype):
+        key = (name, shape, dtype)
+        if isinstance(shape, int):
+            shape = (shape,)
+        array = self._arrays.get(name)
+        if array is None or array.dtype != dtype or array.ndim != len(shape):
+            array = np.empty(shape, dtype=dtype)
+        elif any(n > m for n, m in zip(shape, array.shape)):
+            # 足りない軸だけ大きくして確保し直す
+            array = np.empty(tuple(max(n, m) for n, m in zip(shape, array.shape)), dtype=dtype)
+        if array is not self._arrays.get(name):
+            # 古い配列のビューは捨てる
+            self._arrays[name] = array
+            self._views = {k: v for k, v in self._views.items() if k[0] != name}
+        view = array[tuple(slice(n) for n in shape)]
+        self._views[key] = view
+        return view
+
+
+class Wavetable:
+    """
+    1周期分の波形を保持し、位相（周期単位, 0~1）から線形補間で値を引くクラス
+
+    table は (..., TABLE_SIZE) の配列で、先頭の軸でテーブルを選べる
+    （帯域制限の段階やデューティ比ごとのテーブルなど）.
+
+    Parameters
+    ----------
+    table : np.ndarray
+        1周期分の波形 (..., TABLE_SIZE)
+    """
+
+    def __init__(self, table: np.ndarray) -> None:
+        table = np.asarray(table, dtype=np.float64)
+        self.size = table.shape[-1]
+        # 末尾に先頭の値を足して、補間で i + 1 を参照しても範囲外にならないようにする
+        self.table = np.concatenate([table, table[..., :1]], axis=-1)
+        # 隣の値との差分を先に計算しておく
+        self.slope = np.diff(self.table, axis=-1)
+        self.table = np.ascontiguousarray(self.table[..., :-1])
+
+    def lookup(
+        self,
+        phases: np.ndarray,
+        index=(),
+        rows: np.ndarray | None = None,
+        out: np.ndarray | None = None,
+        scratch: Scratch | None = None,
+    ) -> np.ndarray:
+        """
+        位相の配列に対応する波形の値を返すメソッド
+
+        out と scratch を渡すと、途中の配列も含めて新しい配列を確保しない.
+
+        Parameters
+        ----------
+        phases : np.ndarray
+            0 以上の位相（周期単位）. 整数部分は無視するので折り返さなくてよい
+        index : tuple | int
+            使うテーブルの番号（table の先頭の軸）
+        rows : np.ndarray | None
+            サンプルごとに変えるテーブルの番号（index で選んだ後の先頭の軸）
+        out : np.ndarray | None
+            結果を書き込む float64 の配列（phases と同じ形）
+        scratch : Scratch | None
+            途中の計算に使う作業用の配列
+
+        Returns
+        -------
+        np.ndarray
+            波形
+        """
+        if scratch is None:
+            scratch = Scratch()
+        shape = np.shape(phases)
+        position = scratch.get("lookup_position", shape)
+        np.multiply(phases, self.size, out=position)
+        offset = None
+        if rows is not None:
+            offset = scratch.get("lookup_offset", shape, np.intp)
+            np.multiply(rows, self.size, out=offset)
+        return self.lookup_positions(position, index, offset, out, scratch)
+
+    def lookup_positions(
+        self,
+        position: np.ndarray,
+        index=(),
+        offset: np.ndarray | None = None,
+        out: np.ndarray | None = None,
+        scratch: Scratch | None = None,
+    ) -> np.ndarray:
+        """
+        テーブルのサンプル単位の位置 (phases * size) から波形の値を引くメソッド（lookup の本体）
+
+        position は補間の重み（小数部分）に書き換える.
+
+        Parameters
+        ----------
+        position : np.ndarray
+            テーブル上の位置（float64, 負でもよい）
+        index : tuple | int
+            使うテーブルの番号（table の先頭の軸）
+        offset : np.ndarray | None
+            サンプルごとのテーブルの先頭位置 (np.intp). index で選んだ後の
+            テーブルを1次元に並べたときの位置（行番号 * size）
+        out : np.ndarray | None
+            結果を書き込む float64 の配列（position と同じ形）
+        scratch : Scratch | None
+            途中の計算に使う作業用の配列
+        """
+        if scratch is None:
+            scratch = Scratch()
+        shape = np.shape(position)
+        i = scratch.get("lookup_index", shape, np.intp)
+        whole = scratch.get("lookup_whole", shape)
+        # 整数部分と小数部分（補間の重み）に分ける. 整数と小数の混ざった演算は
+        # 内部で型変換用のバッファを確保するので、型変換は copyto だけで行う
+        np.floor(position, out=whole)
+        np.subtract(position, whole, out=position)
+        np.copyto(i, whole, casting="unsafe")
+        np.bitwise_and(i, self.size - 1, out=i)  # 1周期に折り返す（TABLE_SIZE は2のべき）
+        table = self.table[index]
+        slope = self.slope[index]
+        if offset is not None:
+            # (rows, TABLE_SIZE) を1次元として引く
+            np.add(i, offset, out=i)
+            table = table.reshape(-1)
+            slope = slope.reshape(-1)
+        if out is None:
+            out = np.empty(shape, dtype=np.float64)
+        # mode="raise" だと out を一時配列にコピーするので、範囲内と分かっている添字は clip で引く
+        base = scratch.get("lookup_base", shape)
+        slope.take(i, out=out, mode="clip")
+        np.multiply(out, position, out=out)
+        table.take(i, out=base, mode="clip")
+        np.add(out, base, out=out)
+        return out
+
+    def shaped(self, scale: float, offset: float) -> "Wavetable":
+        """offset + scale * 波形 のテーブル（線形補間の結果も同じ式になる）"""
+        shaped = Wavetable.__new__(Wavetable)
+        shaped.size = self.size
+        shaped.table = np.ascontiguousarray(self.table * scale + offset)
+        shaped.slope = self.slope * scale
+        return shaped
+
+
+def advance_phase(
+    phase: float,
+    freq: float,
+    frames: int,
+    rate: int,
+    end_freq: float | None = None,
+    out: np.ndarray | None = None,
+) -> tuple[np.ndarray, float]:
+    """
+    位相を frames サンプル分進めるメソッド
+
+    end_freq を指定すると、周波数をブロック内で freq から end_freq まで
+    サンプル単位で直線的に変化させ、その周波数を積分して位相を求める.
+    次のブロックは end_freq から始まるので、位相も周波数も途切れない.
+
+    Parameters
+    ----------
+    phase : float
+        現在の位相（周期単位, 0~1）
+    freq : float
+        ブロックの先頭の周波数 (Hz)
+    frames : int
+        サンプル数
+    rate : int
+        サンプリングレート
+    end_freq : float | None
+        次のブロックの先頭での周波数 (Hz). None のときは freq のまま
+    out : np.ndarray | None
+        各サンプルの位相を書き込む float64 の配列 (frames,)
+
+    Returns
+    -------
+    tuple[np.ndarray, float]
+        各サンプルの位相（折り返していない）と、次のブロックの先頭の位相（0~1）
+    """
+    if out is None:
+        out = np.empty(frames, dtype=np.float64)
+    increment = freq / rate
+    if end_freq is None or end_freq == freq:
+        np.multiply(_ramp(frames), increment, out=out)
+        out += phase
+        return out, (phase + increment * frames) % 1.0
+
+    # k サンプル目の位相 = phase + Σ_{j<k} (freq + Δ j / frames) / rate
+    #                    = phase + k (increment + slope (k - 1) / 2)
+    slope = (end_freq - freq) / rate / frames
+    np.multiply(_half_previous(frames), slope, out=out)
+    out += increment
+    out *= _ramp(frames)
+    out += phase
+    end_phase = phase + increment * frames + slope * frames * (frames - 1) / 2
+    return out, end_phase % 1.0
+
+
+def linear_ramp(start: float, end: float, frames: int, out: np.ndarray | None = None) -> np.ndarray:
+    """start から end に向かう長さ frames の直線（end は次のブロックの先頭の値）"""
+    if out is None:
+        out = np.empty(frames, dtype=np.float64)
+    np.multiply(_ramp(frames), (end - start) / frames, out=out)
+    out += start
+    return out
+
+
+_RAMP = np.arange(4096, dtype=np.float64)
+_HALF_PREVIOUS = (_RAMP - 1) / 2
+
+
+def _ramp(frames: int) -> np.ndarray:
+    # 0, 1, ..., frames - 1 を使い回す
+    global _RAMP, _HALF_PREVIOUS
+    if frames > len(_RAMP):
+        _RAMP = np.arange(frames, dtype=np.float64)
+        _HALF_PREVIOUS = (_RAMP - 1) / 2
+    return _RAMP[:frames]
+
+
+def _half_previous(frames: int) -> np.ndarray:
+    # (k - 1) / 2. k を掛けると 0 + 1 + ... + (k - 1) になる
+    _ramp(frames)
+    return _HALF_PREVIOUS[:frames]
+
+
+def _sine_table() -> np.ndarray:
+    return np.sin(2.0 * np.pi * np.arange(TABLE_SIZE) / TABLE_SIZE)
+
+
+def _saw_table(harmonics: int) -> np.ndarray:
+    """
+    ノコギリ波 (1 - 2t) を harmonics 次までのフーリエ級数で表した波形
+
+    x(t) = Σ 2 / (πk) sin(2πkt)
+    """
+    spectrum = np.zeros(TABLE_SIZE // 2 + 1, dtype=np.complex128)
+    k = np.arange(1, harmonics + 1)
+    spectrum[1 : harmonics + 1] = TABLE_SIZE / 2 * 2 / (np.pi * k) * -1j
+    return np.fft.irfft(spectrum, TABLE_SIZE)
+
+
+SINE = Wavetable(_sine_table())
+# (帯域制限の段階, TABLE_SIZE). パルス波は lookup_pulse で2本の差として引く
+SAW = Wavetable([_saw_table(harmonics) for harmonics in PULSE_HARMONICS])
+
+
+def pulse_level(freq: float, rate: int) -> int:
+    """
+    ナイキスト周波数を超える倍音を含まない中で、最も倍音の多い帯域制限の段階を返す
+    """
+    max_harmonic = max(1, int(rate / 2 / max(freq, 1.0)))
+    return min(max_harmonic.bit_length(), len(PULSE_HARMONICS)) - 1
+
+
+def lookup_pulse(
+    position: np.ndarray,
+    duty,
+    index=(),
+    out: np.ndarray | None = None,
+    scratch: Scratch | None = None,
+) -> np.ndarray:
+    """
+    帯域制限したパルス波の値を、位相をずらした2本のノコギリ波の差で引く
+
+    pulse(t; d) = saw(t) - saw(t - d) + (2d - 1) は先頭の d が 1、残りが -1 のパルス波で、
+    倍音ごとの係数もパルス波のフーリエ級数と一致する. デューティ比はテーブルに
+    丸めないので、サンプルごとに連続に変えられる.
+
+    Parameters
+    ----------
+    position : np.ndarray
+        テーブル上の位置（SAW.lookup_positions と同じ. 書き換えない）
+    duty : float | np.ndarray
+        デューティ比（配列のときは position と同じ形）
+    index : tuple | int
+        帯域制限の段階（SAW の先頭の軸）
+    out : np.ndarray | None
+        結果を書き込む float64 の配列（position と同じ形）
+    scratch : Scratch | None
+        途中の計算に使う作業用の配列
+    """
+    if scratch is None:
+        scratch = Scratch()
+    shape = np.shape(position)
+    if out is None:
+        out = np.empty(shape, dtype=np.float64)
+    # 2本の位置を先頭の軸に並べ、1回の lookup_positions で引く（ブロックが小さいときは
+    # 配列の長さより numpy の呼び出しの回数で時間が決まるので、呼び出しを半分にする）.
+    # 次元の数は position と同じにして、同じ名前の作業用配列を使い回せるようにする
+    n = shape[0]
+    pair = (2 * n,) + shape[1:]
+    positions = scratch.get("pulse_positions", pair)
+    np.copyto(positions[:n], position)
+    np.multiply(duty, -SAW.size, out=positions[n:])
+    positions[n:] += position
+    values = scratch.get("pulse_values", pair)
+    SAW.lookup_positions(positions, index, out=values, scratch=scratch)
+    delayed = values[n:]
+    np.subtract(values[:n], delayed, out=out)
+    if np.ndim(duty) == 0:
+        out += 2 * duty - 1
+    else:
+        np.multiply(duty, 2.0, out=delayed)
+        delayed -= 1.0
+        out += delayed
+    return out
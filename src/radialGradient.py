@@ -0,0 +1,143 @@
+# radialGradient.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from config import Config
+
+WIDTH = Config.WIDTH
+MAIN_HEIGHT = Config.MAIN_HEIGHT
+
+
+class RadialGradient:
+    """
+    PlayScene / PracticeScene の背景の円のぼかしを、1枚の半透明のサーフェスとして描くクラス
+
+    もとの描き方は、半径を小さくしながら不透明度を上げた白い円を steps 枚重ねる.
+    白を不透明度 a で重ねると背景の色 C は C + (255 - C) * a になるので、
+    中心からの距離が d の画素は、半径が d 以上の円の不透明度 a_i から
+    1 - Π(1 - a_i) の不透明度の白を1回重ねたのとほぼ同じ色になる.
+    この不透明度を numpy で画素ごとに求めて surfarray に書き込み、
+    level（類似度や強さ）を levels 段階に丸めた値ごとに LRU でサーフェスを保持する.
+
+    Parameters
+    ----------
+    size : tuple[int, int]
+        サーフェスの大きさ (幅, 高さ)
+    min_radius : float
+        最も内側の円の半径の最小値
+    radius_range : float
+        level が 1 から 0 になるまでに半径が広がる量
+    radius_t : float
+        最も外側の円と最も内側の円の半径の差
+    steps : int
+        重ねる円の数
+    levels : int
+        level を丸める段階の数
+    cache_size : int
+        保持するサーフェスの数
+    """
+
+    def __init__(
+        self,
+        size: tuple[int, int] = (WIDTH, MAIN_HEIGHT),
+        min_radius: float = min(WIDTH, MAIN_HEIGHT) * 0.01,
+        radius_range: float = min(WIDTH, MAIN_HEIGHT) * 0.3,
+        radius_t: float = max(WIDTH, MAIN_HEIGHT) * 0.3,
+        steps: int = 80,
+        levels: int = Config.GRADIENT_LEVELS,
+        cache_size: int = Config.GRADIENT_CACHE_SIZE,
+    ) -> None:
+        self.size = size
+        self.min_radius = min_radius
+        self.radius_range = radius_range
+        self.radius_t = radius_t
+        self.steps = steps
+        self.levels = levels
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()  # (丸めた level, 背景の色) -> サーフェス（末尾ほど最近使った）
+        self._lock = threading.Lock()
+
+        width, height = size
+        # 画素の中心から円の中心までの距離の2乗の4倍 (幅, 高さ). pygame.draw.circle の
+        # 塗りつぶしに合わせて画素の中心 (+0.5) で測り、整数のまま比べるために2倍の座標にする.
+        # surfarray と同じく x が先の添字
+        x = 2 * (np.arange(width, dtype=np.int64) - width // 2) + 1
+        y = 2 * (np.arange(height, dtype=np.int64) - height // 2) + 1
+        self._distance2 = x[:, None] ** 2 + y[None, :] ** 2
+        t = np.arange(steps) / steps
+        # 外側から i 枚目までの円を黒の上に重ねたときの値（0 枚目は 0）.
+        # pygame の blit と同じ整数の丸めで重ねるので、この値を不透明度にして1回重ねると
+        # 黒（と 255）の上ではもとの描き方と同じ色になる
+        coverage = [0]
+        for alpha in (255 * t**2).astype(np.int64).tolist():
+            coverage.append(coverage[-1] + (((255 - coverage[-1]) * alpha + 255) >> 8))
+        self._coverage = np.array(coverage, dtype=np.uint8)
+        self._offsets = (radius_t * (1 - t)).astype(np.float64)
+
+    def quantize(self, level: float) -> int:
+        return round(level * self.levels)
+
+    def surface(self, level: float, background=None) -> pygame.Surface:
+        """
+        level（類似度や強さ, 1 に近いほど円が小さい）のぼかしのサーフェスを返す
+
+        background を指定すると、その色で塗りつぶした上にぼかしを重ねた不透明なサーフェスを返す.
+        背景の塗りつぶしとぼかしの重ね合わせが1回の不透明な blit になる.
+        """
+        key = (self.quantize(level), background and tuple(background))
+        with self._lock:
+            surf = self._surfaces.get(key)
+            if surf is not None:
+                self._surfaces.move_to_end(key)
+                self.hits += 1
+                return surf
+            self.misses += 1
+        surf = self._render(key[0] / self.levels)
+        if background is not None:
+            layer = pygame.Surface(self.size)
+            if pygame.display.get_surface() is not None:
+                layer = layer.convert()  # 画面と同じ画素の形式にしておくと blit が速い
+            layer.fill(background)
+            layer.blit(surf, (0, 0))
+            surf = layer
+        with self._lock:
+            self._surfaces[key] = surf
+            while len(self._surfaces) > self.cache_size:
+                self._surfaces.popitem(last=False)
+        return surf
+
+    def draw(self, screen: pygame.Surface, level: float, pos: tuple[int, int] = (0, 0), background=None) -> None:
+        """screen にぼかしを重ねる（background を指定したときは背景ごと描く. どちらも1回の blit）"""
+        screen.blit(self.surface(level, background), pos)
+
+    def _render(self, level: float) -> pygame.Surface:
+        # 外側から i 枚目の円の半径（もとの描き方と同じく整数に切り捨てる）
+        radii = (self.min_radius + self.radius_range * (1 - level) + self._offsets).astype(np.int64)
+        # 半径は外側から小さくなるので、距離 d を覆う円の数は r_i >= d の数
+        ascending = (2 * radii[::-1]) ** 2
+        count = len(radii) - np.searchsorted(ascending, self._distance2, side="left")
+        surf = pygame.Surface(self.size, pygame.SRCALPHA)
+        surf.fill((255, 255, 255, 0))
+        pixels = pygame.surfarray.pixels_alpha(surf)
+        self._coverage.take(count, out=pixels)
+        del pixels  # サーフェスのロックを外す
+        return surf
+
+
+# PlayScene と PracticeScene で共有するぼかし（shared_gradient で作る）
+_shared_gradient = None
+_shared_lock = threading.Lock()
+
+
+def shared_gradient() -> RadialGradient:
+    """プロセス全体で1つの RadialGradient を返す"""
+    global _shared_gradient
+    with _shared_lock:
+        if _shared_gradient is None:
+            _shared_gradient = RadialGradient()
+        return _shared_gradient
@@ -13,3 +13,51 @@ class BaseScene(abc.ABC):
     @abc.abstractmethod
     def draw(self, screen):
         pass
+
+    def tick(self):
+        """
+        新しい手のフレームが来ないまま描画の締め切りが来たときに呼ばれ、シーンの時間だけを進める.
+        既定では何もしない
+        """
+        pass
+
+    def close(self):
+        """シーンを離れるときに GameScene から呼ばれる（購読の解除など）"""
+        pass
+
+    def regions(self, screen):
+        """
+        画面を分けた範囲ごとの (pygame.Rect, 内容を表す値, 描く関数) のリストを返す.
+        draw_dirty は内容を表す値が前回と変わった範囲だけを描き直す.
+        既定では画面全体を1つの範囲とし、毎回描き直す
+        """
+        return [(screen.get_rect(), object(), self.draw)]
+
+    def draw_dirty(self, screen, full=False):
+        """
+        前回から変わった範囲だけを描き、描き直した範囲 (pygame.Rect のリスト) を返す.
+        何も変わっていなければ空のリストを返す
+
+        Parameters
+        ----------
+        screen : pygame.Surface
+            描画先（前回このシーンが描いた内容が残っていること）
+        full : bool
+            True のとき全ての範囲を描き直す（シーンを切り替えた直後など）
+        """
+        previous = getattr(self, "_drawn", {})
+        drawn = {}
+        dirty = []
+        for rect, content, draw in self.regions(screen):
+            key = tuple(rect)
+            drawn[key] = content
+            if not full and key in previous and previous[key] == content:
+                continue
+            screen.set_clip(rect)
+            try:
+                draw(screen)
+            finally:
+                screen.set_clip(None)
+            dirty.append(rect)
+        self._drawn = drawn
+        return dirty
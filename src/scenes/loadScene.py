@@ -1,10 +1,11 @@
 # scenes/startScene.py
 import pygame
 from .baseScene import BaseScene
+from textCache import get_font
 
 class LoadScene(BaseScene):
     def __init__(self, switch_scene_callback):
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = get_font(None, 48)
         self.button_rect = pygame.Rect(300, 250, 200, 80)
         self.switch_scene = switch_scene_callback
 
@@ -14,6 +15,10 @@ class LoadScene(BaseScene):
     def update(self, hand_position):
         pass  # 特に処理なし
 
+    def regions(self, screen):
+        # 画面は変わらないので、シーンに入ったときに一度だけ描く
+        return [(screen.get_rect(), (), self.draw)]
+
     def draw(self, screen):
         screen.fill((255, 255, 255))
         text = self.font.render("Loading leapMotion...", True, (0, 0, 0))
@@ -3,8 +3,11 @@ import pygame
 import random
 import time
 from .baseScene import BaseScene
+from textCache import get_font
 import SoundGenerator
 from config import Config
+from radialGradient import shared_gradient
+from toneCache import quantize, shared_tone_cache
 from visualizer import HandVisualizer
 
 # 定数
@@ -17,21 +20,39 @@ REPEAT_COUNT = Config.REPEAT_COUNT
 THRESHOLD = Config.THRESHOLD
 BAR_HEIGHT = Config.BAR_HEIGHT
 MAIN_HEIGHT = Config.MAIN_HEIGHT
+BACKGROUND = (0, 0, 255)
+
+# 次のラウンドの (音源の名前, パラメータの名前, 正解の位置).
+# ラウンドの間に選んでおき、正解音を ToneCache に先読みしておく
+_next_round = None
+
+
+def _draw_round():
+    """ラウンドの音源・パラメータ・正解の位置を選び、正解音の先読みを頼む"""
+    sound_gen = SoundGenerator.RandomSoundGen()
+    # TODO: 理想的なパラメータがあれば, その範囲になるように調整する必要あり
+    # 正解の位置はキャッシュの刻みに丸めて、鳴らす音と判定の位置を一致させる
+    target_pos = quantize(random.uniform(0, 1))
+    if not Config.AUDIO_SYNTH_PROCESS:
+        # 別のプロセスで生成するときは、正解音もワーカーで生成するので先読みしない
+        shared_tone_cache().prefetch(type(sound_gen.sound_gen), sound_gen.param_name, target_pos)
+    return sound_gen.sound_name, sound_gen.param_name, target_pos
+
 
 class PlayScene(BaseScene):
     def __init__(self, switch_scene_callback, attr_using):
+        global _next_round
         self.switch_scene = switch_scene_callback
-        self.font = pygame.font.SysFont(None, 36)
+        self.font = get_font(None, 36)
         self.attr_using = attr_using
 
-        self.player = SoundGenerator.RandomSoundPlayer()
+        sound_name, param_name, self.target_pos = _next_round or _draw_round()
+        _next_round = _draw_round()
+        self.player = SoundGenerator.RandomSoundPlayer(sound_name, param_name)
         self.reset_game()
         self.visualizer = HandVisualizer()
 
     def reset_game(self):
-        # TODO: 理想的なパラメータがあれば, その範囲になるように調整する必要あり
-        self.target_pos = random.uniform(0, 1)
-
         self.check_times = 0
         self.last_check = time.time()
         self.hand_position = 0
@@ -42,7 +63,8 @@ class PlayScene(BaseScene):
 
         self.remaining_time = CHECK_INTERVAL
 
-        self.player.start(self.target_pos)
+        # 正解音はキャッシュから引いて繰り返し再生する（生成は先読みで済ませてある）
+        self.player.play_target(self.target_pos)
     
     def _calculate_similarity(self, hand_pos, target_pos):
         """
@@ -69,11 +91,21 @@ class PlayScene(BaseScene):
             denominator = 1 - (target_pos + THRESHOLD)
         return 1 - diff / denominator
 
+    def close(self):
+        self.visualizer.close()
+
     def handle_event(self, event):
         if event.type == pygame.QUIT:
             pygame.event.post(event)
 
     def update(self, hand_position):
+        if self.state == "playing":
+            self.hand_position = min(max(hand_position, 0), 1)
+            self.player.update_param(self.hand_position)
+        self.tick()
+
+    def tick(self):
+        # 状態の時間による遷移（手のフレームが来ていなくても進める）
         now = time.time()
 
         if self.state == "listening":
@@ -81,12 +113,9 @@ class PlayScene(BaseScene):
             if now - self.listen_start_time >= 3.0:
                 self.state = "playing"
                 self.last_check = now
-                self.player.update_param(self.target_pos)  # 最初は0.0で始める（updateで更新される）
+                self.player.start(self.target_pos)  # 正解の位置から手で動かす音を始める（updateで更新される）
 
         elif self.state == "playing":
-            self.hand_position = min(max(hand_position, 0), 1)
-            self.player.update_param(self.hand_position)
-
             if now - self.last_check >= CHECK_INTERVAL:
                 self.state = "waiting"
                 self.wait_start_time = now
@@ -96,7 +125,6 @@ class PlayScene(BaseScene):
 
             self.remaining_time = max(0.0, CHECK_INTERVAL - (now - self.last_check))
 
-
         elif self.state == "waiting":
             elapsed = now - self.wait_start_time
             if elapsed >= WAIT_TIME:
@@ -120,27 +148,12 @@ class PlayScene(BaseScene):
                 self.switch_scene("start")
 
     def draw_circle(self, screen, similarity):
-        min_radius = min(WIDTH, MAIN_HEIGHT)  * 0.01
-        radius_similarity = min(WIDTH, MAIN_HEIGHT) * 0.3
-        radius_t = max(WIDTH, MAIN_HEIGHT)*0.3
-        steps = 80  # より滑らかに
-
-        for i in range(steps):
-            t = i / steps
-            radius = int(min_radius + radius_similarity * (1- similarity) + radius_t * (1 - t))  # 中央が濃くなるように調整
-
-            # alpha を外側が強くなるように調整（指数カーブ）
-            alpha = int(255 * t**2)  # 外が濃くなる
-            color = (255, 255, 255, alpha)
-
-            surf = pygame.Surface((WIDTH, MAIN_HEIGHT), pygame.SRCALPHA)
-            pygame.draw.circle(surf, color, (WIDTH // 2, MAIN_HEIGHT // 2), radius)
-            screen.blit(surf, (0, 0))
+        # 背景の塗りつぶしと 80 枚の円を重ねたぼかしを、類似度ごとにキャッシュした1枚のサーフェスで描く
+        shared_gradient().draw(screen, similarity, background=BACKGROUND)
 
     def draw_percentage(self, screen, similarity):
         # 中央にパーセンテージ表示
-        font = pygame.font.SysFont(None, 100)
-        text = font.render(f"{int(similarity * 100)}%", True, (0, 0, 0))
+        text = get_font(None, 100).render(f"{int(similarity * 100)}%", True, (0, 0, 0))
         text_rect = text.get_rect(center=(WIDTH // 2, MAIN_HEIGHT // 2))
         screen.blit(text, text_rect)
 
@@ -159,11 +172,43 @@ class PlayScene(BaseScene):
         text_rect = text_surf.get_rect(center=(WIDTH // 2, HEIGHT - BAR_HEIGHT // 2))
         screen.blit(text_surf, text_rect)
 
+    def _similarity(self):
+        hand_pos = self.frozen_hand_pos if self.state in ["waiting", "done"] else self.hand_position
+        return self._calculate_similarity(hand_pos, self.target_pos)
+
+    def _below_text(self):
+        # 下のバーに出す文字列（バーは不透明なので、後から描く方だけが見える）
+        if self.result == "success":
+            return "Success! Returning to Start Scene..."
+        if self.result == "fail":
+            return "Failed. Returning to Start Scene..."
+        if self.state == "waiting":
+            return "Target Sound"
+        if self.state == "playing":
+            return f"Next check in: {self.remaining_time:.1f}s"
+        if self.state == "listening":
+            return "Listening to Target Sound..."
+        return None
+
+    def regions(self, screen):
+        # メインの範囲は類似度（ぼかしの段階）・表示する文字列・手のフレームが変わったときだけ描き直す
+        similarity = self._similarity()
+        main = (
+            shared_gradient().quantize(similarity),
+            int(similarity * 100) if self.state == "waiting" else None,
+            f"{self.target_pos:.2f} {self.hand_position:.2f} {self.check_times}",
+            self.visualizer.seq,
+        )
+        return [
+            (pygame.Rect(0, 0, WIDTH, MAIN_HEIGHT), main, self.draw),
+            (pygame.Rect(0, MAIN_HEIGHT, WIDTH, HEIGHT - MAIN_HEIGHT), self._below_text(), self.draw),
+        ]
+
     def draw(self, screen):
-        screen.fill((0, 0, 255, 30))
+        # メインの範囲は draw_circle が背景ごと描くので、その下だけを塗りつぶす
+        screen.fill(BACKGROUND, (0, MAIN_HEIGHT, WIDTH, HEIGHT - MAIN_HEIGHT))
 
-        hand_pos = self.frozen_hand_pos if self.state in ["waiting", "done"] else self.hand_position
-        similarity = self._calculate_similarity(hand_pos, self.target_pos)
+        similarity = self._similarity()
 
         self.draw_circle(screen, similarity)
         self.draw_current_status(screen)
@@ -171,16 +216,8 @@ class PlayScene(BaseScene):
         self.visualizer.draw_hand(screen)
 
         if self.state == "waiting":
-            label = "Target Sound"
             self.draw_percentage(screen, similarity)
-            self.draw_below_text(screen, label)
 
-        if self.state == "playing":
-            countdown_text = f"Next check in: {self.remaining_time:.1f}s"
-            self.draw_below_text(screen, countdown_text)
-        if self.state == "listening":
-            self.draw_below_text(screen, "Listening to Target Sound...")
-        if self.result == "success":
-            self.draw_below_text(screen, "Success! Returning to Start Scene...")
-        elif self.result == "fail":
-            self.draw_below_text(screen, "Failed. Returning to Start Scene...")
+        text = self._below_text()
+        if text is not None:
+            self.draw_below_text(screen, text)
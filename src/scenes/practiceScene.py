@@ -1,7 +1,9 @@
 import pygame
 from .baseScene import BaseScene
+from textCache import get_font
 import SoundGenerator
 from config import Config
+from radialGradient import shared_gradient
 from visualizer import HandVisualizer
 
 WIDTH = Config.WIDTH
@@ -12,7 +14,7 @@ BAR_HEIGHT = Config.BAR_HEIGHT
 class PracticeScene(BaseScene):
     def __init__(self, switch_scene_callback, attr_using):
         self.switch_scene = switch_scene_callback
-        self.font = pygame.font.SysFont(None, 36)
+        self.font = get_font(None, 36)
         self.attr_using = attr_using
 
         self.hand_position = 0
@@ -21,6 +23,9 @@ class PracticeScene(BaseScene):
 
         self.player.start(0.5)  # 初期音
 
+    def close(self):
+        self.visualizer.close()
+
     def handle_event(self, event):
         if event.type == pygame.QUIT:
             pygame.event.post(event)
@@ -34,23 +39,25 @@ class PracticeScene(BaseScene):
         self.player.update_param(self.hand_position)
 
     def draw_circle_blur(self, screen, intensity):
-        min_radius = min(WIDTH, MAIN_HEIGHT) * 0.01
-        radius_range = min(WIDTH, MAIN_HEIGHT) * 0.3
-        radius_t = max(WIDTH, MAIN_HEIGHT) * 0.3
-        steps = 80
-
-        for i in range(steps):
-            t = i / steps
-            radius = int(min_radius + radius_range * (1 - intensity) + radius_t * (1 - t))
-            alpha = int(255 * t**2)
-            color = (255, 255, 255, alpha)
+        # PlayScene と同じぼかしを、黒の背景ごと強さごとにキャッシュした1枚のサーフェスで描く
+        shared_gradient().draw(screen, intensity, background=(0, 0, 0))
 
-            surf = pygame.Surface((WIDTH, MAIN_HEIGHT), pygame.SRCALPHA)
-            pygame.draw.circle(surf, color, (WIDTH // 2, MAIN_HEIGHT // 2), radius)
-            screen.blit(surf, (0, 0))
+    def regions(self, screen):
+        # メインの範囲は強さ（ぼかしの段階）・表示する値・手のフレームが変わったときだけ描き直す.
+        # 下のバーは変わらないので、シーンに入ったときに一度だけ描く
+        main = (
+            shared_gradient().quantize(self.hand_position),
+            f"{self.hand_position:.2f}",
+            self.visualizer.seq,
+        )
+        return [
+            (pygame.Rect(0, 0, WIDTH, MAIN_HEIGHT), main, self.draw),
+            (pygame.Rect(0, MAIN_HEIGHT, WIDTH, HEIGHT - MAIN_HEIGHT), (), self.draw),
+        ]
 
     def draw(self, screen):
-        screen.fill((0, 0, 0))
+        # メインの範囲はブラー背景が背景ごと描くので、その下だけを塗りつぶす
+        screen.fill((0, 0, 0), (0, MAIN_HEIGHT, WIDTH, HEIGHT - MAIN_HEIGHT))
 
         # ブラー背景描画（手の位置に応じた強度）
         self.draw_circle_blur(screen, self.hand_position)
@@ -0,0 +1,372 @@
+# synthProcess.py
+import multiprocessing
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from audioEngine import AudioEngine
+from config import Config
+
+# スロットの制御ブロック (int64) の添字
+_SEQ = 0  # パラメータの書き込み中は奇数になるカウンタ（seqlock）
+_GENERATION = 1  # start ごとに増やす番号（ゲーム側が書く）
+_ACKED = 2  # ワーカーが鳴らし始めた番号（ワーカーが書く）
+_KIND = 3  # 生成する SoundGen の種類（kinds の添字）
+_ACTIVE = 4  # 1 のときワーカーが鳴らす
+_HEADER = 5
+
+MAX_PARAMS = 8  # 1つのスロットで送れるパラメータの数
+_READ_RETRIES = 64  # パラメータを読み直す回数の上限
+_READ_BACKOFF = 0.0001  # 読み直すまで待つ秒数
+
+# 全体の制御ブロックの添字（_QUIT 以外はワーカーが書く）
+_QUIT = 0
+_READY = 1  # 1 のときワーカーが出力先を開き終えている
+_UNDERRUNS = 2  # ワーカーのエンジンのアンダーランの回数
+_XRUNS = 3  # ワーカーの出力先が報告したアンダーフローの回数
+_LATENCY = 4  # ワーカーのエンジンの出力の遅延（マイクロ秒）
+
+
+class SynthSlot:
+    """
+    1つの音源の制御ブロックとパラメータをまとめた共有メモリ上の領域
+
+    パラメータはゲーム側だけが seqlock で書き込み、ワーカーは書き込み中でない
+    ときの値を読むまで読み直すので、どちらもロックで待たない.
+    """
+
+    def __init__(self, header: np.ndarray, params: np.ndarray) -> None:
+        self.header = header
+        self.params = params
+
+    def write_params(self, values) -> None:
+        """パラメータの値を書き込む（ゲーム側）"""
+        self.header[_SEQ] += 1
+        self.params[: len(values)] = values
+        self.header[_SEQ] += 1
+
+    def read_params(self, out: np.ndarray, retries: int = _READ_RETRIES) -> bool:
+        """
+        書き込み途中でないパラメータの値を out に読み込む（ワーカー側）
+
+        書き込み中なら CPU を譲ってから読み直す. retries 回読み直しても読めなければ
+        （ゲーム側が書き込みの途中で止まったときなど）False を返す. そのときの out の値は
+        使わないこと.
+        """
+        for attempt in range(retries):
+            seq = int(self.header[_SEQ])
+            if not seq & 1:
+                np.copyto(out, self.params[: len(out)])
+                if int(self.header[_SEQ]) == seq:
+                    return True
+            # 最初の数回は他のスレッドに譲るだけにし、それでも書き込み中なら少し待つ
+            time.sleep(0.0 if attempt < 4 else _READ_BACKOFF)
+        return False
+
+
+def _layout() -> tuple[int, int]:
+    # 全体の制御ブロック (int64 x 8) と、スロットごとの制御ブロック・パラメータ
+    return 8 * 8, _HEADER * 8 + MAX_PARAMS * 8
+
+
+def _map_slots(buf, slots: int) -> tuple[np.ndarray, list[SynthSlot]]:
+    head_bytes, slot_bytes = _layout()
+    control = np.ndarray(8, dtype=np.int64, buffer=buf)
+    mapped = []
+    for i in range(slots):
+        offset = head_bytes + i * slot_bytes
+        header = np.ndarray(_HEADER, dtype=np.int64, buffer=buf, offset=offset)
+        offset += _HEADER * 8
+        params = np.ndarray(MAX_PARAMS, dtype=np.float64, buffer=buf, offset=offset)
+        mapped.append(SynthSlot(header, params))
+    return control, mapped
+
+
+class _SlotSource:
+    """
+    ワーカーのエンジンの MixBus につなぐ、1つのスロットの音源
+
+    ブロックごとにその時点のパラメータを読んで生成する. スロットが次の音に使われたら
+    （フェードアウトしている間）パラメータを読まず、前の値のまま生成する.
+    """
+
+    def __init__(self, slot: SynthSlot, sound_gen, generation: int, values: np.ndarray) -> None:
+        self.slot = slot
+        self.sound_gen = sound_gen
+        self.generation = generation
+        self.values = values
+        self.params = dict(zip(sound_gen.param_names, values.tolist()))
+        sound_gen.reset_phase(self.params)
+
+    def __call__(self, out: np.ndarray) -> None:
+        # 読めなかったブロックは前のパラメータのまま生成する
+        if self.slot.header[_GENERATION] == self.generation and self.slot.read_params(self.values):
+            params = self.params
+            for key, value in zip(self.sound_gen.param_names, self.values.tolist()):
+                params[key] = value
+        self.sound_gen.render(out, self.params)
+
+
+def _worker_main(
+    name: str,
+    slots: int,
+    block_size: int,
+    queue_blocks: int,
+    kinds: tuple,
+    sink,
+    stats_interval: float | None,
+) -> None:
+    """
+    別のプロセスで音を生成して出力するループ
+
+    出力先（音声デバイス）はこのプロセスで開き、スロットの音はこのプロセスの AudioEngine の
+    MixBus で生成してそのまま出力する. ゲームのプロセスは共有メモリにパラメータを書くだけなので、
+    pygame の描画ループが GIL を握り続けても、生成にも出力先のコールバックにも影響しない.
+    このループはスロットの開始・停止に合わせて音源をつなぎ替え、計測値を制御ブロックに書く.
+    """
+    # このプロセスには音声のスレッドしかないので、出力先のコールバックがすぐ GIL を受け取れるようにする
+    sys.setswitchinterval(Config.AUDIO_SWITCH_INTERVAL)
+    shm = shared_memory.SharedMemory(name=name)
+    engine = None
+    try:
+        control, mapped = _map_slots(shm.buf, slots)
+        parent = multiprocessing.parent_process()
+        engine = AudioEngine(
+            rate=kinds[0]().rate,
+            block_size=block_size,
+            queue_blocks=queue_blocks,
+            sink=sink,
+            stats_interval=stats_interval,
+        )
+        engine.start()
+        control[_READY] = 1
+        sources = [None] * slots  # スロットごとに MixBus につないでいる音源
+        idle = block_size / engine.rate / 4
+        last_check = time.perf_counter()
+        while not control[_QUIT]:
+            for i, slot in enumerate(mapped):
+                header = slot.header
+                generation = int(header[_GENERATION])
+                if header[_ACTIVE] and generation != header[_ACKED]:
+                    # 新しい音: 初期パラメータで位相をリセットした音源をフェードインでつなぐ
+                    sound_gen = kinds[int(header[_KIND])]()
+                    sound_gen.buffer_size = block_size
+                    values = np.zeros(len(sound_gen.param_names), dtype=np.float64)
+                    if not slot.read_params(values):
+                        continue  # 次の周回で読み直す
+                    if sources[i] is not None:
+                        engine.bus.detach(sources[i])
+                    sources[i] = _SlotSource(slot, sound_gen, generation, values)
+                    engine.bus.attach(sources[i])
+                    header[_ACKED] = generation
+                elif not header[_ACTIVE] and sources[i] is not None:
+                    # 止めた音は次のブロックでフェードアウトして外れる
+                    engine.bus.detach(sources[i])
+                    sources[i] = None
+            control[_UNDERRUNS] = engine.stats.underruns
+            control[_XRUNS] = engine.stats.xruns
+            control[_LATENCY] = int(engine.output_latency() * 1e6)
+            now = time.perf_counter()
+            if now - last_check > 0.1:
+                # ゲームのプロセスが落ちたら一緒に終わる
+                if parent is not None and not parent.is_alive():
+                    break
+                last_check = now
+            time.sleep(idle)
+    finally:
+        if engine is not None:
+            engine.stop()
+        del control, mapped
+        shm.close()
+
+
+class SynthServer:
+    """
+    SoundGen の生成と音声の出力を別のプロセスで行うサーバー
+
+    ゲーム側は SynthSlot にパラメータを書き込むだけで、生成も出力先（音声デバイス）の
+    コールバックもワーカーのプロセスで動く. 音声の経路にゲームのプロセスの Python が
+    入らないので、pygame の描画ループと GIL を取り合わない.
+
+    Parameters
+    ----------
+    kinds : tuple[type, ...]
+        生成できる SoundGen のクラス（引数なしで作れること）
+    block_size : int
+        ワーカーのエンジンが1回に生成・出力するサンプル数
+    queue_blocks : int
+        ワーカーのエンジンのキューに先行して貯めるブロック数
+    slots : int
+        同時に鳴らせる音源の数
+    sink : AudioSink | str | None
+        ワーカーのエンジンの出力先（AudioEngine と同じ）. ワーカーには複製が渡るので、
+        CaptureSink の音は samples() ではなく path のファイルで受け取る
+    stats_interval : float | None
+        指定すると、ワーカーのエンジンの計測値をこの間隔（秒）で出力する
+    """
+
+    def __init__(
+        self,
+        kinds: tuple,
+        block_size: int = 256,
+        queue_blocks: int = 4,
+        slots: int = 4,
+        sink=None,
+        stats_interval: float | None = None,
+    ) -> None:
+        self.kinds = tuple(kinds)
+        self.block_size = block_size
+        head_bytes, slot_bytes = _layout()
+        self._shm = shared_memory.SharedMemory(create=True, size=head_bytes + slots * slot_bytes)
+        self._control, self.slots = _map_slots(self._shm.buf, slots)
+        self._control[:] = 0
+        for slot in self.slots:
+            slot.header[:] = 0
+            slot.header[_ACKED] = -1
+        self._free = list(range(slots))
+        self._lock = threading.Lock()
+        # fork すると描画スレッドなどの状態まで複製されるので spawn で起動する
+        context = multiprocessing.get_context("spawn")
+        self._process = context.Process(
+            target=_worker_main,
+            args=(self._shm.name, slots, block_size, queue_blocks, self.kinds, sink, stats_interval),
+            daemon=True,
+        )
+        self._process.start()
+
+    @property
+    def ready(self) -> bool:
+        """ワーカーが出力先を開き終えたか"""
+        return bool(self._control[_READY])
+
+    @property
+    def underruns(self) -> int:
+        """ワーカーのエンジンのキューが空で無音を出力した回数"""
+        return int(self._control[_UNDERRUNS])
+
+    @property
+    def xruns(self) -> int:
+        """ワーカーの出力先（PortAudio）が報告したアンダーフローの回数"""
+        return int(self._control[_XRUNS])
+
+    def output_latency(self) -> float:
+        """ワーカーのエンジンの出力の遅延（秒）"""
+        return int(self._control[_LATENCY]) / 1e6
+
+    def acquire(self) -> int:
+        """空いているスロットの番号を返す"""
+        with self._lock:
+            if not self._free:
+                raise RuntimeError("空いている音源のスロットがありません")
+            return self._free.pop(0)
+
+    def release(self, index: int) -> None:
+        """スロットを止めて返す"""
+        self.slots[index].header[_ACTIVE] = 0
+        with self._lock:
+            self._free.append(index)
+
+    def is_alive(self) -> bool:
+        return self._process.is_alive()
+
+    def close(self) -> None:
+        """ワーカーを止めて（出力先を閉じて）共有メモリを解放する"""
+        self._control[_QUIT] = 1
+        self._process.join(timeout=5.0)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        del self._control, self.slots
+        self._shm.close()
+        self._shm.unlink()
+
+
+class ProcessVoice:
+    """
+    SynthServer の1つのスロットを使って音を鳴らすための、ゲーム側の窓口
+
+    start ごとに番号 (generation) を増やすと、ワーカーは初期パラメータで新しい音を
+    フェードインで鳴らし始める. stop するとワーカーがフェードアウトして止める.
+    """
+
+    def __init__(self, server: SynthServer, kind: int, param_names: list[str]) -> None:
+        if len(param_names) > MAX_PARAMS:
+            raise ValueError(f"パラメータが多すぎます: {len(param_names)} > {MAX_PARAMS}")
+        self.server = server
+        self.index = server.acquire()
+        self.slot = server.slots[self.index]
+        self.kind = kind
+        self.param_names = list(param_names)
+        self._generation = 0
+
+    def start(self, params: dict[str, float]) -> None:
+        """params を初期パラメータとして新しい音を始める"""
+        header = self.slot.header
+        header[_ACTIVE] = 0
+        self.set_params(params)
+        header[_KIND] = self.kind
+        self._generation = int(header[_GENERATION]) + 1
+        header[_GENERATION] = self._generation
+        header[_ACTIVE] = 1
+
+    def set_params(self, params: dict[str, float]) -> None:
+        """パラメータの値をワーカーに送る"""
+        self.slot.write_params([params[name] for name in self.param_names])
+
+    @property
+    def playing(self) -> bool:
+        """ワーカーがこの音を鳴らし始めたか"""
+        return bool(self.slot.header[_ACTIVE]) and self.slot.header[_ACKED] == self._generation
+
+    def stop(self) -> None:
+        self.slot.header[_ACTIVE] = 0
+
+    def close(self) -> None:
+        """スロットをサーバーに返す（以後この窓口は使えない）"""
+        self.server.release(self.index)
+
+
+# プロセス全体で共有するサーバー（shared_synth で作る）
+_shared_server = None
+_shared_lock = threading.Lock()
+
+
+def shared_synth(
+    kinds: tuple,
+    block_size: int = 256,
+    queue_blocks: int = 4,
+    sink=None,
+    stats_interval: float | None = None,
+) -> SynthServer:
+    """
+    プロセス全体で1つの SynthServer を返す（最初の呼び出しでワーカーを起動する）
+
+    2回目以降の呼び出しでは引数は使わず、最初に起動したサーバーを返す.
+    """
+    global _shared_server
+    with _shared_lock:
+        if _shared_server is not None and not _shared_server.is_alive():
+            # ワーカーが落ちていたら起動し直す
+            _shared_server.close()
+            _shared_server = None
+        if _shared_server is None:
+            _shared_server = SynthServer(
+                kinds,
+                block_size=block_size,
+                queue_blocks=queue_blocks,
+                sink=sink,
+                stats_interval=stats_interval,
+            )
+        return _shared_server
+
+
+def close_shared_synth() -> None:
+    """共有のサーバーのワーカーを止める（終了時に呼ぶ）"""
+    global _shared_server
+    with _shared_lock:
+        if _shared_server is not None:
+            _shared_server.close()
+            _shared_server = None
@@ -0,0 +1,116 @@
+# textCache.py
+import threading
+from collections import OrderedDict
+
+import pygame
+
+from config import Config
+
+
+class TextCache:
+    """
+    描画した文字列のサーフェスを保持するキャッシュ
+
+    キーは (フォント名, 大きさ, 文字列, アンチエイリアス, 文字の色, 背景の色). サーフェスの
+    画素の合計が budget バイトを超えたら最も長く使っていないものから捨てる (LRU).
+    返すサーフェスは共有なので、呼び出し側は blit するだけで書き換えないこと.
+
+    Parameters
+    ----------
+    budget : int
+        保持するサーフェスの画素の合計の上限（バイト）
+    """
+
+    def __init__(self, budget: int = Config.TEXT_CACHE_BYTES) -> None:
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()  # キー -> サーフェス（末尾ほど最近使った）
+        self._lock = threading.Lock()
+
+    def render(self, font: "CachedFont", text: str, antialias: bool, color, background=None) -> pygame.Surface:
+        """font で text を描画したサーフェスを返す（同じ引数なら前回のサーフェスを返す）"""
+        key = (font.name, font.size, text, antialias, tuple(color), background and tuple(background))
+        with self._lock:
+            surf = self._surfaces.get(key)
+            if surf is not None:
+                self._surfaces.move_to_end(key)
+                self.hits += 1
+                return surf
+            self.misses += 1
+        surf = font.font.render(text, antialias, color, background)
+        size = surf.get_bytesize() * surf.get_width() * surf.get_height()
+        with self._lock:
+            if key not in self._surfaces and size <= self.budget:
+                while self._surfaces and self.nbytes + size > self.budget:
+                    _, evicted = self._surfaces.popitem(last=False)
+                    self.nbytes -= evicted.get_bytesize() * evicted.get_width() * evicted.get_height()
+                self._surfaces[key] = surf
+                self.nbytes += size
+        return surf
+
+    def clear(self) -> None:
+        with self._lock:
+            self._surfaces.clear()
+            self.nbytes = 0
+
+
+class CachedFont:
+    """
+    pygame.font.Font と同じ形の render で、描画した文字列を TextCache から返すフォント
+
+    Parameters
+    ----------
+    name : str | None
+        SysFont に渡すフォント名（None は pygame の既定のフォント）
+    size : int
+        文字の大きさ
+    cache : TextCache
+        描画した文字列を保持するキャッシュ
+    """
+
+    def __init__(self, name: str | None, size: int, cache: TextCache) -> None:
+        self.name = name
+        self.size = size
+        self.font = pygame.font.SysFont(name, size)
+        self.cache = cache
+
+    def render(self, text: str, antialias: bool, color, background=None) -> pygame.Surface:
+        return self.cache.render(self, text, antialias, color, background)
+
+
+# プロセス全体で共有するキャッシュとフォント（get_font で作る）
+_text_cache = None
+_fonts = {}  # (フォント名, 大きさ) -> CachedFont
+_shared_lock = threading.Lock()
+
+
+def shared_text_cache() -> TextCache:
+    """プロセス全体で1つの TextCache を返す"""
+    global _text_cache
+    with _shared_lock:
+        if _text_cache is None:
+            _text_cache = TextCache()
+        return _text_cache
+
+
+def get_font(name: str | None = None, size: int = 36) -> CachedFont:
+    """
+    フォントを返す. 同じ (name, size) のフォントは最初の呼び出しで一度だけ読み込み、
+    シーンをまたいで使い回す
+    """
+    cache = shared_text_cache()
+    with _shared_lock:
+        font = _fonts.get((name, size))
+        if font is None:
+            font = _fonts[(name, size)] = CachedFont(name, size, cache)
+        return font
+
+
+def clear_fonts() -> None:
+    """フォントとキャッシュを捨てる（pygame.quit の前に呼ぶ）"""
+    global _text_cache
+    with _shared_lock:
+        _fonts.clear()
+        _text_cache = None
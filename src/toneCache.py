@@ -0,0 +1,249 @@
+# toneCache.py
+import queue
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import Config
+
+
+def quantize(value: float, steps: int = Config.TONE_CACHE_STEPS) -> float:
+    """パラメータの値 (0.0~1.0) を 1 / steps 刻みに丸める（ToneCache のキーと同じ刻み）"""
+    return round(min(max(value, 0.0), 1.0) * steps) / steps
+
+
+def render_loop(
+    gen_class: type,
+    params: dict[str, float],
+    seconds: float = Config.TONE_LOOP_SECONDS,
+    crossfade: float = Config.TONE_LOOP_CROSSFADE,
+    chunk: int = 2048,
+) -> np.ndarray:
+    """
+    パラメータを固定した SoundGen の音を、継ぎ目なく繰り返せる長さで生成する
+
+    長さは搬送波の周期の整数倍に丸め、末尾の続き crossfade 秒を先頭に
+    クロスフェードで重ねるので、最後のサンプルから先頭に戻っても波形がつながる
+    （AM の周期のずれはクロスフェードでならす）.
+
+    Parameters
+    ----------
+    gen_class : type[SoundGen]
+        生成する SoundGen のクラス
+    params : dict[str, float]
+        固定するパラメータ
+    seconds : float
+        おおよその長さ（秒）
+    crossfade : float
+        継ぎ目のクロスフェードの長さ（秒）
+    chunk : int
+        1回に生成するサンプル数（描画スレッドが GIL を長く待たないように分けて生成する）
+
+    Returns
+    -------
+    np.ndarray
+        繰り返し再生する float32 の音声データ
+    """
+    sound_gen = gen_class()
+    sound_gen.reset_phase(params)
+    params = dict(sound_gen.params)
+    rate = sound_gen.rate
+    frequency = sound_gen.carrier_frequency()
+    cycles = max(1, round(seconds * frequency))
+    length = round(cycles * rate / frequency)
+    fade = min(int(crossfade * rate), length)
+
+    buffer = np.empty(length + fade, dtype=np.float32)
+    out = np.empty(chunk, dtype=np.float32)
+    for start in range(0, len(buffer), chunk):
+        part = buffer[start : start + chunk]
+        view = out[: len(part)]
+        sound_gen.render(view, params)
+        np.copyto(part, view)
+
+    tone = buffer[:length].copy()
+    if fade:
+        ramp = np.linspace(0.0, 1.0, fade, endpoint=False, dtype=np.float32)
+        tone[:fade] = buffer[length:] * (1.0 - ramp) + buffer[:fade] * ramp
+    return tone
+
+
+class ToneCache:
+    """
+    繰り返し再生できるように生成した音をパラメータごとに保持するキャッシュ
+
+    キーは (SoundGen のクラス名, パラメータ名, 値を steps 段階に丸めた番号). 合計の大きさが
+    budget バイトを超えたら最も長く使っていない音から捨てる (LRU). prefetch で渡した音は
+    バックグラウンドのスレッドで生成しておくので、次のラウンドの音を get で引くときは
+    辞書を1回引くだけになる.
+
+    Parameters
+    ----------
+    budget : int
+        保持する音声データの合計の上限（バイト）
+    steps : int
+        パラメータの値を丸める段階の数
+    seconds : float
+        1つの音の長さ（秒）
+    """
+
+    def __init__(
+        self,
+        budget: int = Config.TONE_CACHE_BYTES,
+        steps: int = Config.TONE_CACHE_STEPS,
+        seconds: float = Config.TONE_LOOP_SECONDS,
+    ) -> None:
+        self.budget = budget
+        self.steps = steps
+        self.seconds = seconds
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tones = OrderedDict()  # キー -> 音声データ（末尾ほど最近使った）
+        self._pending = {}  # 生成中のキー -> 生成し終えたら set する Event
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._thread = None
+
+    def key(self, gen_class: type, param_name: str, value: float) -> tuple[str, str, int]:
+        return gen_class.__name__, param_name, round(min(max(value, 0.0), 1.0) * self.steps)
+
+    def get(self, gen_class: type, param_name: str, value: float) -> np.ndarray:
+        """
+        音を返す. キャッシュになければ（生成中ならそれを待ってから）この場で生成する
+
+        Parameters
+        ----------
+        gen_class : type[SoundGen]
+            SoundGen のクラス
+        param_name : str
+            値を指定するパラメータの名前
+        value : float
+            パラメータの値 (0.0~1.0, steps 段階に丸める)
+        """
+        key = self.key(gen_class, param_name, value)
+        while True:
+            with self._lock:
+                tone = self._tones.get(key)
+                if tone is not None:
+                    self._tones.move_to_end(key)
+                    self.hits += 1
+                    return tone
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+            pending.wait()
+        return self._render(gen_class, key, pending)
+
+    def prefetch(self, gen_class: type, param_name: str, value: float) -> None:
+        """音をバックグラウンドのスレッドで生成してキャッシュに入れておく"""
+        key = self.key(gen_class, param_name, value)
+        with self._lock:
+            if key in self._tones or key in self._pending:
+                return
+            self._pending[key] = threading.Event()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+                self._thread.start()
+        self._requests.put((gen_class, key))
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._tones
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tones.clear()
+            self.nbytes = 0
+
+    def _prefetch_loop(self) -> None:
+        while True:
+            gen_class, key = self._requests.get()
+            try:
+                self._render(gen_class, key, self._pending[key])
+            except Exception as e:
+                # 生成できなかった音は get で引いたときにもう一度生成する
+                print(f"Error in tone prefetch: {e}")
+
+    def _render(self, gen_class: type, key, pending: threading.Event) -> np.ndarray:
+        _, param_name, index = key
+        try:
+            tone = render_loop(gen_class, {param_name: index / self.steps}, self.seconds)
+            self._store(key, tone)
+            return tone
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.set()
+
+    def _store(self, key, tone: np.ndarray) -> None:
+        with self._lock:
+            if tone.nbytes > self.budget:
+                return
+            while self._tones and self.nbytes + tone.nbytes > self.budget:
+                _, evicted = self._tones.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self.evictions += 1
+            self._tones[key] = tone
+            self.nbytes += tone.nbytes
+
+
+class LoopPlayer:
+    """
+    ToneCache の音を AudioEngine の MixBus につないで繰り返し再生するクラス
+
+    音声データはキャッシュのものをそのまま読むだけなので、生成もコピーの確保もしない.
+    """
+
+    def __init__(self) -> None:
+        self.tone = None
+        self.position = 0
+        self.engine = None
+        # attach / detach で同じ音源だと分かるように、束縛メソッドを1つだけ作っておく
+        self._source = self._render
+
+    def start(self, tone: np.ndarray, engine) -> None:
+        """tone を先頭から繰り返し再生する"""
+        self.stop()
+        self.tone = tone
+        self.position = 0
+        self.engine = engine
+        engine.attach(self._source)
+
+    def stop(self) -> None:
+        if self.engine:
+            # フェードアウトして外れるまで待つ
+            self.engine.detach(self._source)
+            self.engine = None
+
+    @property
+    def playing(self) -> bool:
+        return self.engine is not None
+
+    def _render(self, out: np.ndarray) -> None:
+        """AudioEngine から呼ばれ、繰り返しながら out に音声データをコピーする"""
+        tone = self.tone
+        written = 0
+        while written < len(out):
+            count = min(len(out) - written, len(tone) - self.position)
+            out[written : written + count] = tone[self.position : self.position + count]
+            written += count
+            self.position = (self.position + count) % len(tone)
+
+
+# プロセス全体で共有するキャッシュ（shared_tone_cache で作る）
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_tone_cache() -> ToneCache:
+    """プロセス全体で1つの ToneCache を返す"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ToneCache()
+        return _shared_cache
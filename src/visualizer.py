@@ -1,24 +1,30 @@
 import pygame
 import sys
-from leapInput import LeapInput
+from inputHub import shared_input_hub
 from config import Config
 
 WIDTH = Config.WIDTH
 HEIGHT = Config.HEIGHT
 
 class HandVisualizer:
-    def __init__(self):
-        pygame.init()
-        # self.screen = pygame.display.set_mode((640, 480))
-        pygame.display.set_caption("Leap Motion Hand Visualizer")
-        self.clock = pygame.time.Clock()
-        self.leap_input = LeapInput()
+    def __init__(self, hub=None):
+        # 接続は InputHub が1つだけ持ち、ここではフレームを受け取る窓口だけを作る
+        self.input = (hub or shared_input_hub()).subscribe({"skeleton"})
         self.hands_colour = (0, 0, 0)
         self.background_colour = (0, 0, 0)
         # 画面の中心座標を計算
         self.screen_center_x = WIDTH // 2
         self.screen_center_y = HEIGHT // 2
 
+    @property
+    def seq(self):
+        """draw_hand が描くフレームの番号（変わっていなければ同じ絵になる）"""
+        return self.input.seq
+
+    def close(self):
+        """フレームの購読をやめる"""
+        self.input.close()
+
     def transform_coordinates(self, x, z):
         """Leap Motionの座標をPygameの座標系に変換"""
         # x座標はそのまま、z座標はy座標として使用
@@ -45,8 +51,8 @@ class HandVisualizer:
             return False
 
     def draw_hand(self, screen):
-        leap_data, _ = self.leap_input.get_hand_position()
-        if not leap_data or leap_data.palm_x is None or leap_data.palm_z is None:
+        leap_data, _ = self.input.get_hand_position()
+        if not leap_data or leap_data.palm_position is None or leap_data.joints is None:
             return
 
         # 手のひらの位置を描画
@@ -54,37 +60,26 @@ class HandVisualizer:
         if self.is_valid_position(palm_pos, screen):
             pygame.draw.circle(screen, self.hands_colour, palm_pos, 5)
 
-        def get_joint_position(joint):
-            if joint is None or joint.x is None or joint.z is None:
-                return None
-            return self.transform_coordinates(joint.x, joint.z)
+        # 全関節の x, z 座標をまとめて画面座標に変換する: (指, 骨, prev/next, 2)
+        joints = leap_data.joints[..., [0, 2]] + (self.screen_center_x, self.screen_center_y)
 
         # 各指の骨を描画
-        for digit in leap_data.fingers:
-            if digit is None:
-                continue
-            for bone in digit.bones:
-                if bone is None or bone.prev_joint is None or bone.next_joint is None:
+        for start_pos, end_pos in joints.reshape(-1, 2, 2).tolist():
+            if self.is_valid_position(start_pos, screen) and self.is_valid_position(
+                end_pos, screen
+            ):
+                try:
+                    pygame.draw.line(screen, self.hands_colour, start_pos, end_pos, 2)
+                    pygame.draw.circle(screen, self.hands_colour, start_pos, 3)
+                    pygame.draw.circle(screen, self.hands_colour, end_pos, 3)
+                except (TypeError, ValueError):
                     continue
-                start_pos = get_joint_position(bone.prev_joint)
-                end_pos = get_joint_position(bone.next_joint)
-
-                if start_pos is None or end_pos is None:
-                    continue
-
-                if self.is_valid_position(start_pos, screen) and self.is_valid_position(
-                    end_pos, screen
-                ):
-                    try:
-                        pygame.draw.line(
-                            screen, self.hands_colour, start_pos, end_pos, 2
-                        )
-                        pygame.draw.circle(screen, self.hands_colour, start_pos, 3)
-                        pygame.draw.circle(screen, self.hands_colour, end_pos, 3)
-                    except (TypeError, ValueError):
-                        continue
 
     def run(self):
+        pygame.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Leap Motion Hand Visualizer")
+        clock = pygame.time.Clock()
         running = True
         while running:
             for event in pygame.event.get():
@@ -95,14 +90,14 @@ class HandVisualizer:
                         running = False
 
             # 画面をクリア
-            self.screen.fill(self.background_colour)
+            screen.fill(self.background_colour)
 
             # 手の描画
-            self.draw_hand()
+            self.draw_hand(screen)
 
             # 画面を更新
             pygame.display.flip()
-            self.clock.tick(60)
+            clock.tick(60)
 
         pygame.quit()
         sys.exit()
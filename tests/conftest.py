@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# モジュールは src/ に平らに置かれているので、src/ から実行したときと同じように import できるようにする
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
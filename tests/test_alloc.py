@@ -0,0 +1,108 @@
+# tests/test_alloc.py
+"""
+定常状態の1ブロックの生成・出力でメモリを確保していないことを tracemalloc で確かめる
+
+Leap の SDK やオーディオデバイスがなくても動くように、音の生成と出力に必要なモジュール
+（oscillator / dspGraph / SoundGenerator / audioEngine）だけを import する.
+"""
+import gc
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from audioEngine import AudioEngine
+from audioSink import NullSink
+from SoundGenerator import PulseGen, SineGen
+
+BLOCK_SIZES = [64, 256, 1024]
+# 1ブロックの間に一時的に使ってよいメモリ（バイト）. パラメータの辞書やタプルなどの
+# 小さな Python オブジェクトの分（300~700 バイト程度）だけで、ブロックサイズによらない.
+# 256 サンプル以上の float32 の配列を1つでも確保すれば超えるので、ブロックごとに配列を
+# 作るコードは 256 / 1024 のケースで必ず落ちる
+PEAK_LIMIT = 1024
+BLOCKS = 500
+# 統計の件数などの整数が小さい整数のキャッシュ (<= 256) を抜けるまで回してから計測する
+WARMUP = 300
+
+CASES = [
+    ("SineGen", SineGen, {"frequency": 0.5, "FM": 0.0, "AM": 0.0}),
+    ("SineGen FM", SineGen, {"frequency": 0.5, "FM": 0.8, "AM": 0.0}),
+    ("SineGen FM+AM", SineGen, {"frequency": 0.5, "FM": 0.8, "AM": 0.5}),
+    ("PulseGen", PulseGen, {"frequency": 0.5, "dutycycle": 0.3, "AM": 0.0}),
+    ("PulseGen AM", PulseGen, {"frequency": 0.5, "dutycycle": 0.3, "AM": 0.5}),
+]
+
+
+def moving_params(params, i):
+    # 毎ブロック少しずつパラメータを動かす（ブロック内の補間も通る）
+    params["frequency"] = (i % 100) / 100
+    for key in ("FM", "dutycycle", "AM"):
+        if params.get(key):
+            params[key] = 0.2 + (i % 7) / 10
+    return params
+
+
+def measure(step, blocks=BLOCKS):
+    """
+    step を blocks 回呼んだ間に一時的に増えたメモリの最大値と、最後に残ったメモリ（バイト）.
+    何もしない step で測った tracemalloc 自身の分を差し引く
+    """
+
+    def traced(step):
+        gc.collect()
+        gc.disable()
+        tracemalloc.start()
+        try:
+            step(0)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            for i in range(blocks):
+                step(i)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+        return peak - baseline, current - baseline
+
+    noise_peak, noise_retained = traced(lambda i: None)
+    peak, retained = traced(step)
+    return peak - noise_peak, retained - noise_retained
+
+
+@pytest.mark.parametrize("block", BLOCK_SIZES)
+@pytest.mark.parametrize("name, gen_class, params", CASES, ids=[case[0] for case in CASES])
+def test_render_does_not_allocate(name, gen_class, params, block):
+    sound_gen = gen_class()
+    params = dict(params)
+    sound_gen.reset_phase(params)
+    out = np.empty(block, dtype=np.float32)
+
+    def step(i):
+        sound_gen.render(out, moving_params(params, i))
+
+    # 作業用の配列はここで確保される
+    for i in range(WARMUP):
+        step(i)
+    peak, retained = measure(step)
+    assert retained <= 0
+    assert peak < PEAK_LIMIT
+
+
+@pytest.mark.parametrize("block", BLOCK_SIZES)
+def test_engine_block_does_not_allocate(block):
+    # エンジンのブロック生成とコールバック（NullSink と同じ出力）
+    sound_gen = SineGen()
+    params = {"frequency": 0.5, "FM": 0.8, "AM": 0.5}
+    engine = AudioEngine(lambda out: sound_gen.render(out, params), block_size=block, sink=NullSink())
+    engine.running = True
+
+    def step(i):
+        engine._render_block()
+        engine._callback(None, block, {}, 0)
+
+    for i in range(WARMUP):
+        step(i)
+    peak, retained = measure(step)
+    assert retained <= 0
+    assert peak < PEAK_LIMIT
@@ -0,0 +1,59 @@
+# tests/test_offline_render.py
+"""
+offlineRender.render_offline が、同じパラメータで CaptureSink に再生した音と一致することを確かめる
+"""
+import time
+
+import numpy as np
+
+from audioEngine import close_shared_engine
+from audioSink import CaptureSink
+from offlineRender import Trajectory, render_offline
+from SoundGenerator import ContinuousSoundPlayer, SineGen
+
+BLOCK = 256
+# AM を掛けた SineGen は振幅が 1 を超える（MixBus のクリップを通る）
+PARAMS = {"frequency": 0.5, "FM": 0.8, "AM": 0.5}
+
+
+def capture(seconds, speed=4.0):
+    """
+    共有のエンジンを CaptureSink で開き、PARAMS のまま seconds 秒（実時間）再生した音と
+    その間のアンダーランの回数
+    """
+    sink = CaptureSink(speed=speed)
+    player = ContinuousSoundPlayer(SineGen(), block_size=BLOCK, sink=sink)
+    try:
+        player.start(dict(PARAMS))
+        time.sleep(seconds)
+        underruns = player.engine.stats.underruns
+        player.stop()
+    finally:
+        close_shared_engine()
+    return sink.samples(), underruns
+
+
+def test_offline_matches_capture():
+    captured, underruns = capture(0.5)
+    assert underruns == 0
+    # 音源がつながったブロックはフェードインのゲイン 0 から始まるので、最初の 0 でない
+    # サンプルの1つ前がそのブロックの先頭になる
+    start = int(np.flatnonzero(captured)[0]) - 1
+    assert start % BLOCK == 0
+    # 最後のブロック（stop のフェードアウト）より前を比べる
+    frames = (len(captured) - start) // BLOCK * BLOCK - BLOCK
+    assert frames >= 10 * BLOCK
+
+    offline = render_offline(
+        SineGen(), Trajectory([0.0], [dict(PARAMS)]), frames / 44100, block_size=BLOCK
+    )
+    np.testing.assert_array_equal(offline[:frames], captured[start : start + frames])
+    assert np.abs(offline).max() <= 1.0
+
+
+def test_offline_fades_in_and_clips():
+    offline = render_offline(SineGen(), Trajectory([0.0], [dict(PARAMS)]), 0.1, block_size=BLOCK)
+    # 最初のブロックは 0 から直線的に上がる
+    assert offline[0] == 0.0
+    assert np.abs(offline[:BLOCK // 8]).max() < 0.2
+    assert np.abs(offline).max() == 1.0